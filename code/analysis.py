@@ -1,256 +1,435 @@
+import hashlib
+import inspect
+import json
+import logging
+import multiprocessing
 import pandas as pd
-import statsmodels.formula.api as smf
-import matplotlib.pyplot as plt
+import matplotlib
+matplotlib.use("Agg")  # Plots are only saved to files, and are rendered in worker processes
+from matplotlib.figure import Figure
 import seaborn as sns
 import numpy as np
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 
+from dataset_io import load_merged_dataset
+from label_layout import layout_labels
+from regression import fit_models
 
-def run_regressions(data_path="artifacts/cleaned_merged_dataset.csv", output_path="artifacts/regression.csv"):
+logger = logging.getLogger(__name__)
+
+
+# Models estimated by run_regressions, all on the same sample and clustered on state
+REGRESSION_MODELS = [
+    # Income on avgrk, tuition and their interactions
+    {"name": "OLS with State Clustering (avgrk)", "type": "avgrk",
+     "formula": "median_earnings ~ avgrk + tuition + avgrk:tuition"},
+    # Income on sat score, tuition and their interactions
+    {"name": "OLS with State Clustering (sat_score)", "type": "sat_score",
+     "formula": "median_earnings ~ sat_score + tuition + sat_score:tuition"},
+]
+
+
+def run_regressions(data_path="artifacts/cleaned_merged_dataset.feather", output_path="artifacts/regression.csv",
+                    bootstrap_reps=0, bootstrap_weights="rademacher", seed=0):
     """
     Conduct two OLS regressions of median_earnings on independent variables with state-level clustering and save results to a CSV file.
 
-    This function conducts two separate regression using data from a specified CSV file:
+    This function conducts two separate regression using data from the typed merged dataset:
     1. Regresses "median_earnings" on "avgrk" (renamed from "avgtk"), "tuition", and their interaction,
        with clustering at the state level.
     2. Regresses "median_earnings" on "sat_score", "tuition", and their interaction,
        with clustering at the state level.
 
-    The results are combined into a single DataFrame, including coefficients, standard errors,
-    t-statistics, p-values, confidence intervals, R-squared, and adjusted R-squared, and saved
-    to a specified output CSV file.
+    Both models are fitted in one fit_models call. The results are combined into a single DataFrame,
+    including coefficients, standard errors, z-statistics, p-values, confidence intervals, R-squared,
+    and adjusted R-squared, and saved at full precision to a specified output CSV file. With few
+    states the analytic clustered errors are unreliable, so wild cluster bootstrap p-values and
+    confidence intervals can be added next to them.
 
     Parameters:
-        data_path (str, optional): Path to the input CSV file containing the dataset.
-                                  Defaults to "artifacts/cleaned_merged_dataset.csv".
+        data_path (str, optional): Path to the merged dataset (.feather, or .csv).
+                                  Defaults to "artifacts/cleaned_merged_dataset.feather".
         output_path (str, optional): Path to save the regression results CSV file.
                                     Defaults to "artifacts/regression.csv".
+        bootstrap_reps (int, optional): Wild cluster bootstrap replications; 0 (default) skips the bootstrap.
+        bootstrap_weights (str, optional): "rademacher" (default) or "webb" bootstrap weights.
+        seed (int, optional): Seed of the bootstrap weights.
 
     Returns:
-        None: The function saves the regression results to the specified CSV file and
-              prints the summary for debugging purposes.
+        None: The function saves the regression results to the specified CSV file.
     """
-    df = pd.read_csv(data_path)
+    df = load_merged_dataset(data_path)
 
     # Drop the observations with empty variables
     df = df.dropna(subset=["median_earnings", "avgtk", "sat_score", "tuition", "state"])
     df = df.rename(columns={"avgtk": "avgrk"})
+    df = df.astype({"median_earnings": float, "avgrk": float, "sat_score": float, "tuition": float})
 
-    # Regression 1: income on avgrk, tuition and their interactions, cluster on state
-    formula1 = "median_earnings ~ avgrk + tuition + avgrk:tuition"
-    model1 = smf.ols(formula1, data=df)
-    results1 = model1.fit(cov_type="cluster", cov_kwds={"groups": df["state"]})
-
-    # Regression 2: income on sat score, tuition and their interactions, cluster on state
-    formula2 = "median_earnings ~ sat_score + tuition + sat_score:tuition"
-    model2 = smf.ols(formula2, data=df)
-    results2 = model2.fit(cov_type="cluster", cov_kwds={"groups": df["state"]})
-
-    summary1 = results1.summary()
-    summary2 = results2.summary()
-    summary_table1 = pd.read_html(summary1.tables[1].as_html(), header=0, index_col=0)[0]
-    summary_table2 = pd.read_html(summary2.tables[1].as_html(), header=0, index_col=0)[0]
-    summary_table1["Model"] = "OLS with State Clustering (avgrk)"
-    summary_table1["R-squared"] = results1.rsquared
-    summary_table1["Adj. R-squared"] = results1.rsquared_adj
-    summary_table2["Model"] = "OLS with State Clustering (sat_score)"
-    summary_table2["R-squared"] = results2.rsquared
-    summary_table2["Adj. R-squared"] = results2.rsquared_adj
-    summary_table1["Model_Type"] = "avgrk"
-    summary_table2["Model_Type"] = "sat_score"
-    combined_table = pd.concat([summary_table1, summary_table2], axis=0)
+    combined_table = fit_models(df, REGRESSION_MODELS, cluster="state", bootstrap_reps=bootstrap_reps,
+                                bootstrap_weights=bootstrap_weights, seed=seed)
 
     # Save the result to CSV
     combined_table.to_csv(output_path)
 
 
-def generate_all_plots():
+# School name abbreviation mapping used for the point labels
+SCHOOL_ABBR = {
+    "Princeton University": "Princeton",
+    "Massachusetts Institute of Technology": "MIT",
+    "Harvard University": "Harvard",
+    "Stanford University": "Stanford",
+    "Yale University": "Yale",
+    "California Institute of Technology": "Caltech",
+    "Duke University": "Duke",
+    "Johns Hopkins University": "JHU",
+    "Northwestern University": "Northwestern",
+    "University of Pennsylvania": "UPenn",
+    "University of Chicago": "Chicago",
+    "Cornell University": "Cornell",
+    "Brown University": "Brown",
+    "Columbia University": "Columbia",
+    "University of California, Los Angeles": "UCLA",
+    "Dartmouth College": "Dartmouth",
+    "University of California, Berkeley": "UCB",
+    "Rice University": "Rice",
+    "Vanderbilt University": "Vanderbilt",
+    "University of Notre Dame": "Notre Dame",
+    "University of Michigan--Ann Arbor": "UMich",
+    "Washington University in St. Louis": "WashU",
+    "Carnegie Mellon University": "CMU",
+    "Georgetown University": "Georgetown",
+    "Emory University": "Emory",
+    "University of Virginia": "Virginia",
+    "University of North Carolina--Chapel Hill": "UNC",
+    "University of Southern California": "USC",
+    "University of California, San Diego": "UCSD",
+    "University of California San Diego": "UCSD",
+    "University of Florida": "Florida",
+    "The University of Texas--Austin": "UT",
+    "New York University": "NYU",
+    "University of California, Davis": "UCD",
+    "University of California, Irvine": "UCI",
+    "Georgia Institute of Technology": "Georgia Tech",
+    "University of Illinois Urbana-Champaign": "UIUC",
+    "Boston College": "BC",
+    "Tufts University": "Tufts",
+    "University of California, Santa Barbara": "UCSB",
+    "University of Wisconsin--Madison": "UWM",
+    "Rutgers University--New Brunswick": "Rutgers",
+    "Boston University": "BU",
+    "The Ohio State University": "OSU",
+    "University of Maryland, College Park": "Maryland",
+    "University of Rochester": "Rochester",
+    "University of Washington": "UW",
+    "Purdue University--Main Campus": "Purdue",
+    "University of Georgia": "Georgia",
+    "Lehigh University": "Lehigh",
+    "Northeastern University": "Northeastern"
+}
+
+# Markers cycled through for the states
+STATE_MARKERS = ["o", "s", "^", "D", "v", "p", "*", "h", "x", "+", ">", "<", "d", "P", "H", "X"]
+
+# The four scatter plots: x column, axis label, title and where the vertical axis crosses
+# ("median" puts it at the median of the x column)
+PLOT_SPECS = [
+    {"x_col": "sort_rank", "x_label": "School Rank (2026)", "title": "School Rank vs Median Earnings by State",
+     "x_median": "median"},
+    {"x_col": "tuition_std", "x_label": "Standardized Tuition",
+     "title": "Standardized Tuition vs Median Earnings by State", "x_median": 0},
+    {"x_col": "sat_score_std", "x_label": "Standardized SAT Score",
+     "title": "Standardized SAT Score vs Median Earnings by State", "x_median": 0},
+    {"x_col": "avgtk", "x_label": "Avg Rk", "title": "Avg Rank vs Median Earnings by State", "x_median": "median"},
+]
+
+# Above this many points the scatter layers are rasterized
+RASTERIZE_THRESHOLD = 500
+
+# Above this many points plots switch to hexbin density panels with per-state facets
+DENSITY_THRESHOLD = 2000
+
+# Labels drawn in density mode unless max_labels says otherwise
+DENSITY_MAX_LABELS = 20
+
+# Hash of each plot's data and config at its last render, used to skip unchanged plots
+PLOT_STATE = "artifacts/.plot_state.json"
+# Rendering code whose changes invalidate every cached plot
+PLOT_SOURCES = [__file__, inspect.getsourcefile(layout_labels)]
+
+
+def standardize_to_range(series):
+    """Rescale a series linearly to [-1, 1]."""
+    min_val = series.min()
+    max_val = series.max()
+    range_val = max_val - min_val
+    if range_val == 0:
+        return np.zeros_like(series)
+    standardized = 2 * (series - min_val) / range_val - 1
+    return standardized
+
+
+def text_plotter(ax, x_data, y_data, text_positions, texts, txt_width, txt_height):
+    """Draw the labels at their shifted heights, with a fine line back to the point when shifted."""
+    for x, y, t, text_label in zip(x_data, y_data, text_positions, texts):
+        if np.isnan(t):
+            continue
+        ax.annotate(text_label, (x, t), fontsize=11, ha="center", va="bottom", color="black",
+                    bbox=dict(facecolor="white", alpha=0.8, edgecolor="none"))
+        if y != t:
+            ax.plot([x, x], [y, t], color="black", alpha=0.3, linewidth=0.5, zorder=0)
+
+
+def prepare_plot_data(data_path="artifacts/cleaned_merged_dataset.feather"):
+    """
+    Load the merged dataset for plotting: abbreviated school names, standardized tuition and SAT
+    scores, and a (marker, color) style per state.
+
+    Returns:
+        tuple: (DataFrame, dict of state -> (marker, color)).
+    """
+    # Read the merged dataset; plotted columns are used as plain floats
+    df = load_merged_dataset(data_path)
+    df = df.astype({"sort_rank": float, "tuition": float, "sat_score": float, "median_earnings": float})
+
+    # Apply abbreviation mapping
+    df["school_name"] = df["school_name"].map(SCHOOL_ABBR).fillna(df["school_name"])
+
+    # Define state styles
+    states = df["state"].unique()
+    colors = sns.color_palette("husl", len(states))
+    state_style = {state: (STATE_MARKERS[i % len(STATE_MARKERS)], colors[i % len(colors)])
+                   for i, state in enumerate(states)}
+
+    # Standardize tuition and SAT scores
+    df["tuition_std"] = standardize_to_range(df["tuition"])
+    df["sat_score_std"] = standardize_to_range(df["sat_score"])
+    return df, state_style
+
+
+def style_axes(ax, df, x_col, x_median):
+    """Cross the axes at (x_median, median earnings), drop the top and right spines and add a grid."""
+    ax.spines["left"].set_position(("data", x_median))
+    ax.spines["bottom"].set_position(("data", df["median_earnings"].median()))
+    ax.spines["right"].set_color("none")
+    ax.spines["top"].set_color("none")
+    ax.xaxis.set_ticks_position("bottom")
+    ax.yaxis.set_ticks_position("left")
+
+    # Reverse x-axis if specified
+    if x_col in ["sort_rank", "avgtk"]:
+        ax.invert_xaxis()
+
+    ax.grid(True, linestyle="--", alpha=0.7)
+
+
+def label_points(ax, df, x_col, label_by, max_labels):
+    """Label the points at heights chosen by layout_labels, sized relative to the current axis limits."""
+    texts = df["school_name"].tolist()
+    x_data = df[x_col].to_numpy(dtype=float)
+    y_data = df["median_earnings"].to_numpy(dtype=float)
+
+    y_range = abs(ax.get_ylim()[1] - ax.get_ylim()[0])
+    x_range = abs(ax.get_xlim()[1] - ax.get_xlim()[0])
+    txt_height = 0.04 * y_range
+    txt_width = 0.02 * x_range
+
+    text_positions = layout_labels(x_data, y_data, txt_width, txt_height,
+                                   priority=df[label_by].to_numpy(dtype=float), max_labels=max_labels,
+                                   max_height=max(ax.get_ylim()))
+    text_plotter(ax, x_data, y_data, text_positions, texts, txt_width, txt_height)
+
+
+def plot_scatter(df, state_style, x_col, x_label, title, x_median, output_path, label_by="sort_rank",
+                 max_labels=None, density_threshold=DENSITY_THRESHOLD):
+    """
+    Render one scatter plot of median earnings against x_col and save it as a 300-dpi PNG.
+
+    The plot is drawn on its own Figure rather than through pyplot's global state, so several
+    plots can be rendered at the same time in different threads or processes. Labels are laid
+    out by layout_labels; with max_labels only the schools ranked best by label_by are labelled.
+
+    Points are split by state in a single groupby pass, and the point layers are rasterized once
+    there are more than RASTERIZE_THRESHOLD of them. Above density_threshold points the plot is
+    drawn by plot_density instead.
+    """
+    if density_threshold is not None and len(df) > density_threshold:
+        return plot_density(df, x_col, x_label, title, x_median, output_path, label_by,
+                            DENSITY_MAX_LABELS if max_labels is None else max_labels)
+
+    fig = Figure(figsize=(14, 10))
+    ax = fig.add_subplot()
+    rasterized = len(df) > RASTERIZE_THRESHOLD
+    groups = dict(iter(df.groupby("state", observed=True, sort=False)))
+    for state, (marker, color) in state_style.items():
+        state_data = groups.get(state, df.iloc[:0])
+        ax.scatter(state_data[x_col], state_data["median_earnings"],
+                   marker=marker, color=color, label=state, alpha=0.7, s=100, rasterized=rasterized)
+
+    style_axes(ax, df, x_col, x_median)
+    label_points(ax, df, x_col, label_by, max_labels)
+
+    ax.set_xlabel(x_label, loc="right", fontsize=12, fontweight="bold")
+    ax.set_ylabel("Median Earnings ($)", loc="top", fontsize=12, fontweight="bold")
+    ax.legend(title="State", loc="center left", bbox_to_anchor=(1, 0.5),
+              fontsize=10, frameon=True, facecolor="white", edgecolor="gray")
+    ax.set_title(title, fontsize=14, pad=20)
+    fig.tight_layout()
+    ax.margins(x=0.1, y=0.1)
+    fig.savefig(output_path, bbox_inches="tight", dpi=300)
+    return output_path
+
+
+def plot_density(df, x_col, x_label, title, x_median, output_path, label_by="sort_rank",
+                 max_labels=DENSITY_MAX_LABELS, gridsize=40, max_facets=12):
+    """
+    Render a large-N version of a scatter plot: a hexbin density of all schools next to small
+    per-state hexbin facets for the max_facets states with the most schools.
+
+    The number of drawn elements depends on the hexagon grid, not on the number of schools, so
+    render time and file size stay roughly flat as the data grows. Only the max_labels schools
+    ranked best by label_by are labelled.
+    """
+    df = df.dropna(subset=[x_col, "median_earnings"])
+    x_data = df[x_col].to_numpy(dtype=float)
+    y_data = df["median_earnings"].to_numpy(dtype=float)
+    extent = (x_data.min(), x_data.max(), y_data.min(), y_data.max())
+
+    fig = Figure(figsize=(14, 10))
+    grid = fig.add_gridspec(4, 6)
+    ax = fig.add_subplot(grid[:, :3])
+    bins = ax.hexbin(x_data, y_data, gridsize=gridsize, extent=extent, bins="log", mincnt=1, cmap="viridis",
+                     rasterized=True)
+    fig.colorbar(bins, ax=ax, location="bottom", shrink=0.6, pad=0.08, label="Schools per hexagon")
+    style_axes(ax, df, x_col, x_median)
+    label_points(ax, df, x_col, label_by, max_labels)
+    ax.set_xlabel(x_label, loc="right", fontsize=12, fontweight="bold")
+    ax.set_ylabel("Median Earnings ($)", loc="top", fontsize=12, fontweight="bold")
+    ax.set_title(f"{title} ({len(df):,} schools)", fontsize=14, pad=20)
+
+    groups = df.groupby("state", observed=True)
+    for i, (state, count) in enumerate(groups.size().nlargest(max_facets).items()):
+        state_data = groups.get_group(state)
+        facet = fig.add_subplot(grid[i // 3, 3 + i % 3])
+        facet.hexbin(state_data[x_col].to_numpy(dtype=float), state_data["median_earnings"].to_numpy(dtype=float),
+                     gridsize=gridsize // 2, extent=extent, bins="log", mincnt=1, cmap="viridis", rasterized=True)
+        if x_col in ["sort_rank", "avgtk"]:
+            facet.invert_xaxis()
+        facet.set_title(f"{state} ({count:,})", fontsize=9)
+        facet.tick_params(labelbottom=False, labelleft=False, length=0)
+
+    fig.tight_layout()
+    fig.savefig(output_path, bbox_inches="tight", dpi=300)
+    return output_path
+
+
+def _render_plot(job):
+    """Render one plot job in a worker process; returns (output path, seconds)."""
+    start = time.perf_counter()
+    plot_scatter(**job)
+    return job["output_path"], time.perf_counter() - start
+
+
+def plot_fingerprint(job):
+    """
+    Hash a plot job's data and config, the rendering code and the matplotlib/seaborn style inputs
+    (library versions and rcParams) into a hex digest.
+    """
+    digest = hashlib.sha256()
+    data = job["df"]
+    digest.update(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+    digest.update(json.dumps(list(data.columns)).encode("utf-8"))
+    config = {key: value for key, value in job.items() if key != "df"}
+    digest.update(json.dumps(config, sort_keys=True, default=str).encode("utf-8"))
+    for path in PLOT_SOURCES:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    style = {"matplotlib": matplotlib.__version__, "seaborn": sns.__version__,
+             "rcParams": sorted(matplotlib.rcParams.items())}
+    digest.update(json.dumps(style, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def generate_all_plots(data_path="artifacts/cleaned_merged_dataset.feather", output_dir="plot", max_workers=None,
+                       force=False, state_file=PLOT_STATE, max_labels=None, label_by="sort_rank",
+                       density_threshold=DENSITY_THRESHOLD):
     """
     Generates four scatter plots comparing university median earnings against school rank,
     standardized tuition, SAT scores, and average rank. Uses state-specific markers and colors,
     with non-overlapping labels connected by fine black lines. Axes are oriented negative to positive (left-to-right, bottom-to-top).
 
+    Each plot is rendered in its own process, so the whole call takes about as long as the
+    slowest plot. A plot whose data and config hash match its last render (recorded in
+    state_file) and whose PNG still exists is skipped.
+
     Usage:
         Run: `python analysis_data.py`
         Or: `from analysis_data import generate_all_plots; generate_all_plots()`
 
     Args:
-        None. Uses default CSV path "artifacts/cleaned_merged_dataset.csv" with columns
-         "school_name", "state", "sort_rank", "tuition", "sat_score", "median_earnings", "avgtk".
+        data_path (str): Merged dataset with columns "school_name", "state", "sort_rank", "tuition",
+                         "sat_score", "median_earnings", "avgtk".
+        output_dir (str): Directory for the PNG files.
+        max_workers (int, optional): Worker processes. Defaults to one per plot to render.
+        force (bool): Render every plot even if it is unchanged.
+        state_file (str): Where the plot hashes are kept.
+        max_labels (int, optional): Label only this many schools per plot. Defaults to all.
+        label_by (str): Column ranking the schools for labelling; lower values are labelled first.
+        density_threshold (int, optional): Draw hexbin density panels with per-state facets instead of
+                                           a scatter above this many schools; None never does.
 
     Returns:
-        None. Saves four PNG files in "plot" directory.
+        dict: Output path -> "rendered" or "skipped (up to date)". Saves four PNG files in output_dir.
 
     Requirements:
         Install: `pip install pandas matplotlib seaborn numpy`
         CSV file must be at specified path.
 
     Notes:
-        Update `csv_path` in `generate_all_plots` if needed (e.g., "C:/Users/YourUsername/Downloads/cleaned_merged_dataset.csv").
-        Adjust `txt_height`/`txt_width` in `plot_scatter` if labels overlap.
+        Adjust `txt_height`/`txt_width` in `label_points` if labels overlap, or set `max_labels`
+        when there are too many schools to label them all.
     """
-    # Default CSV path and create plot directory
-    csv_path = "artifacts/cleaned_merged_dataset.csv"
-    os.makedirs("plot", exist_ok=True)
-
-    # Read the CSV file
-    df = pd.read_csv(csv_path)
-
-    # School name abbreviation mapping
-    school_abbr = {
-        "Princeton University": "Princeton",
-        "Massachusetts Institute of Technology": "MIT",
-        "Harvard University": "Harvard",
-        "Stanford University": "Stanford",
-        "Yale University": "Yale",
-        "California Institute of Technology": "Caltech",
-        "Duke University": "Duke",
-        "Johns Hopkins University": "JHU",
-        "Northwestern University": "Northwestern",
-        "University of Pennsylvania": "UPenn",
-        "University of Chicago": "Chicago",
-        "Cornell University": "Cornell",
-        "Brown University": "Brown",
-        "Columbia University": "Columbia",
-        "University of California, Los Angeles": "UCLA",
-        "Dartmouth College": "Dartmouth",
-        "University of California, Berkeley": "UCB",
-        "Rice University": "Rice",
-        "Vanderbilt University": "Vanderbilt",
-        "University of Notre Dame": "Notre Dame",
-        "University of Michigan--Ann Arbor": "UMich",
-        "Washington University in St. Louis": "WashU",
-        "Carnegie Mellon University": "CMU",
-        "Georgetown University": "Georgetown",
-        "Emory University": "Emory",
-        "University of Virginia": "Virginia",
-        "University of North Carolina--Chapel Hill": "UNC",
-        "University of Southern California": "USC",
-        "University of California, San Diego": "UCSD",
-        "University of Florida": "Florida",
-        "The University of Texas--Austin": "UT",
-        "New York University": "NYU",
-        "University of California, Davis": "UCD",
-        "University of California, Irvine": "UCI",
-        "Georgia Institute of Technology": "Georgia Tech",
-        "University of Illinois Urbana-Champaign": "UIUC",
-        "Boston College": "BC",
-        "Tufts University": "Tufts",
-        "University of California, Santa Barbara": "UCSB",
-        "University of Wisconsin--Madison": "UWM",
-        "Rutgers University--New Brunswick": "Rutgers",
-        "Boston University": "BU",
-        "The Ohio State University": "OSU",
-        "University of Maryland, College Park": "Maryland",
-        "University of Rochester": "Rochester",
-        "University of Washington": "UW",
-        "Purdue University--Main Campus": "Purdue",
-        "University of Georgia": "Georgia",
-        "Lehigh University": "Lehigh",
-        "Northeastern University": "Northeastern"
-    }
-
-    # Apply abbreviation mapping
-    df["school_name"] = df["school_name"].map(school_abbr).fillna(df["school_name"])
-
-    # Define state styles
-    states = df["state"].unique()
-    markers = ["o", "s", "^", "D", "v", "p", "*", "h", "x", "+", ">", "<", "d", "P", "H", "X"]
-    colors = sns.color_palette("husl", len(states))
-    state_style = {state: (markers[i % len(markers)], colors[i % len(colors)]) for i, state in enumerate(states)}
-
-    # Standardize tuition and SAT scores
-    def standardize_to_range(series):
-        min_val = series.min()
-        max_val = series.max()
-        range_val = max_val - min_val
-        if range_val == 0:
-            return np.zeros_like(series)
-        standardized = 2 * (series - min_val) / range_val - 1
-        return standardized
-
-    df["tuition_std"] = standardize_to_range(df["tuition"])
-    df["sat_score_std"] = standardize_to_range(df["sat_score"])
-
-    # Internal function to get text positions
-    def get_text_positions(x_data, y_data, txt_width, txt_height):
-        a = list(zip(y_data, x_data))
-        text_positions = y_data.copy()
-        for index, (y, x) in enumerate(a):
-            local_text_coordinates = [i for i in a if
-                                      i[0] > (y - txt_height) and abs(i[1] - x) < txt_width * 2 and i != (y, x)]
-            if local_text_coordinates:
-                sorted_ltp = sorted(local_text_coordinates)
-                if abs(sorted_ltp[0][0] - y) < txt_height:
-                    differ = np.diff(sorted_ltp, axis=0)
-                    a[index] = (sorted_ltp[-1][0] + txt_height, x)
-                    text_positions[index] = sorted_ltp[-1][0] + txt_height * 1.01
-                    for k, (j, m) in enumerate(differ):
-                        if j > txt_height * 2:
-                            a[index] = (sorted_ltp[k][0] + txt_height, x)
-                            text_positions[index] = sorted_ltp[k][0] + txt_height
-                            break
-        return text_positions
-
-    # Internal function to plot text
-    def text_plotter(ax, x_data, y_data, text_positions, texts, txt_width, txt_height):
-        for x, y, t, text_label in zip(x_data, y_data, text_positions, texts):
-            ax.annotate(text_label, (x, t), fontsize=11, ha="center", va="bottom", color="black",
-                        bbox=dict(facecolor="white", alpha=0.8, edgecolor="none"))
-            if y != t:
-                ax.plot([x, x], [y, t], color="black", alpha=0.3, linewidth=0.5, zorder=0)
-
-    # Internal function to plot scatter
-    def plot_scatter(df, state_style, x_col, x_label, title, x_median):
-        plt.figure(figsize=(14, 10))
-        for state, (marker, color) in state_style.items():
-            state_data = df[df["state"] == state]
-            plt.scatter(state_data[x_col], state_data["median_earnings"],
-                        marker=marker, color=color, label=state, alpha=0.7, s=100)
-
-        ax = plt.gca()
-        ax.spines["left"].set_position(("data", x_median))
-        ax.spines["bottom"].set_position(("data", df["median_earnings"].median()))
-        ax.spines["right"].set_color("none")
-        ax.spines["top"].set_color("none")
-        ax.xaxis.set_ticks_position("bottom")
-        ax.yaxis.set_ticks_position("left")
-
-        # Reverse x-axis if specified
-        if x_col in ["sort_rank", "avgtk"]:
-            ax.invert_xaxis()
-
-        plt.grid(True, linestyle="--", alpha=0.7)
-
-        df_sorted = df.sort_values(x_col).reset_index(drop=True)
-        texts = df_sorted["school_name"].tolist()
-        x_data = df_sorted[x_col].tolist()
-        y_data = df_sorted["median_earnings"].tolist()
-
-        y_range = abs(plt.ylim()[1] - plt.ylim()[0])
-        x_range = abs(plt.xlim()[1] - plt.xlim()[0])
-        txt_height = 0.04 * y_range
-        txt_width = 0.02 * x_range
-
-        text_positions = get_text_positions(x_data, y_data, txt_width, txt_height)
-        text_plotter(ax, x_data, y_data, text_positions, texts, txt_width, txt_height)
-
-        plt.xlabel(x_label, loc="right", fontsize=12, fontweight="bold")
-        plt.ylabel("Median Earnings ($)", loc="top", fontsize=12, fontweight="bold")
-        plt.legend(title="State", loc="center left", bbox_to_anchor=(1, 0.5),
-                   fontsize=10, frameon=True, facecolor="white", edgecolor="gray")
-        plt.title(title, fontsize=14, pad=20)
-        plt.tight_layout()
-        plt.margins(x=0.1, y=0.1)
-        plt.savefig(f"plot/{x_col}_vs_median_earnings.png", bbox_inches="tight", dpi=300)
-        plt.close()
-
-    # Generate all plots
-    plot_scatter(df, state_style, "sort_rank", "School Rank (2026)", "School Rank vs Median Earnings by State",
-                 df["sort_rank"].median())
-    plot_scatter(df, state_style, "tuition_std", "Standardized Tuition",
-                 "Standardized Tuition vs Median Earnings by State", 0)
-    plot_scatter(df, state_style, "sat_score_std", "Standardized SAT Score",
-                 "Standardized SAT Score vs Median Earnings by State", 0)
-    plot_scatter(df, state_style, "avgtk", "Avg Rk",
-                 "Avg Rank vs Median Earnings by State", df["avgtk"].median())
\ No newline at end of file
+    os.makedirs(output_dir, exist_ok=True)
+    df, state_style = prepare_plot_data(data_path)
+
+    jobs = []
+    for spec in PLOT_SPECS:
+        x_col = spec["x_col"]
+        x_median = df[x_col].median() if spec["x_median"] == "median" else spec["x_median"]
+        columns = list(dict.fromkeys(["school_name", "state", x_col, "median_earnings", label_by]))
+        jobs.append({"df": df[columns], "state_style": state_style,
+                     "x_col": x_col, "x_label": spec["x_label"], "title": spec["title"], "x_median": x_median,
+                     "output_path": os.path.join(output_dir, f"{x_col}_vs_median_earnings.png"),
+                     "label_by": label_by, "max_labels": max_labels, "density_threshold": density_threshold})
+
+    try:
+        with open(state_file, encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        state = {}
+    hashes = {job["output_path"]: plot_fingerprint(job) for job in jobs}
+    todo = [job for job in jobs if force or not os.path.exists(job["output_path"])
+            or state.get(job["output_path"]) != hashes[job["output_path"]]]
+    status = {job["output_path"]: "skipped (up to date)" for job in jobs}
+
+    if todo:
+        start = time.perf_counter()
+        # Workers come from a forkserver that has imported this module once: forking the pipeline
+        # process itself would copy its live threads' locks and its tracemalloc state
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload([__name__])
+        with ProcessPoolExecutor(max_workers=max_workers or len(todo), mp_context=context) as pool:
+            for output_path, seconds in pool.map(_render_plot, todo):
+                logger.info(f"Rendered {output_path} in {seconds:.2f}s")
+                status[output_path] = "rendered"
+                state[output_path] = hashes[output_path]
+        logger.info(f"Rendered {len(todo)} plot(s) in {time.perf_counter() - start:.2f}s")
+
+        os.makedirs(os.path.dirname(state_file) or ".", exist_ok=True)
+        with open(state_file, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2, sort_keys=True)
+    for output_path, outcome in status.items():
+        if outcome != "rendered":
+            logger.info(f"Skipped {output_path} (up to date)")
+    return status
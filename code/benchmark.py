@@ -0,0 +1,656 @@
+import argparse
+import contextlib
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import platform
+import re
+import resource
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import numpy as np
+import pandas as pd
+from bs4 import BeautifulSoup
+from concurrent.futures import ProcessPoolExecutor
+
+from analysis import generate_all_plots, plot_scatter, prepare_plot_data, run_regressions
+from data_cleaning import RAW_FILES, process_university_data, raw_source_paths
+from data_collection import (
+    EARNINGS_URL, PUH_COLUMNS, PUH_NAME_MAPPING, PUH_ROW_RANGE, PUH_URL, USNEWS_ANALYSIS_CATEGORY, USNEWS_SEARCH_URL,
+    collect_usnews_partitions, scrape_college_earnings, scrape_puh_rankings
+)
+from dataset_io import PANDAS_TYPES, load_merged_dataset, save_merged_dataset, to_arrow
+from fixture_server import Conditions, FixtureServer
+from http_cache import cached_body, set_cache_dir
+from http_session import configure_session
+from rate_limit import DEFAULT_LIMITS, HOST_LIMITS, configure_host, reset_limiters, throttle_stats
+from label_layout import layout_labels
+from panel import run_panel_regressions
+from synthetic import write_sources
+from table_extract import extract_table
+
+
+# Results of the synthetic-data suite, one JSON line per stage and size, kept across commits
+BENCHMARK_HISTORY = "artifacts/benchmark_history.jsonl"
+
+SYNTHETIC_STAGES = ["clean", "regress", "panel", "plot"]
+
+# Seconds a synthetic-benchmark stage may take before it is stopped and recorded as timed out
+STAGE_TIMEOUT = 1800
+
+
+@contextlib.contextmanager
+def quiet(*names, level=logging.WARNING):
+    """Raise the named loggers to `level` for the duration of the block, e.g. to hide per-run progress."""
+    loggers = [logging.getLogger(name) for name in names]
+    levels = [logger.level for logger in loggers]
+    for logger in loggers:
+        logger.setLevel(level)
+    try:
+        yield
+    finally:
+        for logger, previous in zip(loggers, levels):
+            logger.setLevel(previous)
+
+
+def measure(func, repeat=5):
+    """
+    Time a zero-argument function and record its peak traced memory.
+
+    Returns:
+        dict: "best_s" and "mean_s" over `repeat` timed runs, and "peak_mb" from one extra run
+              under tracemalloc (kept separate because tracing slows the code down).
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {"best_s": min(timings), "mean_s": sum(timings) / len(timings), "peak_mb": peak / 2 ** 20}
+
+
+def print_results(title, results):
+    print(f"\n{title}")
+    print(f"  {'variant':<24} {'best (ms)':>10} {'mean (ms)':>10} {'peak (MB)':>10}")
+    for name, result in results.items():
+        print(f"  {name:<24} {result['best_s'] * 1000:10.2f} {result['mean_s'] * 1000:10.2f} "
+              f"{result['peak_mb']:10.2f}")
+
+
+def legacy_parse_puh(html):
+    """The PUH table parsing used before table_extract: html.parser, regex row filter, one find per cell."""
+    soup = BeautifulSoup(html, "html.parser")
+    table = soup.find("table")
+    rows = table.find_all("tr", attrs={"class": re.compile(r"row-\d+")})
+    filtered_rows = []
+    for tr in rows:
+        for cls in tr.get("class"):
+            row_match = re.search(r"row-(\d+)", cls)
+            if row_match:
+                row_num = int(row_match.group(1))
+                if PUH_ROW_RANGE[0] <= row_num <= PUH_ROW_RANGE[1]:
+                    filtered_rows.append((row_num, tr))
+                    break
+    filtered_rows.sort(key=lambda x: x[0])
+
+    data = []
+    for row_num, tr in filtered_rows:
+        record = {}
+        for cls, field in PUH_COLUMNS.items():
+            td = tr.find("td", class_=cls)
+            record[field] = td.get_text(strip=True) if td else "N/A"
+        # The mapping used to be rebuilt inside the loop for every row
+        name_mapping = dict(PUH_NAME_MAPPING)
+        record["University"] = name_mapping.get(record["University"], record["University"])
+        data.append(record)
+    return data
+
+
+def bench_puh_parse(html_path=None, repeat=5):
+    """
+    Compare the legacy PUH parser with table_extract on a saved copy of the page.
+
+    Args:
+        html_path (str, optional): Saved HTML file. Defaults to the copy in the HTTP cache.
+        repeat (int): Timed runs per variant.
+    """
+    if html_path:
+        with open(html_path, "rb") as f:
+            html = f.read()
+    else:
+        html = cached_body(PUH_URL)
+        if html is None:
+            raise SystemExit("No saved PUH page: pass --html or run the collectors once to fill the cache.")
+
+    def new_parse():
+        return extract_table(html, PUH_COLUMNS, row_range=PUH_ROW_RANGE,
+                             converters={"University": lambda name: PUH_NAME_MAPPING.get(name, name)})
+
+    if legacy_parse_puh(html) != new_parse():
+        raise SystemExit("table_extract output differs from the legacy parser.")
+
+    results = {
+        "legacy (html.parser)": measure(lambda: legacy_parse_puh(html), repeat),
+        "table_extract (lxml)": measure(new_parse, repeat),
+    }
+    print_results(f"PUH table parsing ({len(html):,} bytes)", results)
+    return results
+
+
+def resample_merged(df, n_rows, seed=0):
+    """Grow the merged dataset to n_rows by resampling its rows and giving each copy a unique name."""
+    rng = np.random.default_rng(seed)
+    sample = df.iloc[rng.integers(0, len(df), n_rows)].reset_index(drop=True)
+    sample["school_name"] = sample["school_name"] + " #" + pd.RangeIndex(n_rows).astype(str)
+    return sample
+
+
+def bench_artifact_io(sizes=(50, 100_000), data_path="artifacts/cleaned_merged_dataset.csv", repeat=3):
+    """
+    Compare loading the merged dataset from CSV (pandas dtype inference) and from typed Feather.
+
+    For each size the dataset is resampled to that many rows, written in both formats to a
+    temporary directory and loaded back. Reported memory is the deep size of the loaded frame.
+    """
+    base = pd.read_csv(data_path)
+    all_results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rows in sizes:
+            df = resample_merged(base, n_rows)
+            csv_path = os.path.join(tmp, f"merged_{n_rows}.csv")
+            feather_path = os.path.join(tmp, f"merged_{n_rows}.feather")
+            save_merged_dataset(df, feather_path, csv_path=csv_path)
+
+            loaders = {
+                "csv (read_csv)": lambda: pd.read_csv(csv_path),
+                "feather (mmap)": lambda: load_merged_dataset(feather_path),
+                "feather (no mmap)": lambda: load_merged_dataset(feather_path, memory_map=False),
+            }
+            results = {name: measure(loader, repeat) for name, loader in loaders.items()}
+            print_results(f"Merged dataset load, {n_rows:,} rows "
+                          f"(csv {os.path.getsize(csv_path) / 2 ** 20:.2f} MB, "
+                          f"feather {os.path.getsize(feather_path) / 2 ** 20:.2f} MB)", results)
+            print(f"  {'variant':<24} {'frame (MB)':>10}")
+            for name, loader in loaders.items():
+                frame_mb = loader().memory_usage(deep=True).sum() / 2 ** 20
+                results[name]["frame_mb"] = frame_mb
+                print(f"  {name:<24} {frame_mb:10.3f}")
+            all_results[n_rows] = results
+    return all_results
+
+
+def bench_compact_memory(copies=(1, 100), base_path="artifacts"):
+    """
+    Compare per-step memory of process_university_data in default and memory-optimized mode.
+
+    Each raw source (see raw_source_paths) is stacked `copies` times (as if it held that many
+    yearly snapshots) in a temporary directory, and both modes are run on the same files.
+    """
+    paths = raw_source_paths(Path(base_path), category=USNEWS_ANALYSIS_CATEGORY)
+    all_results = {}
+    for n_copies in copies:
+        with tempfile.TemporaryDirectory() as tmp:
+            for source, filename in RAW_FILES.items():
+                df = pd.read_csv(paths[source])
+                pd.concat([df] * n_copies, ignore_index=True).to_csv(os.path.join(tmp, filename), index=False)
+            with quiet("data_cleaning"):
+                default = process_university_data(tmp, export_csv=False).attrs["memory_mb"]
+                compact = process_university_data(tmp, export_csv=False, compact=True).attrs["memory_mb"]
+
+        print(f"\nprocess_university_data memory, raw sources x{n_copies}")
+        print(f"  {'step':<24} {'default (MB)':>13} {'compact (MB)':>13} {'ratio':>7}")
+        for step in default:
+            ratio = compact[step] / default[step] if default[step] else float("nan")
+            print(f"  {step:<24} {default[step]:13.3f} {compact[step]:13.3f} {ratio:7.2f}")
+        all_results[n_copies] = {"default": default, "compact": compact}
+    return all_results
+
+
+def _run_cleaning(base_path, chunksize):
+    start = time.perf_counter()
+    with quiet("data_cleaning"):
+        process_university_data(base_path, export_csv=False, chunksize=chunksize)
+    seconds = time.perf_counter() - start
+    # ru_maxrss is reported in kilobytes on Linux
+    return seconds, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2 ** 10
+
+
+def check_clean_modes(chunksizes=(1, 10, 50, 100, 1000), base_path="artifacts"):
+    """
+    Check that chunked and memory-optimized cleaning produce the same dataset as the default mode.
+
+    Small chunk sizes matter most: a chunk in which a rank column is entirely missing is read as a
+    categorical with no categories. Every variant is typed with the merged schema before the
+    comparison; values must match to float32 precision, since compact mode stores money, scores
+    and the average rank as float32.
+
+    Raises:
+        AssertionError: If a variant differs from the default output.
+    """
+    def typed(df):
+        return to_arrow(df).to_pandas(types_mapper=PANDAS_TYPES.get)
+
+    print(f"  US News source: {raw_source_paths(Path(base_path), category=USNEWS_ANALYSIS_CATEGORY)['usnews']}")
+    # raw_source_paths has already warned if the flat snapshot is used; every variant reads the same files
+    with quiet("data_cleaning", level=logging.ERROR):
+        expected = typed(process_university_data(base_path, export_csv=False, category=USNEWS_ANALYSIS_CATEGORY))
+        variants = {"compact": {"compact": True}}
+        for chunksize in chunksizes:
+            variants[f"chunks of {chunksize}"] = {"chunksize": chunksize}
+            variants[f"compact, chunks of {chunksize}"] = {"compact": True, "chunksize": chunksize}
+        for name, options in variants.items():
+            actual = typed(process_university_data(base_path, export_csv=False, category=USNEWS_ANALYSIS_CATEGORY,
+                                                   **options))
+            try:
+                pd.testing.assert_frame_equal(actual, expected, check_exact=False, rtol=1e-6)
+            except AssertionError as e:
+                raise AssertionError(f"Cleaning with {name} differs from the default mode: {e}") from None
+            print(f"  {name:<24} {len(actual):6d} rows, matches the default mode")
+    return list(variants)
+
+
+def bench_chunked_clean(copies=5000, chunksize=100_000, base_path="artifacts"):
+    """
+    Compare whole-file and chunked cleaning on an inflated earnings file.
+
+    The earnings source is stacked `copies` times to mimic a large Scorecard extract. Each
+    variant runs in a fresh process so that its peak resident memory can be read separately.
+    """
+    paths = raw_source_paths(Path(base_path), category=USNEWS_ANALYSIS_CATEGORY)
+    with tempfile.TemporaryDirectory() as tmp:
+        for source, filename in RAW_FILES.items():
+            df = pd.read_csv(paths[source])
+            if source == "earnings":
+                df = pd.concat([df] * copies, ignore_index=True)
+            df.to_csv(os.path.join(tmp, filename), index=False)
+        size_mb = os.path.getsize(os.path.join(tmp, RAW_FILES["earnings"])) / 2 ** 20
+
+        results = {}
+        for name, size in [("whole file", None), (f"chunks of {chunksize:,}", chunksize)]:
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                seconds, peak_mb = pool.submit(_run_cleaning, tmp, size).result()
+            results[name] = {"seconds": seconds, "peak_rss_mb": peak_mb}
+
+    print(f"\nCleaning with a {size_mb:.1f} MB earnings file ({copies}x)")
+    print(f"  {'variant':<24} {'time (s)':>10} {'peak RSS (MB)':>14}")
+    for name, result in results.items():
+        print(f"  {name:<24} {result['seconds']:10.2f} {result['peak_rss_mb']:14.1f}")
+    return results
+
+
+def legacy_text_positions(x_data, y_data, txt_width, txt_height):
+    """The label layout used before label_layout: every label scans every other point (expects x-sorted input)."""
+    a = list(zip(y_data, x_data))
+    text_positions = y_data.copy()
+    for index, (y, x) in enumerate(a):
+        local_text_coordinates = [i for i in a if
+                                  i[0] > (y - txt_height) and abs(i[1] - x) < txt_width * 2 and i != (y, x)]
+        if local_text_coordinates:
+            sorted_ltp = sorted(local_text_coordinates)
+            if abs(sorted_ltp[0][0] - y) < txt_height:
+                differ = np.diff(sorted_ltp, axis=0)
+                a[index] = (sorted_ltp[-1][0] + txt_height, x)
+                text_positions[index] = sorted_ltp[-1][0] + txt_height * 1.01
+                for k, (j, m) in enumerate(differ):
+                    if j > txt_height * 2:
+                        a[index] = (sorted_ltp[k][0] + txt_height, x)
+                        text_positions[index] = sorted_ltp[k][0] + txt_height
+                        break
+    return text_positions
+
+
+def count_label_overlaps(x_data, text_positions, txt_width, txt_height, block=1000):
+    """Number of pairs of placed labels whose boxes overlap."""
+    placed = ~np.isnan(text_positions)
+    x, t = np.asarray(x_data)[placed], text_positions[placed]
+    overlaps = 0
+    for start in range(0, len(x), block):
+        dx = np.abs(x[start:start + block, None] - x[None, :]) < 2 * txt_width
+        dt = np.abs(t[start:start + block, None] - t[None, :]) < txt_height
+        overlaps += int((dx & dt).sum()) - min(block, len(x) - start)
+    return overlaps // 2
+
+
+def bench_label_layout(sizes=(50, 500, 5000), repeat=3, max_labels=None, seed=0):
+    """
+    Compare the legacy label layout with layout_labels on random points.
+
+    Points are uniform on the unit square and labels use the plots' proportions (2% of the x
+    range wide on each side, 4% of the y range tall), so denser sets collide more. As in the
+    plots, layout_labels leaves out labels that would end above the top of the square.
+    """
+    rng = np.random.default_rng(seed)
+    txt_width, txt_height = 0.02, 0.04
+    all_results = {}
+    for n_points in sizes:
+        x_data = np.sort(rng.random(n_points))
+        y_data = rng.random(n_points)
+        priority = rng.permutation(n_points)
+        variants = {
+            "legacy": lambda: legacy_text_positions(x_data.tolist(), y_data.tolist(), txt_width, txt_height),
+            "layout_labels (grid)": lambda: layout_labels(x_data, y_data, txt_width, txt_height, max_height=1.0),
+        }
+        if max_labels:
+            variants[f"layout_labels top {max_labels}"] = lambda: layout_labels(
+                x_data, y_data, txt_width, txt_height, priority=priority, max_labels=max_labels, max_height=1.0)
+        results = {name: measure(func, repeat) for name, func in variants.items()}
+        print_results(f"Label layout, {n_points:,} points", results)
+        print(f"  {'variant':<24} {'overlaps':>10} {'max height':>10} {'labelled':>10}")
+        for name, func in variants.items():
+            positions = np.asarray(func(), dtype=float)
+            results[name]["overlaps"] = count_label_overlaps(x_data, positions, txt_width, txt_height)
+            results[name]["max_height"] = float(np.nanmax(positions))
+            results[name]["labelled"] = int(np.isfinite(positions).sum())
+            print(f"  {name:<24} {results[name]['overlaps']:10d} {results[name]['max_height']:10.2f} "
+                  f"{results[name]['labelled']:10d}")
+        all_results[n_points] = results
+    return all_results
+
+
+def bench_plot_render(sizes=(50, 1000, 6000, 20000), data_path="artifacts/cleaned_merged_dataset.feather",
+                      max_labels=20):
+    """
+    Compare render time and PNG size of the school-rank plot as a plain scatter and in the
+    default mode (hexbin density panels above DENSITY_THRESHOLD points).
+
+    The merged dataset is resampled to each size and jittered (resampled rows would otherwise
+    sit on top of each other); both variants label max_labels schools so that the comparison
+    is about drawing the points.
+    """
+    rng = np.random.default_rng(0)
+    base, state_style = prepare_plot_data(data_path)
+    variants = {"scatter": {"density_threshold": None}, "default (density)": {}}
+    all_results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"\nSchool rank plot rendering ({max_labels} labels)")
+        print(f"  {'points':>8} {'variant':<20} {'time (s)':>9} {'PNG (MB)':>9}")
+        for n_points in sizes:
+            df = resample_merged(base, n_points)
+            for column in ["sort_rank", "median_earnings"]:
+                df[column] += rng.normal(0, 0.1 * base[column].std(), n_points)
+            results = {}
+            for name, options in variants.items():
+                output_path = os.path.join(tmp, f"{n_points}_{len(results)}.png")
+                start = time.perf_counter()
+                plot_scatter(df, state_style, "sort_rank", "School Rank (2026)", "School Rank vs Median Earnings",
+                             df["sort_rank"].median(), output_path, max_labels=max_labels, **options)
+                results[name] = {"seconds": time.perf_counter() - start,
+                                 "png_mb": os.path.getsize(output_path) / 2 ** 20}
+                print(f"  {n_points:8,} {name:<20} {results[name]['seconds']:9.2f} {results[name]['png_mb']:9.2f}")
+            all_results[n_points] = results
+    return all_results
+
+
+def git_revision():
+    """Short commit hash of the working tree, with "-dirty" when it has uncommitted changes."""
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _run_synthetic_stage(results, stage, workdir, bootstrap_reps):
+    data_path = os.path.join(workdir, "cleaned_merged_dataset.feather")
+    runners = {
+        "clean": lambda: process_university_data(workdir, export_csv=False),
+        "regress": lambda: run_regressions(data_path, os.path.join(workdir, "regression.csv"),
+                                           bootstrap_reps=bootstrap_reps),
+        "panel": lambda: run_panel_regressions(data_path, os.path.join(workdir, "panel_regression.csv"),
+                                               cache_path=os.path.join(workdir, "panel_long.feather")),
+        "plot": lambda: generate_all_plots(data_path, output_dir=workdir, force=True,
+                                           state_file=os.path.join(workdir, "plot_state.json")),
+    }
+    start_wall = time.perf_counter()
+    start_cpu = time.process_time()
+    try:
+        runners[stage]()
+    except Exception as e:
+        results.put({"status": f"failed ({type(e).__name__}: {e})"})
+        return
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    # ru_maxrss is reported in kilobytes on Linux; the plot stage renders in child processes
+    results.put({
+        "status": "ok",
+        "seconds": time.perf_counter() - start_wall,
+        "cpu_s": time.process_time() - start_cpu + children.ru_utime + children.ru_stime,
+        "peak_rss_mb": max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, children.ru_maxrss) / 2 ** 10,
+    })
+
+
+def run_synthetic_stage(stage, workdir, bootstrap_reps, timeout=STAGE_TIMEOUT):
+    """Run one stage in a fresh process; a stage still running after `timeout` seconds is killed."""
+    results = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_run_synthetic_stage, args=(results, stage, workdir, bootstrap_reps))
+    process.start()
+    try:
+        result = results.get(timeout=timeout)
+    except queue.Empty:
+        process.kill()
+        result = {"status": "timeout", "seconds": float(timeout)}
+    process.join()
+    return result
+
+
+def bench_synthetic(sizes=(50, 1000, 10_000, 100_000), stages=SYNTHETIC_STAGES, seed=0, bootstrap_reps=999,
+                    history_path=BENCHMARK_HISTORY, timeout=STAGE_TIMEOUT):
+    """
+    Time and memory-profile the pipeline stages on synthetic sources of increasing size.
+
+    For each size, synthetic.write_sources generates the four raw files in a temporary directory,
+    then every stage runs there in a fresh process, so that its peak resident memory is its own.
+    Stages read what the previous ones wrote, so once a stage fails or times out the rest of that
+    size is skipped. The bootstrap uses fewer replications than the pipeline default. Every result
+    is appended to history_path with the git revision, for comparison across commits with `compare`.
+    """
+    run = {"revision": git_revision(), "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+           "python": platform.python_version(), "seed": seed, "bootstrap_reps": bootstrap_reps}
+    all_results = {}
+    print(f"\nSynthetic pipeline benchmark at {run['revision']}")
+    print(f"  {'institutions':>12} {'stage':<8} {'time (s)':>9} {'cpu (s)':>9} {'peak RSS (MB)':>14} {'input (MB)':>11}")
+    for n_institutions in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = write_sources(tmp, n_institutions, seed)
+            input_mb = sum(os.path.getsize(path) for path in paths.values()) / 2 ** 20
+            results = {}
+            for stage in stages:
+                result = run_synthetic_stage(stage, tmp, bootstrap_reps, timeout)
+                results[stage] = result
+                if result["status"] == "ok":
+                    print(f"  {n_institutions:12,} {stage:<8} {result['seconds']:9.2f} {result['cpu_s']:9.2f} "
+                          f"{result['peak_rss_mb']:14.1f} {input_mb:11.2f}")
+                else:
+                    print(f"  {n_institutions:12,} {stage:<8} {result['status']}")
+                if history_path:
+                    record = {**run, "institutions": n_institutions, "stage": stage, "input_mb": input_mb, **result}
+                    os.makedirs(os.path.dirname(history_path) or ".", exist_ok=True)
+                    with open(history_path, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(record) + "\n")
+                if result["status"] != "ok":
+                    break
+        all_results[n_institutions] = results
+    return all_results
+
+
+def compare_history(baseline=None, current=None, history_path=BENCHMARK_HISTORY):
+    """
+    Compare two revisions recorded by bench_synthetic, stage by stage and size by size.
+
+    Args:
+        baseline (str, optional): Revision to compare against. Defaults to the second most recent one.
+        current (str, optional): Revision to compare. Defaults to the most recent one.
+
+    Returns:
+        pd.DataFrame: Time and peak memory of both revisions and their ratios (current / baseline).
+    """
+    history = pd.read_json(history_path, lines=True, dtype={"revision": str})
+    revisions = list(dict.fromkeys(history.sort_values("started_at")["revision"]))[::-1]
+    current = current or revisions[0]
+    baseline = baseline or next((revision for revision in revisions if revision != current), None)
+    if baseline is None:
+        raise ValueError(f"{history_path} holds results for {current} only")
+
+    keys = ["institutions", "stage"]
+    # The latest run of each revision wins
+    latest = history.sort_values("started_at").drop_duplicates(subset=["revision", *keys], keep="last")
+    columns = [*keys, "status", "seconds", "peak_rss_mb"]
+    table = latest.loc[latest["revision"] == baseline, columns].merge(
+        latest.loc[latest["revision"] == current, columns], on=keys, suffixes=(" (base)", " (new)"))
+    table["time ratio"] = table["seconds (new)"] / table["seconds (base)"]
+    table["memory ratio"] = table["peak_rss_mb (new)"] / table["peak_rss_mb (base)"]
+    order = {stage: position for position, stage in enumerate(SYNTHETIC_STAGES)}
+    table = table.sort_values(["institutions", "stage"], key=lambda column: column.map(order)
+                              if column.name == "stage" else column, ignore_index=True)
+    print(f"\n{current} vs {baseline}")
+    print(table.to_string(index=False, float_format=lambda value: f"{value:.2f}"))
+    return table
+
+
+# Network conditions the collectors are load-tested under
+COLLECTOR_SCENARIOS = {
+    "instant": Conditions(),
+    "50 ms +/- 25 ms": Conditions(latency=0.05, jitter=0.025),
+    "200 ms +/- 100 ms": Conditions(latency=0.2, jitter=0.1),
+    "50 ms, 5% errors": Conditions(latency=0.05, error_rate=0.05),
+    "50 ms, 10 req/s": Conditions(latency=0.05, max_rps=10, burst=5),
+}
+
+
+def bench_collectors(scenarios=COLLECTOR_SCENARIOS, usnews_count=500, seed=0):
+    """
+    Load-test the three collectors against the local fixture server under each scenario.
+
+    Each collector runs end to end (fetching, parsing, writing its CSVs to a temporary directory)
+    with an empty HTTP cache, against a FixtureServer whose US News ranking holds usnews_count
+    schools. Requests go through the usual session retries and the adaptive per-host limiter,
+    which starts afresh for every collector with the settings of the real site's host; its final
+    rate is reported next to the throughput.
+
+    Returns:
+        dict: Scenario -> collector -> seconds, pages fetched, pages/sec, requests per status,
+              limiter statistics and status.
+    """
+    real_hosts = {"usnews": urlsplit(USNEWS_SEARCH_URL).netloc, "puh": urlsplit(PUH_URL).netloc,
+                  "earnings": urlsplit(EARNINGS_URL).netloc}
+    all_results = {}
+    print(f"\nCollectors against the fixture server ({usnews_count} US News schools)")
+    print(f"  {'scenario':<20} {'collector':<9} {'time (s)':>9} {'pages':>6} {'pages/s':>8} {'429':>5} {'5xx':>5} "
+          f"{'rate (/s)':>10}  status")
+    for scenario, conditions in scenarios.items():
+        results = {}
+        with tempfile.TemporaryDirectory() as tmp, FixtureServer(conditions, usnews_count=usnews_count,
+                                                                 seed=seed) as server:
+            collectors = {
+                "usnews": lambda: collect_usnews_partitions(store=os.path.join(tmp, "usnews"), max_schools=None,
+                                                            url_template=server.usnews_category_url()),
+                "puh": lambda: scrape_puh_rankings(server.url("puh"), os.path.join(tmp, "puh.csv")),
+                "earnings": lambda: scrape_college_earnings(server.url("earnings"), os.path.join(tmp, "earnings.csv")),
+            }
+            for name, collect in collectors.items():
+                set_cache_dir(os.path.join(tmp, f"cache-{name}"))
+                # A fresh session per run, so no connection is reused from the previous server
+                configure_session()
+                configure_host(urlsplit(server.url(name)).netloc,
+                               **{**DEFAULT_LIMITS, **HOST_LIMITS.get(real_hosts[name], {})})
+                reset_limiters()
+                server.reset_counts()
+                start = time.perf_counter()
+                try:
+                    status = "OK" if collect() is not None else "no data"
+                except Exception as e:
+                    status = f"FAILED ({type(e).__name__})"
+                seconds = time.perf_counter() - start
+                counts = server.stats().get(name, {})
+                pages = counts.get(200, 0)
+                limiter = next(iter(throttle_stats().values()), {})
+                results[name] = {"seconds": seconds, "pages": pages, "pages_per_s": pages / seconds,
+                                 "requests": counts, "limiter": limiter, "status": status}
+                print(f"  {scenario:<20} {name:<9} {seconds:9.2f} {pages:6d} {pages / seconds:8.1f} "
+                      f"{counts.get(429, 0):5d} {sum(n for code, n in counts.items() if code >= 500):5d} "
+                      f"{limiter.get('rate', float('nan')):10.1f}  {status}")
+        all_results[scenario] = results
+    set_cache_dir()
+    return all_results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run performance benchmarks for the pipeline.")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+    puh = subparsers.add_parser("puh-parse", help="PUH table parsing: legacy vs table_extract")
+    puh.add_argument("--html", help="saved copy of the PUH page (default: HTTP cache)")
+    puh.add_argument("--repeat", type=int, default=5)
+    puh.set_defaults(run=lambda args: bench_puh_parse(args.html, args.repeat))
+
+    io = subparsers.add_parser("artifact-io", help="merged dataset load: CSV vs typed Feather")
+    io.add_argument("--sizes", type=int, nargs="+", default=[50, 100_000])
+    io.add_argument("--repeat", type=int, default=3)
+    io.set_defaults(run=lambda args: bench_artifact_io(args.sizes, repeat=args.repeat))
+
+    compact = subparsers.add_parser("compact-memory", help="cleaning memory: default vs memory-optimized dtypes")
+    compact.add_argument("--copies", type=int, nargs="+", default=[1, 100])
+    compact.set_defaults(run=lambda args: bench_compact_memory(args.copies))
+
+    chunked = subparsers.add_parser("chunked-clean", help="cleaning peak memory: whole file vs chunks")
+    chunked.add_argument("--copies", type=int, default=5000)
+    chunked.add_argument("--chunksize", type=int, default=100_000)
+    chunked.set_defaults(run=lambda args: bench_chunked_clean(args.copies, args.chunksize))
+
+    modes = subparsers.add_parser("clean-modes", help="check chunked and compact cleaning against the default")
+    modes.add_argument("--chunksizes", type=int, nargs="+", default=[1, 10, 50, 100, 1000])
+    modes.set_defaults(run=lambda args: check_clean_modes(args.chunksizes))
+
+    labels = subparsers.add_parser("label-layout", help="plot label layout: legacy vs grid-indexed layout_labels")
+    labels.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 5000])
+    labels.add_argument("--repeat", type=int, default=3)
+    labels.add_argument("--max-labels", type=int, help="also time labelling only the top N points")
+    labels.set_defaults(run=lambda args: bench_label_layout(args.sizes, args.repeat, args.max_labels))
+
+    plots = subparsers.add_parser("plot-render", help="plot render time and size: scatter vs large-N density mode")
+    plots.add_argument("--sizes", type=int, nargs="+", default=[50, 1000, 6000, 20000])
+    plots.add_argument("--max-labels", type=int, default=20)
+    plots.set_defaults(run=lambda args: bench_plot_render(args.sizes, max_labels=args.max_labels))
+
+    synthetic = subparsers.add_parser("synthetic", help="stage time and memory on synthetic data of growing size")
+    synthetic.add_argument("--sizes", type=int, nargs="+", default=[50, 1000, 10_000, 100_000])
+    synthetic.add_argument("--stages", nargs="+", choices=SYNTHETIC_STAGES, default=SYNTHETIC_STAGES)
+    synthetic.add_argument("--seed", type=int, default=0)
+    synthetic.add_argument("--bootstrap-reps", type=int, default=999)
+    synthetic.add_argument("--history", default=BENCHMARK_HISTORY, help="results file, '' to not record the run")
+    synthetic.add_argument("--timeout", type=float, default=STAGE_TIMEOUT, help="seconds allowed per stage")
+    synthetic.set_defaults(run=lambda args: bench_synthetic(args.sizes, args.stages, args.seed, args.bootstrap_reps,
+                                                            args.history, args.timeout))
+
+    compare = subparsers.add_parser("compare", help="compare two revisions recorded by the synthetic benchmark")
+    compare.add_argument("baseline", nargs="?", help="default: the second most recent revision")
+    compare.add_argument("current", nargs="?", help="default: the most recent revision")
+    compare.add_argument("--history", default=BENCHMARK_HISTORY)
+    compare.set_defaults(run=lambda args: compare_history(args.baseline, args.current, args.history))
+
+    collectors = subparsers.add_parser("collectors", help="collector throughput against the local fixture server")
+    collectors.add_argument("--usnews-count", type=int, default=500, help="schools in the served US News ranking")
+    collectors.add_argument("--scenarios", nargs="+", choices=list(COLLECTOR_SCENARIOS), default=list(COLLECTOR_SCENARIOS))
+    collectors.set_defaults(run=lambda args: bench_collectors({name: COLLECTOR_SCENARIOS[name] for name in args.scenarios},
+                                                              args.usnews_count))
+
+    args = parser.parse_args(argv)
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,76 +1,146 @@
+import logging
+
+import numpy as np
 import pandas as pd
+from pandas.api.extensions import take
 from pathlib import Path
 
+from dataset_io import save_merged_dataset
+from institutions import InstitutionRegistry
+from instrumentation import record_merge
+from partitions import latest_partition, partition_path
 
-def process_university_data(base_path="artifacts"):
-    """
-    Process university data by cleaning, merging, analyzing, and saving the final dataset.
+logger = logging.getLogger(__name__)
 
-    Args:
-        base_path (str): Relative path to the directory containing input CSV files
-                         and where the output will be saved (default: "artifacts")
 
-    Returns:
-        pd.DataFrame: Cleaned and merged final dataset, or None if an error occurs
-    """
-    print("Starting university data processing...")
+RAW_FILES = {
+    "usnews": "usnews_top50.csv",
+    "tuition_sat": "tuition&sat_top50.csv",
+    "earnings": "graduate_earnings_data.csv",
+    "puh": "PUHranking.csv",
+}
 
-    # Define data paths using relative path from project root
-    base_path = Path(__file__).parent.parent / base_path
+# Directory of the year/category-partitioned US News store, relative to base_path. The flat
+# US News files in RAW_FILES are the snapshot committed with the repository, read when the
+# store holds no partition for the requested category.
+USNEWS_STORE_DIR = "usnews"
 
-    # Read all data files
-    try:
-        usnews_df = pd.read_csv(base_path / "usnews_top50.csv")
-        tuition_sat_df = pd.read_csv(base_path / "tuition&sat_top50.csv")
-        earnings_df = pd.read_csv(base_path / "graduate_earnings_data.csv")
-        puh_df = pd.read_csv(base_path / "PUHranking.csv")
-        print("Raw data files loaded successfully!")
-    except FileNotFoundError as e:
-        print(f"Error: Cannot find data files. Please ensure files are in correct path. {e}")
-        return None
+# Column types applied by read_csv in memory-optimized mode. Names, states and the PUH rank
+# columns are read as categoricals so that text is stored once per distinct value and numeric
+# conversion runs once per category instead of once per row.
+COMPACT_DTYPES = {
+    "usnews": {
+        "institution.displayName": "category",
+        "institution.state": "category",
+        "ranking.displayRank": "category",
+        "ranking.sortRank": "Int32",
+        "ranking.isTied": "boolean",
+    },
+    "tuition_sat": {
+        "institution.displayName": "category",
+        "searchData.tuition.rawValue": "float32",
+        "searchData.satAvg.rawValue": "float32",
+    },
+    "earnings": {
+        "Institution": "category",
+        "Median Earnings - 6 Years Post-Entry (Scorecard)": "float32",
+    },
+    "puh": {
+        "University": "category",
+        **{f"rk{year}": "category" for year in range(2018, 2026)},
+        "avgrk": "category",
+    },
+}
+
+
+def frame_memory_mb(df):
+    """Deep memory usage of a DataFrame in MB, including the text held by object columns."""
+    return df.memory_usage(deep=True).sum() / 2 ** 20
+
+
+def strip_names(series):
+    """Strip whitespace from names; categoricals are stripped once per category."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        stripped = series.cat.categories.str.strip()
+        if stripped.is_unique:
+            return series.cat.rename_categories(stripped)
+        return series.astype(str).str.strip().astype("category")
+    if not pd.api.types.is_string_dtype(series.dtype):
+        # A chunk of blank rows is read as floats (all NaN)
+        series = series.astype("str")
+    return series.str.strip()
+
+
+def to_numeric(series, dtype=None, remove=None):
+    """
+    pd.to_numeric(errors="coerce") that also handles categoricals, converting each category once.
+
+    Args:
+        series (pd.Series): Values to convert.
+        dtype (str, optional): Cast the result to this dtype, e.g. "Int32" or "float32".
+        remove (str, optional): Text to delete before parsing, e.g. "#" in "#12".
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        categories = series.cat.categories.astype(str)
+        if remove:
+            categories = categories.str.replace(remove, "", regex=False)
+        values = pd.to_numeric(categories, errors="coerce").to_numpy(dtype=float)
+        codes = series.cat.codes.to_numpy()
+        # Code -1 marks a missing value; index only the valid codes, since `values` is empty
+        # when the column (or chunk) is entirely missing
+        converted = np.full(len(codes), np.nan)
+        valid = codes >= 0
+        converted[valid] = values[codes[valid]]
+        result = pd.Series(converted, index=series.index)
+    else:
+        if remove:
+            series = series.astype(str).str.replace(remove, "", regex=False)
+        result = pd.to_numeric(series, errors="coerce")
+    return result.astype(dtype) if dtype else result
 
-    # Clean each dataset
-    print("Starting data cleaning...")
 
-    # Clean US News data
-    usnews_clean = usnews_df.copy()
-    usnews_clean = usnews_clean.rename(columns={
+def clean_usnews(df, compact=False):
+    """Rename and type the US News ranking/state columns."""
+    df = df.rename(columns={
         "institution.displayName": "school_name",
         "institution.state": "state",
         "ranking.displayRank": "display_rank",
         "ranking.sortRank": "sort_rank",
         "ranking.isTied": "is_tied"
     })
-    usnews_clean["school_name"] = usnews_clean["school_name"].str.strip()
-    usnews_clean["display_rank"] = usnews_clean["display_rank"].str.replace("#", "").astype(int)
-    usnews_clean["sort_rank"] = pd.to_numeric(usnews_clean["sort_rank"], errors="coerce")
-    print(f"US News data cleaned: {len(usnews_clean)} schools")
-
-    # Clean tuition and SAT data
-    tuition_sat_clean = tuition_sat_df.copy()
-    tuition_sat_clean = tuition_sat_clean.rename(columns={
+    df["school_name"] = strip_names(df["school_name"])
+    df["display_rank"] = to_numeric(df["display_rank"], "Int32" if compact else int, remove="#")
+    df["sort_rank"] = to_numeric(df["sort_rank"], "Int32" if compact else None)
+    return df
+
+
+def clean_tuition_sat(df, compact=False):
+    """Rename and type the US News tuition/SAT columns."""
+    df = df.rename(columns={
         "institution.displayName": "school_name",
         "searchData.tuition.rawValue": "tuition",
         "searchData.satAvg.rawValue": "sat_score"
     })
-    tuition_sat_clean["school_name"] = tuition_sat_clean["school_name"].str.strip()
-    tuition_sat_clean["tuition"] = pd.to_numeric(tuition_sat_clean["tuition"], errors="coerce")
-    tuition_sat_clean["sat_score"] = pd.to_numeric(tuition_sat_clean["sat_score"], errors="coerce")
-    print(f"Tuition & SAT data cleaned: {len(tuition_sat_clean)} schools")
-
-    # Clean earnings data
-    earnings_clean = earnings_df.copy()
-    earnings_clean = earnings_clean.rename(columns={
+    df["school_name"] = strip_names(df["school_name"])
+    df["tuition"] = to_numeric(df["tuition"], "float32" if compact else None)
+    df["sat_score"] = to_numeric(df["sat_score"], "float32" if compact else None)
+    return df
+
+
+def clean_earnings(df, compact=False):
+    """Rename and type the College Transitions earnings columns."""
+    df = df.rename(columns={
         "Institution": "school_name",
         "Median Earnings - 6 Years Post-Entry (Scorecard)": "median_earnings"
     })
-    earnings_clean["school_name"] = earnings_clean["school_name"].str.strip()
-    earnings_clean["median_earnings"] = pd.to_numeric(earnings_clean["median_earnings"], errors="coerce")
-    print(f"Earnings data cleaned: {len(earnings_clean)} schools")
+    df["school_name"] = strip_names(df["school_name"])
+    df["median_earnings"] = to_numeric(df["median_earnings"], "float32" if compact else None)
+    return df
+
 
-    # Clean historical ranking data
-    puh_clean = puh_df.copy()
-    puh_clean = puh_clean.rename(columns={
+def clean_puh(df, compact=False):
+    """Rename and type the Public University Honors historical ranking columns."""
+    df = df.rename(columns={
         "University": "school_name",
         "rk2018": "ht2018",
         "rk2019": "ht2019",
@@ -82,59 +152,252 @@ def process_university_data(base_path="artifacts"):
         "rk2025": "ht2025",
         "avgrk": "avgtk"
     })
-    puh_clean["school_name"] = puh_clean["school_name"].str.strip()
+    df["school_name"] = strip_names(df["school_name"])
     rank_columns = ["ht2018", "ht2019", "ht2020", "ht2021", "ht2022", "ht2023", "ht2024", "ht2025", "avgtk"]
     for col in rank_columns:
-        if col in puh_clean.columns:
-            puh_clean[col] = pd.to_numeric(puh_clean[col], errors="coerce")
-    print(f"Historical ranking data cleaned: {len(puh_clean)} schools")
-
-    # Merge data step by step
-    print("Starting data merging...")
-    merged_df = usnews_clean.merge(tuition_sat_clean, on="school_name", how="left")
-    print(f"After first merge: {len(merged_df)} schools")
-    merged_df = merged_df.merge(earnings_clean, on="school_name", how="left")
-    print(f"After second merge: {len(merged_df)} schools")
-    merged_df = merged_df.merge(puh_clean, on="school_name", how="left")
-    print(f"Final merged dataset: {len(merged_df)} schools")
+        if col in df.columns:
+            dtype = ("float32" if col == "avgtk" else "Int32") if compact else None
+            df[col] = to_numeric(df[col], dtype)
+    return df
+
+
+CLEANERS = {
+    "usnews": clean_usnews,
+    "tuition_sat": clean_tuition_sat,
+    "earnings": clean_earnings,
+    "puh": clean_puh,
+}
+
+
+def read_clean_source(path, source, registry=None, compact=False, chunksize=None):
+    """
+    Read one raw source, clean it and keep only the institutions known to the registry, with their
+    names replaced by an "institution_id" column (see InstitutionRegistry.resolve_frame).
+
+    Only the source's own columns (the keys of COMPACT_DTYPES[source]) are read, so a US News
+    partition that holds both the ranking and the tuition/SAT fields can be read as either source.
+
+    With a chunksize, the file is streamed: each chunk is renamed, stripped and converted, its
+    names are resolved and unmatched rows are dropped before the next chunk is read, and the
+    matched rows are de-duplicated as they accumulate. Peak memory is therefore bounded by the
+    chunk size plus one row per institution in the registry, whatever the size of the file.
+
+    Args:
+        path (Path): Raw CSV file.
+        source (str): Key into RAW_FILES / COMPACT_DTYPES / CLEANERS.
+        registry (InstitutionRegistry, optional): Universe to filter to. Without one, nothing is filtered.
+        compact (bool): Read with COMPACT_DTYPES.
+        chunksize (int, optional): Rows per chunk. Defaults to reading the whole file at once.
+
+    Returns:
+        tuple: (cleaned DataFrame with attrs["rows_read"], {step: memory in MB}).
+    """
+    dtype = COMPACT_DTYPES[source] if compact else None
+    usecols = list(COMPACT_DTYPES[source])
+    chunks = ([pd.read_csv(path, dtype=dtype, usecols=usecols)] if chunksize is None
+              else pd.read_csv(path, dtype=dtype, usecols=usecols, chunksize=chunksize))
+    kept = None
+    rows_read = 0
+    loaded_mb = 0.0
+    for chunk in chunks:
+        rows_read += len(chunk)
+        loaded_mb = max(loaded_mb, frame_memory_mb(chunk))
+        chunk = CLEANERS[source](chunk, compact=compact)
+        if registry is not None:
+            chunk = registry.resolve_frame(chunk, source=source, dedupe=False)
+        kept = chunk if kept is None else pd.concat([kept, chunk], ignore_index=True)
+        if registry is not None and chunksize is not None:
+            kept = InstitutionRegistry.dedupe(kept, keep_rank=True)
+
+    if registry is not None:
+        kept = InstitutionRegistry.dedupe(kept)
+    if compact and "school_name" in kept and not isinstance(kept["school_name"].dtype, pd.CategoricalDtype):
+        # Concatenating chunks with different categories falls back to plain strings
+        kept["school_name"] = kept["school_name"].astype("category")
+    kept.attrs["rows_read"] = rows_read
+    label = "largest chunk" if chunksize is not None else "loaded"
+    return kept, {f"{source} ({label})": loaded_mb, f"{source} (cleaned)": frame_memory_mb(kept)}
+
+
+def join_sources(base, sources, key="institution_id"):
+    """
+    Left-join several sources onto `base` in a single pass over an integer key.
+
+    Each source is indexed by the key once and probed with get_indexer, and every output column
+    is built by one take from its source column, so no intermediate merged frame is materialized
+    and no names are compared. Row counts of each join are recorded for the run report.
+
+    Args:
+        base (pd.DataFrame): Left side, with a `key` column.
+        sources (dict): Source name -> DataFrame with a unique `key` column.
+        key (str): Integer key column.
+
+    Returns:
+        tuple: (joined DataFrame, {source: {"rows": source rows, "matched": base rows with data
+               from the source, "unmatched": base rows without}}).
+    """
+    keys = base[key].to_numpy()
+    columns = {name: base[name].array for name in base.columns}
+    diagnostics = {}
+    for source, df in sources.items():
+        indexer = pd.Index(df[key]).get_indexer(keys)
+        for name in df.columns.drop(key):
+            if name in columns:
+                raise ValueError(f"Column '{name}' of {source} is already in the joined dataset")
+            columns[name] = take(df[name].array, indexer, allow_fill=True)
+        matched = int((indexer >= 0).sum())
+        diagnostics[source] = {"rows": len(df), "matched": matched, "unmatched": len(base) - matched}
+        record_merge(source, len(base), len(df), len(base), matched)
+    return pd.DataFrame(columns, index=base.index, copy=False), diagnostics
+
+
+def raw_source_paths(base_path, year=None, category=None):
+    """
+    Locate the raw source files under base_path.
+
+    With a category, the US News ranking and tuition/SAT data are read from its partition of the
+    store. A requested year must have been collected; without one the latest partition is read,
+    or, if the store has none for the category, the flat US News files (with a warning).
+
+    Args:
+        base_path (Path): Directory holding the raw files and the US News store.
+        year (int, optional): Partition year; requires a category.
+        category (str, optional): Partition category.
+
+    Returns:
+        dict: Path of each source in RAW_FILES.
+
+    Raises:
+        FileNotFoundError: If the store has no partition for the requested year and category.
+    """
+    paths = {source: base_path / filename for source, filename in RAW_FILES.items()}
+    if category is None:
+        if year is not None:
+            raise ValueError("a partition year needs a category")
+        return paths
+
+    store = base_path / USNEWS_STORE_DIR
+    if year is not None:
+        partition = partition_path(store, year, category)
+        if not partition.exists():
+            raise FileNotFoundError(f"No {year} partition for {category} in {store}; collect it first")
+    else:
+        partition = latest_partition(store, category)
+    if partition is None:
+        logger.warning(f"No US News partition for {category} in {store}; "
+                       f"reading {RAW_FILES['usnews']} and {RAW_FILES['tuition_sat']} instead")
+    else:
+        paths["usnews"] = paths["tuition_sat"] = partition
+    return paths
+
+
+def process_university_data(base_path="artifacts", export_csv=True, compact=False, chunksize=None, year=None,
+                            category=None):
+    """
+    Process university data by cleaning, merging, analyzing, and saving the final dataset.
+
+    Args:
+        base_path (str): Relative path to the directory containing input CSV files
+                         and where the output will be saved (default: "artifacts")
+        export_csv (bool): Also save a human-readable CSV next to the typed Feather dataset (default: True)
+        compact (bool): Memory-optimized mode. Sources are read with COMPACT_DTYPES (categorical names
+                        and states, nullable small integers for ranks, float32 for money and scores)
+                        instead of being converted after loading (default: False)
+        chunksize (int, optional): Stream the tuition/SAT, earnings and historical ranking sources in
+                                   chunks of this many rows, dropping institutions outside the US News
+                                   universe as each chunk is read (default: read each file at once)
+        year (int, optional), category (str, optional): Read the US News ranking and tuition/SAT data
+                                   from this partition of the store under base_path/usnews (see
+                                   data_collection.collect_usnews_partitions) instead of the flat
+                                   CSVs in RAW_FILES; only that partition's file is opened. Without
+                                   a year the latest partition of the category is read, and the flat
+                                   CSVs are used if the store has none; a year that was not collected
+                                   is an error (see raw_source_paths)
+
+    Returns:
+        pd.DataFrame: Cleaned and merged final dataset, or None if an error occurs
+    """
+    logger.info("Starting university data processing...")
+
+    # Define data paths using relative path from project root
+    base_path = Path(__file__).parent.parent / base_path
+    paths = raw_source_paths(base_path, year, category)
+
+    # Clean the US News data first: its schools define the universe the other sources are filtered to
+    logger.info("Starting data cleaning...")
+    try:
+        usnews_clean, memory = read_clean_source(paths["usnews"], "usnews", compact=compact)
+        registry = InstitutionRegistry(usnews_clean["school_name"])
+        usnews_clean.insert(0, "institution_id", registry.ids_for(usnews_clean["school_name"]))
+        logger.info(f"US News data cleaned: {len(usnews_clean)} schools")
+
+        cleaned = {}
+        for source, label in [("tuition_sat", "Tuition & SAT data"), ("earnings", "Earnings data"),
+                              ("puh", "Historical ranking data")]:
+            cleaned[source], source_memory = read_clean_source(paths[source], source,
+                                                               registry=registry, compact=compact,
+                                                               chunksize=chunksize)
+            memory.update(source_memory)
+            logger.info(f"{label} cleaned: {cleaned[source].attrs['rows_read']} rows read, "
+                        f"{len(cleaned[source])} schools matched")
+    except FileNotFoundError as e:
+        logger.error(f"Cannot find data files. Please ensure files are in correct path. {e}")
+        return None
+    report_path = registry.write_report(base_path / "name_resolution_report.csv")
+    issue_counts = pd.Series([issue["status"] for issue in registry.issues], dtype=object).value_counts()
+    logger.info(f"Name resolution: {issue_counts.to_dict() or 'all names matched exactly'}; "
+                f"report saved to {report_path}")
+
+    # Join every source onto the US News schools at once, on their institution IDs
+    logger.info("Starting data merging...")
+    merged_df, diagnostics = join_sources(usnews_clean, cleaned)
+    logger.info("Rows joined per source:\n" + "\n".join(
+        f"  {source:<12} {counts['rows']:6d} rows, {counts['matched']:6d} schools matched, "
+        f"{counts['unmatched']:6d} unmatched" for source, counts in diagnostics.items()))
+    logger.info(f"Final merged dataset: {len(merged_df)} schools")
+    if compact:
+        merged_df["school_name"] = merged_df["school_name"].astype("category")
+    memory["merged"] = frame_memory_mb(merged_df)
+    merged_df.attrs["memory_mb"] = memory
+
+    logger.info(f"Memory usage by step ({'memory-optimized' if compact else 'default'} dtypes):\n"
+                + "\n".join(f"  {step:<24} {megabytes:8.3f} MB" for step, megabytes in memory.items()))
 
     # Display basic information about merged results
-    print("\nColumns in merged data:", merged_df.columns.tolist())
-    print("Data shape:", merged_df.shape)
+    logger.debug(f"Columns in merged data: {merged_df.columns.tolist()}")
+    logger.debug(f"Data shape: {merged_df.shape}")
 
-    # Save cleaned and merged data
-    output_path = base_path / "cleaned_merged_dataset.csv"
-    merged_df.to_csv(output_path, index=False)
-    print(f"\nCleaned data saved to: {output_path}")
+    # Save cleaned and merged data as a typed Feather file, plus an optional CSV copy
+    output_path = base_path / "cleaned_merged_dataset.feather"
+    csv_path = base_path / "cleaned_merged_dataset.csv" if export_csv else None
+    save_merged_dataset(merged_df, output_path, csv_path=csv_path)
+    logger.info(f"Cleaned data saved to: {output_path}" + (f" and {csv_path}" if csv_path else ""))
 
     # Analyze the data
-    print("\nData analysis:")
-    print("First 5 schools in the dataset:")
-    print(merged_df[["school_name", "display_rank", "tuition", "sat_score", "median_earnings"]].head())
+    logger.debug("First 5 schools in the dataset:\n"
+                 f"{merged_df[['school_name', 'display_rank', 'tuition', 'sat_score', 'median_earnings']].head()}")
 
     # Check for missing SAT scores
     missing_sat = merged_df["sat_score"].isna().sum()
-    print(f"\nNumber of schools with missing SAT scores: {missing_sat}")
+    logger.info(f"Number of schools with missing SAT scores: {missing_sat}")
     if missing_sat > 0:
-        print("Schools with missing SAT scores:")
-        print(merged_df[merged_df["sat_score"].isna()][["school_name", "display_rank"]])
+        logger.debug("Schools with missing SAT scores:\n"
+                     f"{merged_df[merged_df['sat_score'].isna()][['school_name', 'display_rank']]}")
 
     # Check for missing earnings data
     missing_earnings = merged_df["median_earnings"].isna().sum()
-    print(f"\nNumber of schools with missing earnings data: {missing_earnings}")
+    logger.info(f"Number of schools with missing earnings data: {missing_earnings}")
 
     # Check tied rankings
-    print("\n=== CHECKING TIED RANKINGS ===")
     tied_schools = merged_df[merged_df["is_tied"] == True]
-    print(f"Number of schools with tied rankings: {len(tied_schools)}")
+    logger.info(f"Number of schools with tied rankings: {len(tied_schools)}")
     rank_groups = merged_df.groupby("display_rank").size()
     tied_ranks = rank_groups[rank_groups > 1]
-    print("\nTied ranking groups:")
     for rank, count in tied_ranks.items():
         schools = merged_df[merged_df["display_rank"] == rank]["school_name"].tolist()
-        print(f"Rank #{rank}: {count} schools - {", ".join(schools)}")
-    print("\nRanking comparison (first 15 schools):")
-    print(merged_df[["school_name", "display_rank", "sort_rank", "is_tied"]].head(15))
+        logger.debug(f"Tied rank #{rank}: {count} schools - {", ".join(schools)}")
+    logger.debug("Ranking comparison (first 15 schools):\n"
+                 f"{merged_df[['school_name', 'display_rank', 'sort_rank', 'is_tied']].head(15)}")
 
-    print("\nUniversity data processing completed!")
+    logger.info("University data processing completed!")
     return merged_df
\ No newline at end of file
@@ -1,13 +1,91 @@
-import requests
-from bs4 import BeautifulSoup
-import re
 import csv
-import pandas as pd
+import json
+import logging
 import os
-
-def scrape_puh_rankings(
-        url="https://publicuniversityhonors.com/us-news-rankings-2025-which-universities-have-gained-or-lost-the-most-since-2018/",
-        output_file="artifacts/PUHranking.csv"):
+from io import StringIO
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from functools import partial
+
+from partitions import partition_path
+from http_cache import cached_get, CacheMissError
+
+logger = logging.getLogger(__name__)
+
+PUH_URL = "https://publicuniversityhonors.com/us-news-rankings-2025-which-universities-have-gained-or-lost-the-most-since-2018/"
+
+# Cell class -> CSV column for the Public University Honors ranking table
+PUH_COLUMNS = {
+    "column-1": "University",
+    "column-2": "rk2018",
+    "column-3": "rk2019",
+    "column-4": "rk2020",
+    "column-5": "rk2021",
+    "column-6": "rk2022",
+    "column-7": "rk2023",
+    "column-8": "rk2024",
+    "column-9": "rk2025",
+    "column-10": "avgrk"
+}
+# Table rows 4 to 163 hold the 160 ranked universities
+PUH_ROW_RANGE = (4, 163)
+
+# Mapping university names to full official names
+PUH_NAME_MAPPING = {
+    "Princeton": "Princeton University",
+    "MIT": "Massachusetts Institute of Technology",
+    "Harvard": "Harvard University",
+    "Stanford": "Stanford University",
+    "Yale": "Yale University",
+    "Caltech": "California Institute of Technology",
+    "Duke": "Duke University",
+    "Johns Hopkins": "Johns Hopkins University",
+    "Northwestern": "Northwestern University",
+    "Penn": "University of Pennsylvania",
+    "Chicago": "University of Chicago",
+    "Cornell": "Cornell University",
+    "Brown": "Brown University",
+    "Columbia": "Columbia University",
+    "UCLA": "University of California, Los Angeles",
+    "Dartmouth": "Dartmouth College",
+    "UC Berkeley": "University of California, Berkeley",
+    "Rice": "Rice University",
+    "Vanderbilt": "Vanderbilt University",
+    "Notre Dame": "University of Notre Dame",
+    "Michigan": "University of Michigan--Ann Arbor",
+    "Washington Univ": "Washington University in St. Louis",
+    "Carnegie Mellon": "Carnegie Mellon University",
+    "Georgetown": "Georgetown University",
+    "Emory": "Emory University",
+    "Virginia": "University of Virginia",
+    "North Carolina": "University of North Carolina--Chapel Hill",
+    "USC": "University of Southern California",
+    "UC San Diego": "University of California, San Diego",
+    "Florida": "University of Florida",
+    "UT Austin": "The University of Texas--Austin",
+    "NYU": "New York University",
+    "UC Davis": "University of California, Davis",
+    "UC Irvine": "University of California, Irvine",
+    "Georgia Tech": "Georgia Institute of Technology",
+    "Illinois": "University of Illinois Urbana-Champaign",
+    "Boston College": "Boston College",
+    "Tufts": "Tufts University",
+    "UC Santa Barbara": "University of California, Santa Barbara",
+    "UW Madison": "University of Wisconsin--Madison",
+    "Rutgers": "Rutgers University--New Brunswick",
+    "Boston Univ": "Boston University",
+    "Ohio St": "The Ohio State University",
+    "Maryland": "University of Maryland, College Park",
+    "Rochester": "University of Rochester",
+    "Washington": "University of Washington",
+    "Purdue": "Purdue University--Main Campus",
+    "Georgia": "University of Georgia",
+    "Lehigh": "Lehigh University",
+    "Northeastern": "Northeastern University"
+}
+
+
+def scrape_puh_rankings(url=PUH_URL, output_file="artifacts/PUHranking.csv"):
     """
     Scrapes the website of Public University Honors for university rankings data and saves it to a CSV file.
 
@@ -26,234 +104,319 @@ def scrape_puh_rankings(
     Total Number of Observations: 160
 
     """
+    # BeautifulSoup is only needed here, so it is imported on first use
+    from table_extract import extract_table
+
     # Send request to the URL & examine whether it works well
-    response = requests.get(url)
+    response = cached_get(url, source="puh")
     response.raise_for_status()
 
-    # Decode the HTML with BeautifulSoup
-    soup = BeautifulSoup(response.content, "html.parser")
-
-    # Find the first table on the page
-    table = soup.find("table")
-
-    # Find all row elements whose "class" contains "row-\d+"
-    rows = table.find_all("tr", attrs={"class": re.compile(r"row-\d+")})
-
-    # Find the row number and <tr> needed from 4 to 163
-    filtered_rows = []
-    for tr in rows:
-        classes = tr.get("class")
-        # For there are two classes
-        for cls in classes:
-            row_match = re.search(r"row-(\d+)", cls)
-            if row_match:
-                row_num = int(row_match.group(1))
-                if 4 <= row_num <= 163:
-                    filtered_rows.append((row_num, tr))
-                    break
-
-    # Sort by row number
-    filtered_rows.sort(key=lambda x: x[0])
-
-    # Collect data from <tr> of each row
-    data = []
-    for row_num, tr in filtered_rows:
-        # Find the specific tds
-        td1 = tr.find("td", class_="column-1")
-        td2 = tr.find("td", class_="column-2")
-        td3 = tr.find("td", class_="column-3")
-        td4 = tr.find("td", class_="column-4")
-        td5 = tr.find("td", class_="column-5")
-        td6 = tr.find("td", class_="column-6")
-        td7 = tr.find("td", class_="column-7")
-        td8 = tr.find("td", class_="column-8")
-        td9 = tr.find("td", class_="column-9")
-        td10 = tr.find("td", class_="column-10")
-
-        # Get text, strip whitespace
-        col1_text = td1.get_text(strip=True) if td1 else "N/A"
-        col2_text = td2.get_text(strip=True) if td2 else "N/A"
-        col3_text = td3.get_text(strip=True) if td3 else "N/A"
-        col4_text = td4.get_text(strip=True) if td4 else "N/A"
-        col5_text = td5.get_text(strip=True) if td5 else "N/A"
-        col6_text = td6.get_text(strip=True) if td6 else "N/A"
-        col7_text = td7.get_text(strip=True) if td7 else "N/A"
-        col8_text = td8.get_text(strip=True) if td8 else "N/A"
-        col9_text = td9.get_text(strip=True) if td9 else "N/A"
-        col10_text = td10.get_text(strip=True) if td10 else "N/A"
-
-        # Mapping university names to full official names
-        name_mapping = {
-            "Princeton": "Princeton University",
-            "MIT": "Massachusetts Institute of Technology",
-            "Harvard": "Harvard University",
-            "Stanford": "Stanford University",
-            "Yale": "Yale University",
-            "Caltech": "California Institute of Technology",
-            "Duke": "Duke University",
-            "Johns Hopkins": "Johns Hopkins University",
-            "Northwestern": "Northwestern University",
-            "Penn": "University of Pennsylvania",
-            "Chicago": "University of Chicago",
-            "Cornell": "Cornell University",
-            "Brown": "Brown University",
-            "Columbia": "Columbia University",
-            "UCLA": "University of California, Los Angeles",
-            "Dartmouth": "Dartmouth College",
-            "UC Berkeley": "University of California, Berkeley",
-            "Rice": "Rice University",
-            "Vanderbilt": "Vanderbilt University",
-            "Notre Dame": "University of Notre Dame",
-            "Michigan": "University of Michigan--Ann Arbor",
-            "Washington Univ": "Washington University in St. Louis",
-            "Carnegie Mellon": "Carnegie Mellon University",
-            "Georgetown": "Georgetown University",
-            "Emory": "Emory University",
-            "Virginia": "University of Virginia",
-            "North Carolina": "University of North Carolina--Chapel Hill",
-            "USC": "University of Southern California",
-            "UC San Diego": "University of California, San Diego",
-            "Florida": "University of Florida",
-            "UT Austin": "The University of Texas--Austin",
-            "NYU": "New York University",
-            "UC Davis": "University of California, Davis",
-            "UC Irvine": "University of California, Irvine",
-            "Georgia Tech": "Georgia Institute of Technology",
-            "Illinois": "University of Illinois Urbana-Champaign",
-            "Boston College": "Boston College",
-            "Tufts": "Tufts University",
-            "UC Santa Barbara": "University of California, Santa Barbara",
-            "UW Madison": "University of Wisconsin--Madison",
-            "Rutgers": "Rutgers University--New Brunswick",
-            "Boston Univ": "Boston University",
-            "Ohio St": "The Ohio State University",
-            "Maryland": "University of Maryland, College Park",
-            "Rochester": "University of Rochester",
-            "Washington": "University of Washington",
-            "Purdue": "Purdue University--Main Campus",
-            "Georgia": "University of Georgia",
-            "Lehigh": "Lehigh University",
-            "Northeastern": "Northeastern University"
-        }
-        university_name = name_mapping.get(col1_text, col1_text)
-
-        data.append({
-            "University": university_name,
-            "rk2018": col2_text,
-            "rk2019": col3_text,
-            "rk2020": col4_text,
-            "rk2021": col5_text,
-            "rk2022": col6_text,
-            "rk2023": col7_text,
-            "rk2024": col8_text,
-            "rk2025": col9_text,
-            "avgrk": col10_text
-        })
+    data = extract_table(response.content, PUH_COLUMNS, row_range=PUH_ROW_RANGE,
+                         converters={"University": lambda name: PUH_NAME_MAPPING.get(name, name)})
 
     # Write into a CSV file
     with open(output_file, "w", newline="", encoding="utf-8") as csvfile:
-        fieldnames = ["University", "rk2018", "rk2019", "rk2020", "rk2021", "rk2022", "rk2023", "rk2024", "rk2025", "avgrk"]
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer = csv.DictWriter(csvfile, fieldnames=list(PUH_COLUMNS.values()))
         writer.writeheader()
         writer.writerows(data)
-    print(f"\nScraped {len(data)} rows. Data saved to '{output_file}'.")
+    logger.info(f"Scraped {len(data)} rows. Data saved to '{output_file}'.")
 
     return output_file
 
 
-def collect_sat_tuition():
-    """Scrape top 50 school rankings from US News API and save to CSV"""
-    fields = [
-        "institution.displayName",
-        "searchData.tuition.rawValue",
-        "searchData.satAvg.rawValue"
-    ]
+USNEWS_SEARCH_URL = "https://www.usnews.com/best-colleges/api/search?_sort=ranking.sortRank&_sortDirection=asc&_page="
+TUITION_SAT_FIELDS = [
+    "institution.displayName",
+    "searchData.tuition.rawValue",
+    "searchData.satAvg.rawValue"
+]
+RANKING_STATE_FIELDS = [
+    "institution.displayName",
+    "institution.state",
+    "ranking.displayRank",
+    "ranking.sortRank",
+    "ranking.isTied"
+]
+
+# Ranking categories of the search API (its schoolType values)
+USNEWS_CATEGORIES = [
+    "national-universities",
+    "national-liberal-arts-colleges",
+    "regional-universities-north",
+    "regional-universities-south",
+    "regional-universities-midwest",
+    "regional-universities-west",
+    "regional-colleges-north",
+    "regional-colleges-south",
+    "regional-colleges-midwest",
+    "regional-colleges-west",
+]
+# Category whose schools the analysis merges with the other sources
+USNEWS_ANALYSIS_CATEGORY = "national-universities"
+USNEWS_CATEGORY_URL = ("https://www.usnews.com/best-colleges/api/search?schoolType={category}"
+                       "&_sort=ranking.sortRank&_sortDirection=asc&_page=")
+# Year/category-partitioned store of US News snapshots, see partitions.partition_path
+USNEWS_STORE = "artifacts/usnews"
+
+
+def traverse(root, path):
+    """Follow a dotted path such as "institution.state" through nested dicts and lists."""
+    value = root
+    for segment in path.split("."):
+        if value is None:
+            return None
+        if segment.isdigit():
+            value = value[int(segment)] if len(value) > int(segment) else None
+        else:
+            value = value.get(segment, None)
+    return value
+
+
+def fetch_usnews_page(page, base_url=USNEWS_SEARCH_URL):
+    """
+    Fetch one page of the US News search API.
 
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-    }
+    Transient failures are retried by the shared HTTP session; an error that survives the
+    retries is raised instead of being mistaken for the end of the data.
 
-    base_url = "https://www.usnews.com/best-colleges/api/search?_sort=ranking.sortRank&_sortDirection=asc&_page="
-    output_dir = "artifacts"
-    output_file = "tuition&sat_top50.csv"
-    full_path = os.path.join(output_dir, output_file)
-    max_schools = 50
-    page = 1
-    all_schools_data = []
-
-    print("Starting US News data collection...")
-
-    # Helper function to traverse nested dictionary
-    def traverse(root, path):
-        value = root
-        for segment in path.split("."):
-            if segment.isdigit():
-                value = value[int(segment)] if len(value) > int(segment) else None
-            else:
-                value = value.get(segment, None)
-        return value
+    Args:
+        page (int): 1-based page number.
+        base_url (str): Search URL the page number is appended to.
 
-    # Fetch data
-    while len(all_schools_data) < max_schools:
-        url = f"{base_url}{page}"
-        print(f"Fetching page {page}...")
+    Returns:
+        dict: The "data" object of the JSON response.
+    """
+    url = f"{base_url}{page}"
+    logger.debug(f"Fetching page {page}...")
+    resp = cached_get(url, timeout=10, source="usnews")
+    logger.debug(f"Page {page} response status: {resp.status_code}")
+    resp.raise_for_status()
+    return resp.json().get("data", {})
 
-        try:
-            resp = requests.get(url, headers=headers, timeout=10)
-            print(f"Response status: {resp.status_code}")
 
-            if resp.status_code != 200:
-                break
+def iter_usnews_pages(max_schools=50, start_page=1, max_workers=8, base_url=USNEWS_SEARCH_URL):
+    """
+    Yield (page, items) for each page of the US News search API, in page order.
 
-            json_data = resp.json()
-            items = json_data.get("data", {}).get("items", [])
-            print(f"Found {len(items)} schools on page {page}")
+    The first page is always fetched to learn the page size and total page count; the
+    remaining pages are then fetched concurrently and yielded as soon as every earlier
+    page has been yielded. Iteration stops at the first empty page.
 
-            if not items:
-                break
+    Args:
+        max_schools (int or None): Number of schools needed. None means every school in the ranking.
+        start_page (int): First page to yield; earlier pages are skipped (used when resuming).
+        max_workers (int): Number of pages fetched at the same time.
+        base_url (str): Search URL the page number is appended to.
+    """
+    fetch = partial(fetch_usnews_page, base_url=base_url)
+    first = fetch(1)
+    items = first.get("items", [])
+    logger.debug(f"Found {len(items)} schools on page 1")
+    if not items:
+        return
+
+    page_size = len(items)
+    total_pages = first.get("totalPages")
+    if total_pages is None and first.get("totalItems") is not None:
+        total_pages = -(-int(first["totalItems"]) // page_size)
+    last_page = total_pages
+    if max_schools is not None:
+        pages_needed = -(-max_schools // page_size)
+        last_page = pages_needed if total_pages is None else min(pages_needed, int(total_pages))
+
+    if start_page <= 1:
+        yield 1, items
+    start_page = max(start_page, 2)
+
+    if last_page is None:
+        # Neither a limit nor a page count: walk the pages one by one until an empty page
+        page = start_page
+        while True:
+            page_items = fetch(page).get("items", [])
+            logger.debug(f"Found {len(page_items)} schools on page {page}")
+            if not page_items:
+                return
+            yield page, page_items
+            page += 1
 
-            for school in items:
-                if len(all_schools_data) >= max_schools:
-                    break
-                row = {field: traverse(school, field) for field in fields}
-                all_schools_data.append(row)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pages = range(start_page, int(last_page) + 1)
+        for page, data in zip(pages, pool.map(fetch, pages)):
+            page_items = data.get("items", [])
+            logger.debug(f"Found {len(page_items)} schools on page {page}")
+            if not page_items:
+                return
+            yield page, page_items
 
-            page += 1
 
-        except Exception as e:
-            print(f"Error: {e}")
-            break
-
-    print(f"Collected {len(all_schools_data)} schools")
-
-    # Save data to CSV
-    if all_schools_data:
-        os.makedirs(output_dir, exist_ok=True)
-        with open(full_path, "w", newline="", encoding="utf-8") as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fields)
-            writer.writeheader()
-            writer.writerows(all_schools_data)
-        print(f"Saved data to: {full_path}")
-        print("Data collection completed successfully")
+def _load_checkpoint(checkpoint_file, outputs, max_schools):
+    """Return the saved checkpoint if it belongs to the same outputs and limit and its files still exist."""
+    try:
+        with open(checkpoint_file, encoding="utf-8") as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if checkpoint.get("max_schools") != max_schools or sorted(checkpoint.get("offsets", {})) != sorted(outputs):
+        return None
+    for path, offset in checkpoint["offsets"].items():
+        if not os.path.exists(path) or os.path.getsize(path) < offset:
+            return None
+    return checkpoint
+
+
+def collect_usnews(outputs, checkpoint_file, max_schools=50, resume=True, base_url=USNEWS_SEARCH_URL):
+    """
+    Collect every US News output in a single pass over the search API.
+
+    Each page is downloaded and decoded once; the union of all requested field paths is
+    extracted and the rows are appended to every output CSV as soon as the page arrives.
+    After each page the CSV sizes and the page number are saved to a checkpoint, so a run
+    that crashes can be resumed from the next page. The checkpoint is removed once the
+    collection completes.
+
+    Args:
+        outputs (dict): Output CSV path -> list of field paths to write to it.
+        checkpoint_file (str): Where the progress checkpoint is kept.
+        max_schools (int or None): Number of schools to collect. None or "all" collects the full ranking.
+        resume (bool): Continue from a matching checkpoint instead of starting again from page 1.
+        base_url (str): Search API URL, up to the page number.
+
+    Returns:
+        list: Paths of the saved CSVs, or None if no data was collected.
+    """
+    if max_schools == "all":
+        max_schools = None
+    field_paths = list(dict.fromkeys(field for fields in outputs.values() for field in fields))
+
+    checkpoint = _load_checkpoint(checkpoint_file, outputs, max_schools) if resume else None
+    if checkpoint:
+        start_page = checkpoint["last_page"] + 1
+        collected = checkpoint["rows"]
+        # Drop anything written after the last checkpoint so no row is duplicated
+        for path, offset in checkpoint["offsets"].items():
+            os.truncate(path, offset)
+        logger.info(f"Resuming US News data collection at page {start_page} ({collected} schools already saved)...")
     else:
-        print("Data collection failed: No data collected")
+        start_page = 1
+        collected = 0
+        logger.info("Starting US News data collection...")
 
+    files = {}
+    writers = {}
+    try:
+        for page, items in iter_usnews_pages(max_schools, start_page=start_page, base_url=base_url):
+            # Outputs are only opened once a page has arrived, so a run that cannot fetch
+            # anything (e.g. offline with an empty cache) leaves the previous CSVs intact
+            if not files:
+                for full_path, fields in outputs.items():
+                    os.makedirs(os.path.dirname(full_path) or ".", exist_ok=True)
+                    files[full_path] = open(full_path, "a" if checkpoint else "w", newline="", encoding="utf-8")
+                    writers[full_path] = csv.DictWriter(files[full_path], fieldnames=fields, extrasaction="ignore")
+                    if not checkpoint:
+                        writers[full_path].writeheader()
+
+            if max_schools is not None:
+                items = items[:max_schools - collected]
+            rows = [{field: traverse(school, field) for field in field_paths} for school in items]
+            for full_path, writer in writers.items():
+                writer.writerows(rows)
+                files[full_path].flush()
+            collected += len(rows)
+
+            os.makedirs(os.path.dirname(checkpoint_file) or ".", exist_ok=True)
+            with open(checkpoint_file, "w", encoding="utf-8") as f:
+                json.dump({"last_page": page, "rows": collected, "max_schools": max_schools,
+                           "offsets": {path: f_out.tell() for path, f_out in files.items()}}, f)
+
+            if max_schools is not None and collected >= max_schools:
+                break
+    finally:
+        for f in files.values():
+            f.close()
+
+    logger.info(f"Collected {collected} schools")
+    if os.path.exists(checkpoint_file):
+        os.remove(checkpoint_file)
+
+    if not collected:
+        logger.error("Data collection failed: No data collected")
+        return None
+
+    for full_path in outputs:
+        logger.info(f"Saved data to: {full_path}")
+    logger.info("Data collection completed successfully")
+    return list(outputs)
 
 
-def scrape_college_earnings():
+def current_edition(today=None):
+    """US News edition on sale on `today`: editions come out in September, named after the following year."""
+    today = today or date.today()
+    return today.year + 1 if today.month >= 9 else today.year
+
+
+def collect_usnews_partitions(categories=(USNEWS_ANALYSIS_CATEGORY,), year=None, max_schools=50, store=USNEWS_STORE,
+                              max_workers=None, url_template=USNEWS_CATEGORY_URL):
+    """
+    Collect several US News ranking categories at once into the year/category-partitioned store.
+
+    Each category is paged by its own collect_usnews call on a thread pool (requests to the site
+    are still paced by its host limiter) and written, with both the ranking/state and the
+    tuition/SAT fields, to partition_path(store, year, category).
+
+    The search API only serves the edition currently on sale, so `year` labels the snapshot rather
+    than selecting an edition: earlier years are the partitions left by earlier runs.
+
+    Args:
+        categories (sequence): Values from USNEWS_CATEGORIES.
+        year (int, optional): Snapshot year. Defaults to current_edition().
+        max_schools (int or None): Schools to collect per category; None collects the full ranking.
+        store (str): Store directory.
+        max_workers (int, optional): Categories collected at the same time. Defaults to all of them.
+        url_template (str): Search URL with a {category} placeholder, up to the page number.
+
+    Returns:
+        list: Paths of the written partitions, or None if a category collected no data.
+    """
+    year = year or current_edition()
+    fields = list(dict.fromkeys(RANKING_STATE_FIELDS + TUITION_SAT_FIELDS))
+
+    def collect(category):
+        path = str(partition_path(store, year, category))
+        checkpoint_file = os.path.join(os.path.dirname(path), ".checkpoint.json")
+        return collect_usnews({path: fields}, checkpoint_file, max_schools,
+                              base_url=url_template.format(category=category))
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(categories)) as pool:
+        results = dict(zip(categories, pool.map(collect, categories)))
+    missing = [category for category, paths in results.items() if paths is None]
+    if missing:
+        logger.error(f"No US News data collected for {', '.join(missing)}")
+        return None
+    return [paths[0] for paths in results.values()]
+
+
+EARNINGS_URL = "https://www.collegetransitions.com/dataverse/graduate-earnings/?utm_source=chatgpt.com"
+
+
+def scrape_college_earnings(url=EARNINGS_URL, output_file="artifacts/graduate_earnings_data.csv"):
     """
     Scrapes median earnings data for college graduates from a specified webpage and saves it to a CSV file.
 
     This function retrieves data from the College Transitions dataverse webpage, extracts a table containing
     institution names and median earnings 6 years post-entry, cleans the earnings data by removing currency
     symbols and converting to numeric format, and saves the results to a CSV file.
+
+    Args:
+        url (str): The targeted URL.
+        output_file (str): The path to the output CSV file.
     """
-    URL = "https://www.collegetransitions.com/dataverse/graduate-earnings/?utm_source=chatgpt.com"
+    # pandas is only needed here (read_html), so the other collectors start without it
+    import pandas as pd
+
     TARGET_COLUMN_INSTITUTION = "Institution"
     TARGET_COLUMN_EARNINGS = "Median Earnings - 6 Years Post-Entry (Scorecard)"
-    OUTPUT_FILENAME = "artifacts/graduate_earnings_data.csv"
 
-    print("Fetching web content...")
+    logger.info("Fetching web content...")
 
     headers = {
         "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0.0.0 Safari/537.36",
@@ -265,33 +428,33 @@ def scrape_college_earnings():
     }
 
     try:
-        response = requests.get(URL, headers=headers, timeout=15)
+        response = cached_get(url, headers=headers, timeout=15, source="earnings")
         response.raise_for_status()
 
-        print("Parsing tables from web page...")
-        tables = pd.read_html(response.text)
+        logger.debug("Parsing tables from web page...")
+        tables = pd.read_html(StringIO(response.text))
 
         if not tables:
-            print("Error: No tables found on the web page.")
-            return
+            logger.error("No tables found on the web page.")
+            return None
 
         df = tables[0]
         required_columns = [TARGET_COLUMN_INSTITUTION, TARGET_COLUMN_EARNINGS]
         missing_columns = [col for col in required_columns if col not in df.columns]
 
         if missing_columns:
-            print(f"Initial table is missing required columns. Trying other tables...")
+            logger.warning("Initial table is missing required columns. Trying other tables...")
             for table in tables:
                 if TARGET_COLUMN_INSTITUTION in table.columns and TARGET_COLUMN_EARNINGS in table.columns:
                     df = table
                     break
             else:
-                print("Error: Could not find a table containing the required columns.")
-                return
+                logger.error("Could not find a table containing the required columns.")
+                return None
 
         result_df = df[[TARGET_COLUMN_INSTITUTION, TARGET_COLUMN_EARNINGS]].dropna(how="all")
 
-        print("Cleaning earnings data by removing '$' and converting to numeric...")
+        logger.debug("Cleaning earnings data by removing '$' and converting to numeric...")
         result_df[TARGET_COLUMN_EARNINGS] = (
             result_df[TARGET_COLUMN_EARNINGS]
             .astype(str)
@@ -302,91 +465,13 @@ def scrape_college_earnings():
         result_df[TARGET_COLUMN_EARNINGS] = pd.to_numeric(result_df[TARGET_COLUMN_EARNINGS], errors="coerce")
         result_df = result_df.dropna(subset=[TARGET_COLUMN_EARNINGS]).reset_index(drop=True)
 
-        result_df.to_csv(OUTPUT_FILENAME, index=False)
-        print(" Scraping successful!")
-        print(f" Data saved to file: {OUTPUT_FILENAME}")
-        print(result_df.head())
+        result_df.to_csv(output_file, index=False)
+        logger.info(f"Scraping successful! {len(result_df)} rows saved to file: {output_file}")
+        logger.debug(f"First rows:\n{result_df.head()}")
+        return output_file
 
+    except CacheMissError:
+        raise
     except Exception as e:
-        print(f" Error: {e}")
-
-
-
-def ranking_state():
-    """Scrape top 50 school rankings from US News API and save to CSV"""
-    fields = [
-        "institution.displayName",
-        "institution.state",
-        "ranking.displayRank",
-        "ranking.sortRank",
-        "ranking.isTied"
-    ]
-
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-    }
-
-    base_url = "https://www.usnews.com/best-colleges/api/search?_sort=ranking.sortRank&_sortDirection=asc&_page="
-    output_dir = "artifacts"
-    output_file = "usnews_top50.csv"
-    full_path = os.path.join(output_dir, output_file)
-    max_schools = 50
-    page = 1
-    all_schools_data = []
-
-    print("Starting US News data collection...")
-
-    # Helper function to traverse nested dictionary
-    def traverse(root, path):
-        value = root
-        for segment in path.split("."):
-            if segment.isdigit():
-                value = value[int(segment)] if len(value) > int(segment) else None
-            else:
-                value = value.get(segment, None)
-        return value
-
-    # Fetch data
-    while len(all_schools_data) < max_schools:
-        url = f"{base_url}{page}"
-        print(f"Fetching page {page}...")
-
-        try:
-            resp = requests.get(url, headers=headers, timeout=10)
-            print(f"Response status: {resp.status_code}")
-
-            if resp.status_code != 200:
-                break
-
-            json_data = resp.json()
-            items = json_data.get("data", {}).get("items", [])
-            print(f"Found {len(items)} schools on page {page}")
-
-            if not items:
-                break
-
-            for school in items:
-                if len(all_schools_data) >= max_schools:
-                    break
-                row = {field: traverse(school, field) for field in fields}
-                all_schools_data.append(row)
-
-            page += 1
-
-        except Exception as e:
-            print(f"Error: {e}")
-            break
-
-    print(f"Collected {len(all_schools_data)} schools")
-
-    # Save data to CSV
-    if all_schools_data:
-        os.makedirs(output_dir, exist_ok=True)
-        with open(full_path, "w", newline="", encoding="utf-8") as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fields)
-            writer.writeheader()
-            writer.writerows(all_schools_data)
-        print(f"Saved data to: {full_path}")
-        print("Step 1 completed successfully")
-    else:
-        print("Step 1 failed: No data collected")
\ No newline at end of file
+        logger.error(f"Earnings scraping failed: {e}")
+        return None
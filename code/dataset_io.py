@@ -0,0 +1,105 @@
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+
+RANK_YEARS = ["ht2018", "ht2019", "ht2020", "ht2021", "ht2022", "ht2023", "ht2024", "ht2025"]
+
+# Explicit schema of the cleaned, merged dataset; ranks are integers and may be missing
+MERGED_SCHEMA = pa.schema(
+    [
+        ("institution_id", pa.int64()),
+        ("school_name", pa.string()),
+        ("state", pa.dictionary(pa.int8(), pa.string())),
+        ("display_rank", pa.int32()),
+        ("sort_rank", pa.int32()),
+        ("is_tied", pa.bool_()),
+        ("tuition", pa.int32()),
+        ("sat_score", pa.int16()),
+        ("median_earnings", pa.float64()),
+    ]
+    + [(year, pa.int32()) for year in RANK_YEARS]
+    + [("avgtk", pa.float64())]
+)
+
+# Arrow -> pandas dtypes that keep integers and booleans intact when values are missing
+PANDAS_TYPES = {
+    pa.int8(): pd.Int8Dtype(),
+    pa.int16(): pd.Int16Dtype(),
+    pa.int32(): pd.Int32Dtype(),
+    pa.int64(): pd.Int64Dtype(),
+    pa.bool_(): pd.BooleanDtype(),
+}
+
+
+def to_arrow(df, schema=MERGED_SCHEMA):
+    """
+    Convert a merged DataFrame to an Arrow table with the explicit schema.
+
+    Columns missing from df are filled with nulls, and columns not in the schema are appended
+    with their inferred Arrow type.
+    """
+    columns = {}
+    fields = list(schema)
+    for field in schema:
+        values = df[field.name] if field.name in df.columns else pd.Series([None] * len(df))
+        if pa.types.is_integer(field.type):
+            values = pd.to_numeric(values, errors="coerce").round().astype(PANDAS_TYPES.get(field.type, "Int64"))
+        elif pa.types.is_boolean(field.type):
+            values = values.map({True: True, False: False, "True": True, "False": False}).astype("boolean")
+        elif pa.types.is_dictionary(field.type):
+            values = values.astype("string").astype("category")
+        columns[field.name] = pa.array(values, type=field.type, from_pandas=True)
+    for name in df.columns:
+        if name not in columns:
+            columns[name] = pa.array(df[name], from_pandas=True)
+            fields.append(pa.field(name, columns[name].type))
+    return pa.Table.from_arrays(list(columns.values()), schema=pa.schema(fields))
+
+
+def save_merged_dataset(df, path, csv_path=None):
+    """
+    Write the merged dataset as an uncompressed Feather (Arrow IPC) file, and optionally as CSV.
+
+    The Feather file is left uncompressed so that readers can memory-map it instead of
+    copying it into memory.
+
+    Args:
+        df (pd.DataFrame): Merged dataset.
+        path (str or Path): Feather output path.
+        csv_path (str or Path, optional): Also write a human-readable CSV here.
+
+    Returns:
+        Path: The Feather path.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    feather.write_feather(to_arrow(df), path, compression="uncompressed")
+    if csv_path is not None:
+        df.to_csv(csv_path, index=False)
+    return path
+
+
+def load_merged_dataset(path, memory_map=True):
+    """
+    Load the merged dataset with its schema types applied.
+
+    Feather files are memory-mapped and come back with nullable integer ranks, a categorical
+    state and a boolean tie flag. A CSV path is also accepted and converted to the same types.
+
+    Args:
+        path (str or Path): .feather or .csv file.
+        memory_map (bool): Memory-map the Feather file instead of reading it into memory.
+
+    Returns:
+        pd.DataFrame: The typed dataset.
+    """
+    path = Path(path)
+    if path.suffix == ".csv":
+        table = to_arrow(pd.read_csv(path))
+    else:
+        table = feather.read_table(path, memory_map=memory_map)
+    return table.to_pandas(types_mapper=PANDAS_TYPES.get)
+
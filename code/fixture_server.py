@@ -0,0 +1,270 @@
+import argparse
+import html
+import json
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+from data_cleaning import USNEWS_STORE_DIR
+from data_collection import EARNINGS_URL, PUH_COLUMNS, PUH_NAME_MAPPING, PUH_ROW_RANGE, PUH_URL, USNEWS_ANALYSIS_CATEGORY
+from http_cache import cached_body
+from partitions import latest_partition
+
+
+# Path served for each source; the US News path matches the real search API
+SOURCE_PATHS = {
+    "usnews": "/best-colleges/api/search",
+    "puh": "/puh",
+    "earnings": "/earnings",
+}
+
+# Schools per page of the US News search API
+USNEWS_PAGE_SIZE = 10
+
+
+@dataclass
+class Conditions:
+    """
+    Network conditions applied to every request the fixture server answers.
+
+    Attributes:
+        latency (float): Seconds to wait before answering.
+        jitter (float): Up to this many seconds added to or taken from the latency, uniformly.
+        error_rate (float): Share of requests answered with a 500.
+        max_rps (float, optional): Requests per second allowed per source before answering 429;
+                                   unlimited when None.
+        burst (int): Requests a source may receive at once before max_rps applies.
+        retry_after (int): Seconds sent in the Retry-After header of a 429.
+    """
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    max_rps: float = None
+    burst: int = 1
+    retry_after: int = 1
+
+
+def usnews_items(artifacts_dir="artifacts", n_items=None):
+    """
+    Rebuild US News search API items from the collected ranking and tuition/SAT data.
+
+    The latest USNEWS_ANALYSIS_CATEGORY partition of the store is used when there is one, otherwise
+    the flat snapshot CSVs.
+
+    Args:
+        n_items (int, optional): Repeat the recorded schools (with numbered names and continuing
+                                 ranks) up to this many items, to serve a ranking of that length.
+    """
+    partition = latest_partition(f"{artifacts_dir}/{USNEWS_STORE_DIR}", USNEWS_ANALYSIS_CATEGORY)
+    if partition is not None:
+        schools = pd.read_csv(partition, dtype=str, keep_default_na=False)
+    else:
+        ranking = pd.read_csv(f"{artifacts_dir}/usnews_top50.csv", dtype=str, keep_default_na=False)
+        tuition_sat = pd.read_csv(f"{artifacts_dir}/tuition&sat_top50.csv", dtype=str, keep_default_na=False)
+        schools = ranking.merge(tuition_sat, on="institution.displayName", how="left")
+    records = schools.fillna("").to_dict("records")
+    n_items = n_items or len(records)
+
+    items = []
+    for position in range(n_items):
+        record = dict(records[position % len(records)])
+        copy = position // len(records)
+        if copy:
+            offset = copy * len(records)
+            record["institution.displayName"] += f" {copy + 1}"
+            record["ranking.sortRank"] = str(int(record["ranking.sortRank"]) + offset)
+            record["ranking.displayRank"] = f"#{int(record['ranking.displayRank'].lstrip('#')) + offset}"
+        item = {}
+        for path, value in record.items():
+            if value == "":
+                continue
+            if path in ("ranking.sortRank", "searchData.tuition.rawValue", "searchData.satAvg.rawValue"):
+                value = int(float(value))
+            elif path == "ranking.isTied":
+                value = value == "True"
+            node = item
+            *parents, leaf = path.split(".")
+            for parent in parents:
+                node = node.setdefault(parent, {})
+            node[leaf] = value
+        items.append(item)
+    return items
+
+
+def puh_page(artifacts_dir="artifacts"):
+    """The PUH ranking page as recorded in the HTTP cache, or rebuilt from PUHranking.csv."""
+    body = cached_body(PUH_URL)
+    if body is not None:
+        return body
+    df = pd.read_csv(f"{artifacts_dir}/PUHranking.csv", dtype=str, keep_default_na=False)
+    site_names = {official: short for short, official in PUH_NAME_MAPPING.items()}
+    df["University"] = df["University"].map(lambda name: site_names.get(name, name))
+    rows = []
+    for row_num, record in enumerate(df.to_dict("records"), start=PUH_ROW_RANGE[0]):
+        cells = "".join(f'<td class="{cls}">{html.escape(record[field])}</td>' for cls, field in PUH_COLUMNS.items())
+        rows.append(f'<tr class="row-{row_num}">{cells}</tr>')
+    return f"<html><body><table>{''.join(rows)}</table></body></html>".encode("utf-8")
+
+
+def earnings_page(artifacts_dir="artifacts"):
+    """The College Transitions earnings page as recorded in the HTTP cache, or rebuilt from its CSV."""
+    body = cached_body(EARNINGS_URL)
+    if body is not None:
+        return body
+    df = pd.read_csv(f"{artifacts_dir}/graduate_earnings_data.csv")
+    column = df.columns[1]
+    df[column] = df[column].map(lambda value: f"${value:,.0f}")
+    return f"<html><body>{df.to_html(index=False)}</body></html>".encode("utf-8")
+
+
+class FixtureServer:
+    """
+    Local stand-in for the three collector sources, with injected latency, errors and throttling.
+
+    The US News search API is served page by page from usnews_items(), the PUH and earnings pages
+    as single HTML documents. Requests are counted per source and status.
+
+    Args:
+        conditions (Conditions, optional): Network conditions; defaults to an instant, error-free server.
+        artifacts_dir (str): Directory of the collected CSVs the pages are rebuilt from.
+        usnews_count (int, optional): Schools in the served US News ranking; defaults to the recorded ones.
+        host (str), port (int): Address to listen on; port 0 picks a free port.
+        seed (int): Seed of the latency and error draws.
+    """
+
+    def __init__(self, conditions=None, artifacts_dir="artifacts", usnews_count=None, host="127.0.0.1", port=0,
+                 seed=0):
+        self.conditions = conditions or Conditions()
+        self.items = usnews_items(artifacts_dir, usnews_count)
+        self.pages = {"puh": puh_page(artifacts_dir), "earnings": earnings_page(artifacts_dir)}
+        self.random = random.Random(seed)
+        self.counts = defaultdict(Counter)
+        self.tokens = {}
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    def url(self, source):
+        """Base URL of a source, in the form the matching collector expects."""
+        host, port = self.httpd.server_address[:2]
+        base = f"http://{host}:{port}{SOURCE_PATHS[source]}"
+        return f"{base}?_sort=ranking.sortRank&_sortDirection=asc&_page=" if source == "usnews" else base
+
+    def usnews_category_url(self):
+        """US News search URL with a {category} placeholder; every category is served the same schools."""
+        return self.url("usnews").replace("?", "?schoolType={category}&", 1)
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reset_counts(self):
+        with self.lock:
+            self.counts.clear()
+
+    def stats(self):
+        """Requests answered per source and status code."""
+        with self.lock:
+            return {source: dict(counts) for source, counts in self.counts.items()}
+
+    def _throttled(self, source):
+        """Token bucket per source: refilled at max_rps, holding at most `burst` tokens."""
+        conditions = self.conditions
+        if conditions.max_rps is None:
+            return False
+        now = time.monotonic()
+        with self.lock:
+            tokens, last = self.tokens.get(source, (conditions.burst, now))
+            tokens = min(conditions.burst, tokens + (now - last) * conditions.max_rps)
+            throttled = tokens < 1
+            self.tokens[source] = (tokens if throttled else tokens - 1, now)
+        return throttled
+
+    def respond(self, path, query):
+        """Return (source, status, headers, body) for a request, applying the network conditions."""
+        source = next((name for name, prefix in SOURCE_PATHS.items() if path == prefix), None)
+        with self.lock:
+            delay = max(self.conditions.latency + self.random.uniform(-1, 1) * self.conditions.jitter, 0)
+            failed = self.random.random() < self.conditions.error_rate
+        time.sleep(delay)
+
+        if source is None:
+            return source, 404, {}, b"not found"
+        if self._throttled(source):
+            return source, 429, {"Retry-After": str(self.conditions.retry_after)}, b"too many requests"
+        if failed:
+            return source, 500, {}, b"injected error"
+        if source != "usnews":
+            return source, 200, {"Content-Type": "text/html; charset=utf-8"}, self.pages[source]
+
+        page = int(query.get("_page", ["1"])[0])
+        start = (page - 1) * USNEWS_PAGE_SIZE
+        data = {"items": self.items[start:start + USNEWS_PAGE_SIZE], "totalItems": len(self.items),
+                "totalPages": -(-len(self.items) // USNEWS_PAGE_SIZE)}
+        return source, 200, {"Content-Type": "application/json"}, json.dumps({"data": data}).encode("utf-8")
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                source, status, headers, body = server.respond(parts.path, parse_qs(parts.query))
+                with server.lock:
+                    server.counts[source or "unknown"][status] += 1
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve recorded pages of the three sources locally.")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds before each answer")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random +/- seconds around the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with a 500")
+    parser.add_argument("--max-rps", type=float, help="requests per second per source before answering 429")
+    parser.add_argument("--burst", type=int, default=1)
+    parser.add_argument("--usnews-count", type=int, help="schools in the served US News ranking")
+    args = parser.parse_args(argv)
+
+    conditions = Conditions(args.latency, args.jitter, args.error_rate, args.max_rps, args.burst)
+    server = FixtureServer(conditions, usnews_count=args.usnews_count, port=args.port)
+    for source in SOURCE_PATHS:
+        print(f"{source:<9} {server.url(source)}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from email.utils import formatdate
+from urllib.parse import urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from http_session import get_session
+from instrumentation import record_http
+from rate_limit import scheduled_request
+
+
+CACHE_DIR = ".cache/http"
+
+# Headers that change the response body and therefore belong in the cache key
+CACHE_KEY_HEADERS = ("Accept", "Accept-Language")
+
+# Time-to-live in seconds for each source; entries older than this are revalidated
+SOURCE_TTLS = {
+    "usnews": 24 * 3600,
+    "puh": 7 * 24 * 3600,
+    "earnings": 7 * 24 * 3600,
+}
+DEFAULT_TTL = 24 * 3600
+
+
+logger = logging.getLogger(__name__)
+
+
+class CacheMissError(requests.RequestException):
+    """Raised in offline mode when a URL has no cached response."""
+
+
+_offline = False
+_lock = threading.Lock()
+_stats = {"hits": 0, "revalidated": 0, "misses": 0, "bytes_saved": 0, "bytes_downloaded": 0}
+
+
+def set_offline(offline=True):
+    """Serve only from the cache and raise CacheMissError on a miss."""
+    global _offline
+    _offline = offline
+
+
+def set_cache_dir(path=".cache/http"):
+    """Keep cache entries and bodies under `path`, e.g. a throwaway directory for a cold-cache run."""
+    global CACHE_DIR
+    CACHE_DIR = path
+
+
+def cache_stats():
+    """Return a copy of the hit/miss/bytes counters for this run."""
+    with _lock:
+        return dict(_stats)
+
+
+def report_cache_stats():
+    """Log the cache counters collected during this run."""
+    stats = cache_stats()
+    logger.info("HTTP cache summary:\n"
+                f"  Hits:              {stats['hits']}\n"
+                f"  Revalidated (304): {stats['revalidated']}\n"
+                f"  Misses:            {stats['misses']}\n"
+                f"  Bytes saved:       {stats['bytes_saved']:,}\n"
+                f"  Bytes downloaded:  {stats['bytes_downloaded']:,}")
+
+
+def _count(name, amount=1):
+    with _lock:
+        _stats[name] += amount
+
+
+def _cache_key(url, headers):
+    """Hash the URL together with the headers that affect the response body."""
+    headers = CaseInsensitiveDict(headers or {})
+    parts = [url] + [f"{name}:{headers.get(name, '')}" for name in CACHE_KEY_HEADERS]
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+def _entry_path(key):
+    return os.path.join(CACHE_DIR, "entries", f"{key}.json")
+
+
+def _body_path(digest):
+    return os.path.join(CACHE_DIR, "bodies", digest)
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _load_entry(key):
+    try:
+        with open(_entry_path(key), encoding="utf-8") as f:
+            entry = json.load(f)
+        with open(_body_path(entry["body"]), "rb") as f:
+            return entry, f.read()
+    except (OSError, ValueError, KeyError):
+        return None, None
+
+
+def _store_entry(key, url, response):
+    """Save a response body under its content hash and point the URL's entry at it."""
+    digest = hashlib.sha256(response.content).hexdigest()
+    if not os.path.exists(_body_path(digest)):
+        _write_atomic(_body_path(digest), response.content)
+    entry = {
+        "url": url,
+        "status_code": response.status_code,
+        "headers": {name: response.headers[name] for name in ("Content-Type", "ETag", "Last-Modified")
+                    if name in response.headers},
+        "encoding": response.encoding,
+        "fetched_at": time.time(),
+        "body": digest,
+    }
+    _write_atomic(_entry_path(key), json.dumps(entry, indent=2).encode("utf-8"))
+    return entry
+
+
+def _build_response(url, entry, body):
+    """Rebuild a requests.Response from a cache entry so callers can use it unchanged."""
+    response = requests.Response()
+    response.url = url
+    response.status_code = entry["status_code"]
+    response.headers = CaseInsensitiveDict(entry["headers"])
+    response.encoding = entry["encoding"]
+    response._content = body
+    return response
+
+
+def cached_body(url, headers=None):
+    """Return the cached body for a URL regardless of its age, or None if it was never downloaded."""
+    entry, body = _load_entry(_cache_key(url, headers))
+    return body
+
+
+def cached_get(url, headers=None, timeout=None, source=None, ttl=None):
+    """
+    Drop-in replacement for requests.get backed by an on-disk, content-addressed cache.
+    Network requests go through the shared, retrying session from http_session, paced by the
+    host's adaptive limiter from rate_limit, which also retries 429 and 503 answers.
+
+    Fresh entries are served without touching the network. Stale entries are revalidated with
+    If-None-Match / If-Modified-Since, and a 304 answer refreshes the entry instead of
+    re-downloading the body. Only 200 responses are stored.
+
+    Args:
+        url (str): URL to fetch.
+        headers (dict, optional): Request headers.
+        timeout (float, optional): Request timeout in seconds.
+        source (str, optional): Source name used to look up the TTL in SOURCE_TTLS.
+        ttl (float, optional): Explicit TTL in seconds, overriding the source default.
+
+    Returns:
+        requests.Response: The cached or freshly downloaded response.
+
+    Raises:
+        CacheMissError: In offline mode, when the URL is not cached.
+    """
+    if ttl is None:
+        ttl = SOURCE_TTLS.get(source, DEFAULT_TTL)
+    host = urlsplit(url).netloc
+    key = _cache_key(url, headers)
+    entry, body = _load_entry(key)
+
+    if entry is not None and (_offline or time.time() - entry["fetched_at"] < ttl):
+        record_http(host, cache_hit=True)
+        _count("hits")
+        _count("bytes_saved", len(body))
+        return _build_response(url, entry, body)
+
+    if _offline:
+        _count("misses")
+        raise CacheMissError(f"Offline mode: no cached response for {url}")
+
+    request_headers = dict(headers or {})
+    if entry is not None:
+        if "ETag" in entry["headers"]:
+            request_headers["If-None-Match"] = entry["headers"]["ETag"]
+        if "Last-Modified" in entry["headers"]:
+            request_headers["If-Modified-Since"] = entry["headers"]["Last-Modified"]
+        elif "ETag" not in entry["headers"]:
+            request_headers["If-Modified-Since"] = formatdate(entry["fetched_at"], usegmt=True)
+
+    def send():
+        start = time.perf_counter()
+        try:
+            response = get_session().get(url, headers=request_headers, timeout=timeout)
+        except requests.RequestException:
+            record_http(host, time.perf_counter() - start)
+            raise
+        record_http(host, time.perf_counter() - start, len(response.content), response.status_code)
+        return response
+
+    response = scheduled_request(host, send)
+
+    if response.status_code == 304 and entry is not None:
+        _count("revalidated")
+        _count("bytes_saved", len(body))
+        entry["fetched_at"] = time.time()
+        _write_atomic(_entry_path(key), json.dumps(entry, indent=2).encode("utf-8"))
+        return _build_response(url, entry, body)
+
+    _count("misses")
+    _count("bytes_downloaded", len(response.content))
+    if response.status_code == 200:
+        _store_entry(key, url, response)
+    return response
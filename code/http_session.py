@@ -0,0 +1,87 @@
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+}
+
+# Transient server errors retried by the session; throttling (429, 503) is left to rate_limit,
+# which slows the whole host down instead of retrying one request
+RETRY_STATUSES = (500, 502, 504)
+
+_settings = {
+    "pool_size": 10,
+    "max_retries": 3,
+    "backoff_factor": 0.5,
+    "backoff_max": 30,
+    "backoff_jitter": 0.5,
+}
+_session = None
+_lock = threading.Lock()
+
+
+def configure_session(**settings):
+    """
+    Change the shared session settings. The session is rebuilt on the next get_session() call.
+
+    Keyword Args:
+        pool_size (int): Connections kept alive per host.
+        max_retries (int): Retries for timeouts, connection errors and RETRY_STATUSES.
+        backoff_factor (float): Base delay in seconds; the n-th retry waits backoff_factor * 2 ** (n - 1).
+        backoff_max (float): Upper bound on a single backoff delay in seconds.
+        backoff_jitter (float): Random extra delay of up to this many seconds added to each backoff.
+    """
+    global _session
+    unknown = set(settings) - set(_settings)
+    if unknown:
+        raise ValueError(f"Unknown session settings: {', '.join(sorted(unknown))}")
+    with _lock:
+        _settings.update(settings)
+        if _session is not None:
+            _session.close()
+        _session = None
+
+
+def _build_session():
+    retry = Retry(
+        total=_settings["max_retries"],
+        connect=_settings["max_retries"],
+        read=_settings["max_retries"],
+        status=_settings["max_retries"],
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        backoff_factor=_settings["backoff_factor"],
+        backoff_max=_settings["backoff_max"],
+        backoff_jitter=_settings["backoff_jitter"],
+        respect_retry_after_header=False,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=_settings["pool_size"],
+        pool_maxsize=_settings["pool_size"],
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session():
+    """
+    Return the process-wide requests.Session shared by all collectors.
+
+    Connections are kept alive and pooled per host, so paging through an API reuses one
+    TCP/TLS connection instead of opening a new one per request. Timeouts, connection errors,
+    500, 502 and 504 responses are retried with exponential backoff plus jitter.
+    """
+    global _session
+    with _lock:
+        if _session is None:
+            _session = _build_session()
+        return _session
@@ -0,0 +1,234 @@
+import csv
+import hashlib
+import os
+import re
+import unicodedata
+from collections import Counter, defaultdict
+
+import numpy as np
+import pandas as pd
+
+
+# Names used by other sources that normalization alone cannot reconcile, keyed by canonical US News name
+KNOWN_ALIASES = {
+    "Columbia University": ["Columbia University in the City of New York"],
+    "University of Michigan--Ann Arbor": ["University of Michigan"],
+    "University of Washington": ["University of Washington-Seattle"],
+    "Pennsylvania State University--University Park": ["Pennsylvania State University"],
+    "Texas A&M University": ["Texas A&M University-College Station"],
+    "Tulane University": ["Tulane University of Louisiana"],
+    "Binghamton University--SUNY": ["Binghamton University"],
+    "Stony Brook University--SUNY": ["Stony Brook University"],
+    "University at Buffalo--SUNY": ["University at Buffalo"],
+    "University of Cincinnati": ["University of Cincinnati-Main Campus"],
+}
+
+# Words dropped from the normalized key because sources use them inconsistently
+STOPWORDS = {"the", "at"}
+
+# Order in which resolution methods are trusted when two names resolve to the same institution
+METHOD_RANK = {"exact": 0, "alias": 1, "fuzzy": 2}
+
+# Fuzzy blocking: candidates come from the postings of a query's rarest trigrams only, and
+# trigrams carried by more institutions than the cap are ignored, so a lookup touches a bounded
+# number of candidates however large the registry grows
+BLOCK_TRIGRAMS = 8
+MAX_POSTINGS = 200
+
+
+def normalize_name(name):
+    """
+    Fold an institution name into a comparison key.
+
+    Case, accents and punctuation are folded ("--", "-" and "," all become spaces), "&" becomes
+    "and", and the words in STOPWORDS are dropped, so "The University of Texas--Austin" and
+    "University of Texas at Austin" share the key "university of texas austin".
+    """
+    name = unicodedata.normalize("NFKD", str(name)).encode("ascii", "ignore").decode("ascii")
+    name = name.casefold().replace("&", " and ")
+    words = re.sub(r"[^a-z0-9]+", " ", name).split()
+    return " ".join(word for word in words if word not in STOPWORDS)
+
+
+def institution_id(key):
+    """
+    Stable integer ID of a normalized name: the first 63 bits of its BLAKE2b hash.
+
+    The ID depends only on the name's key, so an institution keeps it across runs, snapshots and
+    changes in ranking order, like an IPEDS unit ID, and fits in a non-negative int64.
+    """
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big") >> 1
+
+
+def trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class InstitutionRegistry:
+    """
+    Canonical institution names with a normalized-key index and a trigram index for fuzzy fallback.
+
+    Every canonical name gets a stable integer ID (see institution_id), and resolve_frame maps a
+    source's names to these IDs once, so sources are joined on an int64 key rather than on text.
+
+    Lookups first try the normalized key of the name (which also covers registered aliases).
+    Only when that fails is the trigram index consulted: candidates are the institutions sharing
+    one of the query's BLOCK_TRIGRAMS rarest trigrams (each held by at most MAX_POSTINGS names),
+    so a lookup touches a bounded block of the registry rather than a share of every name in it.
+
+    Args:
+        names (iterable): Canonical institution names.
+        aliases (dict, optional): Canonical name -> list of alternative names. Defaults to KNOWN_ALIASES.
+        threshold (float): Minimum Dice similarity of trigram sets for a fuzzy match.
+        margin (float): How far the best fuzzy candidate must lead the runner-up; otherwise the
+                        name is reported as ambiguous.
+    """
+
+    def __init__(self, names, aliases=None, threshold=0.9, margin=0.05):
+        self.threshold = threshold
+        self.margin = margin
+        self.names = []
+        self.ids = []
+        self.id_positions = {}
+        self.key_index = {}
+        self.alias_keys = set()
+        self.trigram_index = defaultdict(set)
+        self.trigram_sets = []
+        self.issues = []
+        self._resolved = {}
+        self._reported = set()
+
+        for name in names:
+            self.add(name)
+        for canonical, alternatives in (KNOWN_ALIASES if aliases is None else aliases).items():
+            if normalize_name(canonical) in self.key_index:
+                for alias in alternatives:
+                    self.add_alias(alias, canonical)
+
+    def add(self, name):
+        """Register a canonical name; returns its position in the registry."""
+        key = normalize_name(name)
+        if key in self.key_index:
+            return self.key_index[key]
+        position = len(self.names)
+        new_id = institution_id(key)
+        if new_id in self.id_positions:
+            raise ValueError(f"Institution ID collision between {name!r} and {self.names[self.id_positions[new_id]]!r}")
+        self.names.append(name)
+        self.ids.append(new_id)
+        self.id_positions[new_id] = position
+        self.key_index[key] = position
+        grams = trigrams(key)
+        for gram in grams:
+            self.trigram_index[gram].add(position)
+        self.trigram_sets.append(grams)
+        return position
+
+    def add_alias(self, alias, canonical):
+        """Make `alias` resolve to the already registered `canonical` name."""
+        key = normalize_name(alias)
+        self.key_index.setdefault(key, self.key_index[normalize_name(canonical)])
+        self.alias_keys.add(key)
+
+    def _fuzzy(self, key):
+        grams = trigrams(key)
+        # Rare trigrams discriminate (IDF); common ones ("uni", "ver", ...) would pull in most of the registry
+        postings = sorted((self.trigram_index[gram] for gram in grams if gram in self.trigram_index), key=len)
+        shared = Counter()
+        for block in postings[:BLOCK_TRIGRAMS]:
+            if len(block) > MAX_POSTINGS:
+                break
+            shared.update(block)
+        scored = []
+        for position, _ in shared.most_common(20):
+            candidate = self.trigram_sets[position]
+            scored.append((2 * len(grams & candidate) / (len(grams) + len(candidate)), position))
+        scored.sort(reverse=True)
+        return scored
+
+    def resolve(self, name, source=None):
+        """
+        Resolve a name to its canonical form.
+
+        Returns:
+            tuple: (canonical name or None, method) where method is "exact", "alias", "fuzzy",
+                   "ambiguous" or "unmatched". Fuzzy, ambiguous and unmatched names are also
+                   recorded in self.issues for the resolution report, once per source. Results are
+                   memoized, so a name seen again (e.g. in a later chunk) costs one dict lookup.
+        """
+        if name is None or (isinstance(name, float) and name != name):
+            return None, "unmatched"
+        if name not in self._resolved:
+            self._resolved[name] = self._resolve_new(name)
+        match, method, issue = self._resolved[name]
+        if issue is not None and (source, name) not in self._reported:
+            self._reported.add((source, name))
+            self.issues.append({"source": source, "name": name, **issue})
+        return match, method
+
+    def _resolve_new(self, name):
+        key = normalize_name(name)
+        if key in self.key_index:
+            return self.names[self.key_index[key]], "alias" if key in self.alias_keys else "exact", None
+
+        scored = self._fuzzy(key)
+        best = scored[0] if scored else (0.0, None)
+        runner_up = scored[1][0] if len(scored) > 1 else 0.0
+        if best[0] >= self.threshold and best[0] - runner_up >= self.margin:
+            match, method = self.names[best[1]], "fuzzy"
+        elif best[0] >= self.threshold:
+            match, method = None, "ambiguous"
+        else:
+            match, method = None, "unmatched"
+
+        candidates = "; ".join(f"{self.names[position]} ({score:.2f})" for score, position in scored[:3])
+        return match, method, {"status": method, "match": match, "score": round(best[0], 4),
+                               "candidates": candidates}
+
+    def id_of(self, name):
+        """ID of a registered canonical name or alias."""
+        return self.ids[self.key_index[normalize_name(name)]]
+
+    def ids_for(self, names):
+        """IDs of registered names (such as the canonical names the registry was built from), as an int64 array."""
+        codes, uniques = pd.factorize(names)
+        return np.array([self.id_of(name) for name in uniques], dtype=np.int64)[codes]
+
+    def name_of(self, institution):
+        """Canonical name of an institution ID."""
+        return self.names[self.id_positions[institution]]
+
+    def resolve_frame(self, df, column="school_name", source=None, dedupe=True):
+        """
+        Replace the names in `column` with an "institution_id" column and drop rows that could not be resolved.
+
+        Each distinct name is resolved once and the IDs are spread to the rows through the codes of
+        pd.factorize, so the cost of a row does not depend on the length of its name. When several
+        rows resolve to the same institution, the most trusted match is kept (exact, then alias,
+        then fuzzy). With dedupe=False the duplicates are kept together with a "_method_rank"
+        column, so that chunks can be combined first and passed to dedupe().
+        """
+        codes, names = pd.factorize(df[column])
+        resolved = [self.resolve(name, source) for name in names]
+        # One trailing slot for the code -1 that factorize gives missing names
+        ids = np.array([self.id_of(match) if match is not None else -1 for match, _ in resolved] + [-1], dtype=np.int64)
+        ranks = np.array([METHOD_RANK.get(method, np.nan) for _, method in resolved] + [np.nan])
+        df = df.drop(columns=column).assign(institution_id=ids[codes], _method_rank=ranks[codes])
+        df = df[df["institution_id"].to_numpy() >= 0]
+        return self.dedupe(df) if dedupe else df
+
+    @staticmethod
+    def dedupe(df, column="institution_id", keep_rank=False):
+        """Keep the most trusted row per institution from a frame returned by resolve_frame(dedupe=False)."""
+        df = df.sort_values("_method_rank", kind="stable").drop_duplicates(subset=[column]).sort_index()
+        return df if keep_rank else df.drop(columns="_method_rank")
+
+    def write_report(self, path):
+        """Save fuzzy, ambiguous and unmatched names to a CSV for review; returns the path."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=["source", "name", "status", "match", "score", "candidates"])
+            writer.writeheader()
+            writer.writerows(self.issues)
+        return path
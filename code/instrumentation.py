@@ -0,0 +1,190 @@
+import json
+import logging
+import math
+import os
+import platform
+import sys
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+
+RUN_REPORT = "artifacts/run_report.json"
+
+LOG_FORMAT = "%(asctime)s %(levelname)-7s %(name)s: %(message)s"
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_trace_memory = False
+_active_sections = 0
+_sections = defaultdict(dict)
+_http = defaultdict(lambda: {"requests": 0, "cache_hits": 0, "bytes": 0, "errors": 0, "latencies": []})
+_merges = []
+
+
+def setup_logging(level="INFO"):
+    """Send log records at `level` and above to stderr with timestamps and logger names."""
+    logging.basicConfig(level=getattr(logging, str(level).upper()), format=LOG_FORMAT, force=True)
+
+
+def start_run(trace_memory=False):
+    """
+    Reset every counter for a new run.
+
+    Args:
+        trace_memory (bool): Record peak memory per section with tracemalloc. Tracing slows
+                             Python-heavy code (imports included) down severalfold, so the
+                             wall and CPU times of a traced run overstate the untraced ones.
+    """
+    global _trace_memory, _active_sections
+    with _lock:
+        _sections.clear()
+        _http.clear()
+        _merges.clear()
+        _active_sections = 0
+        _trace_memory = trace_memory
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+@contextmanager
+def measure(section, name):
+    """
+    Record wall time, CPU time and peak traced memory of a block under report[section][name].
+
+    CPU time is that of the calling thread (stages and collectors each run in their own thread);
+    work done in child processes is not included. tracemalloc has a single process-wide peak, so
+    when sections overlap their peaks are upper bounds that include each other's allocations.
+    """
+    global _active_sections
+    tracing = _trace_memory and tracemalloc.is_tracing()
+    with _lock:
+        if tracing and _active_sections == 0:
+            tracemalloc.reset_peak()
+        _active_sections += 1
+    start_memory = tracemalloc.get_traced_memory()[0] if tracing else 0
+    start_wall, start_cpu = time.perf_counter(), time.thread_time()
+    result = {"ok": True}
+    try:
+        yield result
+    except BaseException as e:
+        result["ok"] = False
+        result["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        result["wall_s"] = time.perf_counter() - start_wall
+        result["cpu_s"] = time.thread_time() - start_cpu
+        if tracing:
+            result["peak_mb"] = max(tracemalloc.get_traced_memory()[1] - start_memory, 0) / 2 ** 20
+        with _lock:
+            _active_sections -= 1
+            _sections[section][name] = result
+
+
+def record_http(host, seconds=None, nbytes=0, status=None, cache_hit=False):
+    """Count one request to `host`: a cache hit, or a network request with its latency, size and status."""
+    with _lock:
+        stats = _http[host]
+        if cache_hit:
+            stats["cache_hits"] += 1
+            return
+        stats["requests"] += 1
+        stats["bytes"] += nbytes
+        if seconds is not None:
+            stats["latencies"].append(seconds)
+        if status is None or status >= 400:
+            stats["errors"] += 1
+
+
+def record_merge(step, left_rows, right_rows, output_rows, matched_rows=None):
+    """Record the row counts going into and out of one merge."""
+    with _lock:
+        _merges.append({"step": step, "left_rows": left_rows, "right_rows": right_rows,
+                        "output_rows": output_rows, "matched_rows": matched_rows})
+
+
+def percentile(values, q):
+    """q-th percentile of sorted values with linear interpolation, as numpy.percentile computes it."""
+    position = (len(values) - 1) * q / 100
+    low, high = math.floor(position), math.ceil(position)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+def http_summary():
+    """Per-host request counts, bytes and latency percentiles (in milliseconds)."""
+    with _lock:
+        hosts = {host: dict(stats, latencies=list(stats["latencies"])) for host, stats in _http.items()}
+    summary = {}
+    for host, stats in sorted(hosts.items()):
+        latencies = sorted(seconds * 1000 for seconds in stats.pop("latencies"))
+        if latencies:
+            stats.update({f"latency_p{q}_ms": percentile(latencies, q) for q in (50, 90, 99)})
+            stats["latency_max_ms"] = latencies[-1]
+        summary[host] = stats
+    return summary
+
+
+def build_report(extra=None):
+    """Assemble the run report as a JSON-serializable dict; `extra` is merged in at the top level."""
+    with _lock:
+        sections = {section: dict(entries) for section, entries in _sections.items()}
+        merges = list(_merges)
+    report = {
+        "finished_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "argv": sys.argv,
+        "python": platform.python_version(),
+        "trace_memory": _trace_memory,
+        **sections,
+        "http": http_summary(),
+        "merges": merges,
+    }
+    report.update(extra or {})
+    return report
+
+
+def write_report(path=RUN_REPORT, extra=None):
+    """Write the run report to a JSON file; returns the report."""
+    report = build_report(extra)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, default=str)
+    logger.info("Run report saved to %s", path)
+    return report
+
+
+def format_summary(report):
+    """Render the stage, collector, HTTP, scheduler and merge sections of a report as plain-text tables."""
+    lines = []
+    for section in ("imports", "stages", "collectors"):
+        if report.get(section):
+            lines.append(f"{section.capitalize():<34} {'wall (s)':>9} {'cpu (s)':>9} {'peak (MB)':>10}  status")
+            for name, result in report[section].items():
+                peak = f"{result['peak_mb']:10.1f}" if "peak_mb" in result else f"{'-':>10}"
+                status = "OK" if result["ok"] else f"FAILED ({result['error']})"
+                lines.append(f"  {name:<32} {result['wall_s']:9.2f} {result['cpu_s']:9.2f} {peak}  {status}")
+    if report.get("http"):
+        lines.append(f"{'HTTP host':<34} {'requests':>9} {'cached':>7} {'errors':>7} {'bytes':>12} "
+                     f"{'p50 (ms)':>9} {'p90 (ms)':>9} {'p99 (ms)':>9}")
+        for host, stats in report["http"].items():
+            percentiles = " ".join(f"{stats[f'latency_p{q}_ms']:9.1f}" if f"latency_p{q}_ms" in stats else f"{'-':>9}"
+                                   for q in (50, 90, 99))
+            lines.append(f"  {host:<32} {stats['requests']:9d} {stats['cache_hits']:7d} {stats['errors']:7d} "
+                         f"{stats['bytes']:12,} {percentiles}")
+    if report.get("throttle"):
+        lines.append(f"{'Scheduled host':<34} {'requests':>9} {'429/503':>8} {'waited (s)':>11} {'rate (/s)':>10} "
+                     f"{'effective (/s)':>15}")
+        for host, stats in report["throttle"].items():
+            effective = f"{stats['effective_rps']:15.1f}" if stats["effective_rps"] is not None else f"{'-':>15}"
+            lines.append(f"  {host:<32} {stats['requests']:9d} {stats['throttled']:8d} {stats['waited_s']:11.2f} "
+                         f"{stats['rate']:10.1f} {effective}")
+    if report.get("merges"):
+        lines.append(f"{'Merge':<34} {'left':>7} {'right':>7} {'matched':>8} {'output':>7}")
+        for merge in report["merges"]:
+            matched = "-" if merge["matched_rows"] is None else merge["matched_rows"]
+            lines.append(f"  {merge['step']:<32} {merge['left_rows']:7d} {merge['right_rows']:7d} "
+                         f"{matched:>8} {merge['output_rows']:7d}")
+    return "\n".join(lines)
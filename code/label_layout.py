@@ -0,0 +1,108 @@
+import math
+from collections import defaultdict
+
+import numpy as np
+
+
+# Overlapping labels a label climbs past one at a time before it jumps over the rest of the stack
+MAX_CLIMBS = 16
+
+
+class LabelGrid:
+    """
+    Uniform grid over placed label boxes, for finding the labels that may overlap a new one.
+
+    Every label box is txt_width * 2 wide and txt_height tall, so with cells of that size a
+    box covers at most 2 x 2 cells and an overlap query only looks at the labels in those
+    cells, however many labels have been placed elsewhere. Each column of cells also keeps
+    its skyline, the bottom of the highest label placed in it: any box that overlaps a new
+    one lies in one of the new box's two columns, so the box is free above both skylines.
+    """
+
+    def __init__(self, txt_width, txt_height):
+        self.cell_w = 2 * txt_width
+        self.cell_h = txt_height
+        self.cells = defaultdict(list)
+        self.skyline = {}
+
+    def _cells(self, x, y):
+        ix = math.floor((x - self.cell_w / 2) / self.cell_w)
+        iy = math.floor(y / self.cell_h)
+        return (ix, iy), (ix + 1, iy), (ix, iy + 1), (ix + 1, iy + 1)
+
+    def add(self, x, y):
+        """Place a label box centered on x with its bottom at y."""
+        for cell in self._cells(x, y):
+            self.cells[cell].append((x, y))
+        for column, _ in self._cells(x, y)[:2]:
+            self.skyline[column] = max(self.skyline.get(column, y), y)
+
+    def highest_in_columns(self, x):
+        """Bottom of the highest placed label in the columns a box centered on x spans, or None."""
+        tops = [self.skyline[column] for column, _ in self._cells(x, 0)[:2] if column in self.skyline]
+        return max(tops) if tops else None
+
+    def highest_overlap(self, x, y):
+        """
+        Bottom of the highest placed label whose box overlaps a box centered on x with its
+        bottom at y, or None when the box is free.
+        """
+        highest = None
+        cell_w, cell_h, cells = self.cell_w, self.cell_h, self.cells
+        for cell in self._cells(x, y):
+            for other_x, other_y in cells.get(cell, ()):
+                if abs(other_x - x) < cell_w and abs(other_y - y) < cell_h and (highest is None or other_y > highest):
+                    highest = other_y
+        return highest
+
+
+def layout_labels(x_data, y_data, txt_width, txt_height, priority=None, max_labels=None, max_height=None):
+    """
+    Choose label heights so that no two labels overlap, using a grid index of placed labels.
+
+    Labels are placed one at a time in priority order. Each starts at its point's height and,
+    while it overlaps an already placed label, moves to just above the highest label it
+    overlaps. After MAX_CLIMBS such moves it jumps straight above the skyline of its grid
+    columns instead of climbing the rest of the stack. Each label therefore costs a bounded
+    number of lookups in nearby grid cells, and a layout takes linear time however the
+    labels pile up.
+
+    Args:
+        x_data, y_data (sequence): Point coordinates.
+        txt_width (float): Half the width of a label, in x data units.
+        txt_height (float): Height of a label, in y data units.
+        priority (sequence, optional): Sort key per point; lower values are labelled first (e.g.
+                                       rank, or negated earnings). Defaults to the input order.
+        max_labels (int, optional): Label only the first max_labels points in priority order.
+        max_height (float, optional): Top of the axes. Labels that would end above it are left out.
+
+    Returns:
+        np.ndarray: Label height per point, NaN for points left unlabelled.
+    """
+    x_data = np.asarray(x_data, dtype=float)
+    y_data = np.asarray(y_data, dtype=float)
+    order = np.arange(len(x_data)) if priority is None else np.argsort(np.asarray(priority), kind="stable")
+    if max_labels is not None:
+        order = order[:max_labels]
+
+    # Labels only move up, so one that has passed the top can be left out straight away
+    top = np.inf if max_height is None else max_height
+    grid = LabelGrid(txt_width, txt_height)
+    text_positions = np.full(len(x_data), np.nan)
+    for index in order:
+        x, t = x_data[index], y_data[index]
+        if np.isnan(x) or np.isnan(t):
+            continue
+        for _ in range(MAX_CLIMBS):
+            highest = grid.highest_overlap(x, t)
+            if highest is None or t + txt_height > top:
+                break
+            t = highest + txt_height * 1.01
+        else:
+            if grid.highest_overlap(x, t) is not None:
+                t = grid.highest_in_columns(x) + txt_height * 1.01
+        if t + txt_height > top:
+            continue
+        grid.add(x, t)
+        text_positions[index] = t
+    return text_positions
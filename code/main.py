@@ -1,40 +1,349 @@
+import argparse
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+# Only the light modules are imported here: pandas, pyarrow, statsmodels, scipy, matplotlib and
+# seaborn are imported inside the stages that use them, so `main.py collect` starts quickly.
 from data_collection import (
+    USNEWS_ANALYSIS_CATEGORY,
+    USNEWS_CATEGORIES,
+    USNEWS_STORE,
     scrape_puh_rankings,
-    collect_sat_tuition,
-    scrape_college_earnings,
-    ranking_state
+    collect_usnews_partitions,
+    current_edition,
+    scrape_college_earnings
+)
+
+from http_cache import cache_stats, set_offline, report_cache_stats
+from http_session import configure_session
+from instrumentation import (
+    RUN_REPORT, build_report, format_summary, measure, setup_logging, start_run, write_report
 )
+from partitions import latest_partition, partition_path
+from pipeline import Stage, run_pipeline, select_stages
+from rate_limit import configure_host, report_throttle_stats, throttle_stats
+
+logger = logging.getLogger(__name__)
+
+
+# Collectors by source name, as accepted by `main.py collect SOURCE`
+COLLECTORS = {
+    "puh": ("Public University Rankings", scrape_puh_rankings),
+    "usnews": ("US News Rankings, SAT and Tuition", collect_usnews_partitions),
+    "earnings": ("College Earnings Data", scrape_college_earnings),
+}
+
+
+def run_collectors(collectors=tuple(COLLECTORS.values()), max_workers=None):
+    """
+    Launch all data collectors at once on a thread pool and wait for every one of them to finish.
+
+    The collectors hit unrelated hosts and share no data, so the stage takes roughly as long as
+    the slowest collector instead of the sum of all of them.
+
+    Args:
+        collectors (list): (name, function) pairs to run. Each function is called with no arguments
+                           and counts as failed if it raises or returns None.
+        max_workers (int, optional): Size of the thread pool. Defaults to one thread per collector.
+
+    Each collector is measured under the "collectors" section of the run report.
+
+    Returns:
+        dict: Collector name -> {"ok": bool, "seconds": float, "error": str or None}.
+    """
+    def timed(name, func):
+        try:
+            with measure("collectors", name) as result:
+                if func() is None:
+                    raise RuntimeError("no data collected")
+        except Exception:
+            pass  # measure() has recorded the error
+        return result["ok"], result["wall_s"], result.get("error")
+
+    stage_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers or len(collectors)) as pool:
+        futures = {name: pool.submit(timed, name, func) for name, func in collectors}
+        results = {}
+        for name, future in futures.items():
+            ok, seconds, error = future.result()
+            results[name] = {"ok": ok, "seconds": seconds, "error": error}
+    stage_seconds = time.perf_counter() - stage_start
+
+    for name, result in results.items():
+        if result["ok"]:
+            logger.info(f"Collector '{name}' finished in {result['seconds']:.2f}s")
+        else:
+            logger.error(f"Collector '{name}' failed after {result['seconds']:.2f}s: {result['error']}")
+    logger.info(f"Collection finished in {stage_seconds:.2f}s")
+
+    return results
+
+
+# Files written by the PUH and earnings collectors; the US News ones depend on the categories and year
+RAW_OUTPUTS = {
+    "puh": ["artifacts/PUHranking.csv"],
+    "earnings": ["artifacts/graduate_earnings_data.csv"],
+}
+# US News category the clean stage merges with the other sources
+CLEAN_CATEGORY = USNEWS_ANALYSIS_CATEGORY
+# Flat US News snapshot committed with the repository, cleaned when the store has no partition yet
+USNEWS_SNAPSHOT = ["artifacts/usnews_top50.csv", "artifacts/tuition&sat_top50.csv"]
+CLEANED_DATASET = "artifacts/cleaned_merged_dataset.feather"
+CLEANED_CSV = "artifacts/cleaned_merged_dataset.csv"
+PLOT_OUTPUTS = [
+    "plot/sort_rank_vs_median_earnings.png",
+    "plot/tuition_std_vs_median_earnings.png",
+    "plot/sat_score_std_vs_median_earnings.png",
+    "plot/avgtk_vs_median_earnings.png",
+]
+
+
+def collect_stage(max_schools=50, categories=(CLEAN_CATEGORY,), year=None, sources=tuple(COLLECTORS)):
+    usnews = partial(collect_usnews_partitions, categories=categories, year=year, max_schools=max_schools)
+    collectors = [(name, usnews if source == "usnews" else func)
+                  for source, (name, func) in COLLECTORS.items() if source in sources]
+    results = run_collectors(collectors)
+    failed = [name for name, result in results.items() if not result["ok"]]
+    if failed:
+        raise RuntimeError(f"collector(s) failed: {', '.join(failed)}")
+
+
+def clean_stage(compact=False, chunksize=None, year=None):
+    with measure("imports", "clean"):
+        from data_cleaning import process_university_data
+    if process_university_data(compact=compact, chunksize=chunksize, year=year, category=CLEAN_CATEGORY) is None:
+        raise RuntimeError("data processing did not produce a dataset")
+
+
+def regress_stage(bootstrap_reps=9999, bootstrap_weights="rademacher"):
+    with measure("imports", "regress"):
+        from analysis import run_regressions
+    run_regressions(bootstrap_reps=bootstrap_reps, bootstrap_weights=bootstrap_weights)
+
+
+def panel_stage():
+    with measure("imports", "panel"):
+        from panel import run_panel_regressions
+    run_panel_regressions()
+
+
+def plot_stage(force=False):
+    with measure("imports", "plot"):
+        from analysis import generate_all_plots
+    generate_all_plots(force=force)
+
+
+def build_stages(max_schools=50, compact=False, chunksize=None, bootstrap_reps=9999, bootstrap_weights="rademacher",
+                 categories=(CLEAN_CATEGORY,), year=None, sources=tuple(COLLECTORS)):
+    """
+    Build the pipeline's stage graph.
+
+    The stages' modules are listed by name in `code`, so building the graph imports none of them.
+
+    Args:
+        max_schools (int or None): How many US News schools to collect per category; None collects
+                                   the full ranking.
+        compact (bool): Clean the data with memory-optimized dtypes.
+        chunksize (int, optional): Stream the large sources through cleaning in chunks of this many rows.
+        bootstrap_reps (int): Wild cluster bootstrap replications for the regressions (0 to skip).
+        bootstrap_weights (str): "rademacher" or "webb" bootstrap weights.
+        categories (sequence): US News categories to collect; CLEAN_CATEGORY, which the clean stage
+                               reads, is always collected.
+        year (int, optional): Snapshot year of the US News partitions. collect defaults to
+                              current_edition(); clean reads the given year, which must have been
+                              collected, or else the latest partition (the flat snapshot if none).
+        sources (sequence): Collectors the collect stage runs (keys of COLLECTORS).
+    """
+    clean_year = year
+    year = year or current_edition()
+    categories = list(dict.fromkeys([CLEAN_CATEGORY, *categories]))
+    outputs = {**RAW_OUTPUTS, "usnews": [str(partition_path(USNEWS_STORE, year, category)) for category in categories]}
+    # Without a requested year clean reads the latest partition: the one collect writes, or an older one
+    clean_partitions = {str(partition_path(USNEWS_STORE, year, CLEAN_CATEGORY))}
+    if clean_year is None and latest_partition(USNEWS_STORE, CLEAN_CATEGORY) is not None:
+        clean_partitions.add(str(latest_partition(USNEWS_STORE, CLEAN_CATEGORY)))
+    clean_inputs = RAW_OUTPUTS["puh"] + RAW_OUTPUTS["earnings"] + USNEWS_SNAPSHOT + sorted(clean_partitions)
+    return [
+        Stage("collect", collect_stage, outputs=[path for source in sources for path in outputs[source]],
+              params={"max_schools": max_schools, "categories": categories, "year": year, "sources": list(sources)},
+              code=["data_collection", "http_cache", "http_session"], max_age=24 * 3600),
+        Stage("clean", clean_stage, inputs=clean_inputs, outputs=[CLEANED_DATASET, CLEANED_CSV],
+              params={"compact": compact, "chunksize": chunksize, "year": clean_year},
+              code=["data_cleaning", "institutions", "dataset_io"], deps=["collect"]),
+        Stage("regress", regress_stage, inputs=[CLEANED_DATASET],
+              outputs=["artifacts/regression.csv"],
+              params={"bootstrap_reps": bootstrap_reps, "bootstrap_weights": bootstrap_weights},
+              code=["regression", "analysis"], deps=["clean"]),
+        Stage("panel", panel_stage, inputs=[CLEANED_DATASET], outputs=["artifacts/panel_regression.csv"],
+              code=["panel"], deps=["clean"]),
+        Stage("plot", plot_stage, inputs=[CLEANED_DATASET], outputs=PLOT_OUTPUTS,
+              code=["analysis", "label_layout"], deps=["clean"], force_param="force"),
+    ]
+
+
+STAGE_NAMES = [stage.name for stage in build_stages()]
+
+# Stages run by each subcommand
+COMMANDS = {
+    "collect": ["collect"],
+    "clean": ["clean"],
+    "regress": ["regress", "panel"],
+    "plot": ["plot"],
+    "all": STAGE_NAMES,
+}
+
+
+def main(command="all", source=None, offline=False, force=(), max_schools=50, compact=False, chunksize=None,
+         bootstrap_reps=9999, bootstrap_weights="rademacher", report_path=RUN_REPORT, summary=False,
+         trace_memory=False, categories=(CLEAN_CATEGORY,), year=None):
+    """
+    Run the stages of one subcommand and write a JSON run report.
+
+    Args:
+        command (str): Key of COMMANDS. Stages outside the command read what their upstream stages
+                       last wrote.
+        source (str, optional): Run only this collector (a key of COLLECTORS) in the collect stage.
+        report_path (str or None): Where to write the run report (stage and collector timings,
+                                   per-host HTTP statistics, merge row counts); None to skip it.
+        summary (bool): Also print the report as plain-text tables.
+        trace_memory (bool): Record peak memory per stage and collector with tracemalloc (off by
+                             default: it slows the stages and inflates their timings).
+        categories (sequence), year (int, optional): US News categories and snapshot year to collect,
+                                                     see build_stages.
+
+    Returns:
+        int: 0 if every stage ran or was up to date, 1 otherwise.
+    """
+    logger.info(f"Starting university earnings pipeline ({command})...")
+    start_run(trace_memory=trace_memory)
+    set_offline(offline)
+
+    stages = build_stages(max_schools, compact, chunksize, bootstrap_reps, bootstrap_weights, categories, year,
+                          sources=[source] if source else tuple(COLLECTORS))
+    status = run_pipeline(select_stages(stages, COMMANDS[command]), force=force)
+
+    logger.info("Pipeline summary:\n" + "\n".join(f"  {name:<10} {outcome}" for name, outcome in status.items()))
+    report_cache_stats()
+    report_throttle_stats()
+
+    if report_path or summary:
+        extra = {"command": command, "pipeline": status, "http_cache": cache_stats(), "throttle": throttle_stats()}
+        report = write_report(report_path, extra) if report_path else build_report(extra)
+        if summary:
+            print(format_summary(report))
+
+    return 0 if all(outcome == "ran" or outcome.startswith("skipped (up") for outcome in status.values()) else 1
+
+
+def parse_limit(value):
+    """Parse a --max-schools value: a positive integer, or "all" for no limit (None)."""
+    if value.lower() == "all":
+        return None
+    limit = int(value)
+    if limit < 1:
+        raise argparse.ArgumentTypeError("must be a positive integer or 'all'")
+    return limit
+
+
+def parse_host_limit(value):
+    """Parse a --host-concurrency value of the form HOST=N into (host, N)."""
+    host, _, limit = value.rpartition("=")
+    if not host or not limit.isdigit() or int(limit) < 1:
+        raise argparse.ArgumentTypeError("must be HOST=N with N a positive integer")
+    return host, int(limit)
+
+
+def add_collect_options(parser):
+    parser.add_argument("--offline", action="store_true",
+                        help="serve every request from the HTTP cache and fail fast on a cache miss")
+    parser.add_argument("--max-schools", type=parse_limit, default=50, metavar="N|all",
+                        help="number of US News schools to collect per category, or 'all' for the full ranking "
+                             "(default: 50)")
+    parser.add_argument("--categories", nargs="+", choices=USNEWS_CATEGORIES, default=[CLEAN_CATEGORY],
+                        metavar="CATEGORY",
+                        help=f"US News ranking categories to collect, fetched concurrently; {CLEAN_CATEGORY} is "
+                             f"always collected for the analysis (choices: {', '.join(USNEWS_CATEGORIES)})")
+    parser.add_argument("--pool-size", type=int, default=10,
+                        help="keep-alive connections per host in the shared HTTP session (default: 10)")
+    parser.add_argument("--max-retries", type=int, default=3,
+                        help="retries for timeouts, connection errors and 500/502/504 responses (default: 3)")
+    parser.add_argument("--host-concurrency", type=parse_host_limit, action="append", default=[], metavar="HOST=N",
+                        help="at most N requests in flight to HOST, e.g. www.usnews.com=4 (repeatable)")
 
-from data_cleaning import process_university_data
 
-from analysis import run_regressions, generate_all_plots
+def add_clean_options(parser):
+    parser.add_argument("--compact", action="store_true",
+                        help="clean the data with memory-optimized dtypes (categoricals, small integers, float32)")
+    parser.add_argument("--chunksize", type=int, default=None, metavar="ROWS",
+                        help="stream the earnings, tuition/SAT and historical ranking files in chunks of ROWS rows")
 
 
-def main():
-    print("Starting full data collection pipeline...\n")
+def add_regress_options(parser):
+    parser.add_argument("--bootstrap-reps", type=int, default=9999, metavar="N",
+                        help="wild cluster bootstrap replications for the regressions, 0 to skip (default: 9999)")
+    parser.add_argument("--bootstrap-weights", choices=["rademacher", "webb"], default="rademacher",
+                        help="wild bootstrap weight distribution; webb suits very few clusters (default: rademacher)")
 
-    print("Step 1: Scraping Public University Rankings...")
-    scrape_puh_rankings()
 
-    print("\nStep 2: Collecting SAT and Tuition Data...")
-    collect_sat_tuition()
+def add_run_options(parser, command):
+    parser.add_argument("--force", action="append", default=[], metavar="STAGE", choices=COMMANDS[command],
+                        help="re-run STAGE and everything downstream of it even if up to date (repeatable)")
+    parser.add_argument("--report", dest="report_path", default=RUN_REPORT, metavar="PATH",
+                        help=f"write the JSON run report to PATH, or '' to skip it (default: {RUN_REPORT})")
+    parser.add_argument("--summary", action="store_true",
+                        help="print per-stage, per-collector, per-host and per-merge tables at the end")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="also record peak memory with tracemalloc (slows Python-heavy stages and imports "
+                             "down severalfold, so the timings of a traced run are inflated)")
+    parser.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+                        help="minimum level of log messages on stderr; DEBUG adds the data previews (default: INFO)")
 
-    print("\nStep 3: Scraping College Earnings Data...")
-    scrape_college_earnings()
 
-    print("\nStep 4: Collecting State-level Rankings...")
-    ranking_state()
+def parse_args(argv=None):
+    """
+    Parse the command line. Without a subcommand the whole pipeline runs, as `all` would.
 
-    print("\nData collection completed for all modules.\n")
+    Options follow the subcommand, e.g. `main.py clean --compact`.
+    """
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] not in COMMANDS and argv[0] not in ("-h", "--help"):
+        argv = ["all", *argv]
 
-    print("\nStep 5: Processing, cleaning, and merging data...")
-    process_university_data()
+    parser = argparse.ArgumentParser(description="Run the university earnings pipeline.")
+    subparsers = parser.add_subparsers(dest="command", metavar="COMMAND")
+    helps = {
+        "collect": "scrape the sources (all of them, or only SOURCE)",
+        "clean": "clean and merge the collected files",
+        "regress": "estimate the cross-sectional and panel regressions",
+        "plot": "draw the plots",
+        "all": "run every stage (the default)",
+    }
+    for command, help_text in helps.items():
+        subparser = subparsers.add_parser(command, help=help_text, description=help_text.capitalize() + ".")
+        if command == "collect":
+            subparser.add_argument("source", nargs="?", choices=list(COLLECTORS),
+                                   help="collector to run (default: all of them)")
+        if command in ("collect", "all"):
+            add_collect_options(subparser)
+        if command in ("collect", "clean", "all"):
+            subparser.add_argument("--year", type=int, default=None,
+                                   help="snapshot year of the US News data; collect defaults to the current edition "
+                                        "and clean to the latest partition collected")
+        if command in ("clean", "all"):
+            add_clean_options(subparser)
+        if command in ("regress", "all"):
+            add_regress_options(subparser)
+        add_run_options(subparser, command)
+    return parser.parse_args(argv)
 
-    print("\nData cleaning and processing completed successfully.\n")
-    print("\nStep 6: Running regression and generating visual analysis...")
-    run_regressions()
-    generate_all_plots()
-    print("\nAnalysis completed successfully.")
 
 if __name__ == "__main__":
-    main()
+    options = vars(parse_args())
+    setup_logging(options.pop("log_level"))
+    configure_session(pool_size=options.pop("pool_size", 10), max_retries=options.pop("max_retries", 3))
+    for host, limit in options.pop("host_concurrency", []):
+        configure_host(host, max_concurrency=limit)
+    sys.exit(main(**options))
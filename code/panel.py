@@ -0,0 +1,199 @@
+import argparse
+import hashlib
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+from scipy import stats
+
+from dataset_io import RANK_YEARS, load_merged_dataset
+from instrumentation import setup_logging
+
+logger = logging.getLogger(__name__)
+
+
+# Long-format cache of the yearly ranks, rebuilt whenever the merged dataset changes
+PANEL_CACHE = "artifacts/panel_long.feather"
+
+# Columns carried from the merged dataset into every school-year row
+PANEL_ID_COLUMNS = ["school_name", "state", "tuition", "sat_score", "median_earnings"]
+
+# Models estimated by run_panel_regressions: rank persistence with school and year fixed effects
+PANEL_MODELS = [
+    {"name": "Rank persistence, school and year FE", "y": "rank", "x": ["rank_lag"],
+     "fixed_effects": ["school_name", "year"], "cluster": "school_name"},
+]
+
+
+def to_long(df):
+    """
+    Reshape the yearly rank columns (ht2018..ht2025) to one row per school and year.
+
+    Returns:
+        pd.DataFrame: PANEL_ID_COLUMNS plus "year" (int16), "rank" and "rank_lag" (the school's
+                      rank in the previous year) as floats; years without a rank are dropped.
+    """
+    ids = [column for column in PANEL_ID_COLUMNS if column in df.columns]
+    long_df = df[ids + RANK_YEARS].melt(id_vars=ids, value_vars=RANK_YEARS, var_name="year", value_name="rank")
+    long_df["year"] = long_df["year"].str.removeprefix("ht").astype("int16")
+    long_df["rank"] = long_df["rank"].astype("float64")
+    long_df = long_df.sort_values(["school_name", "year"], kind="stable").reset_index(drop=True)
+    previous = long_df.groupby("school_name", observed=True)[["year", "rank"]].shift()
+    long_df["rank_lag"] = previous["rank"].where(previous["year"] == long_df["year"] - 1)
+    return long_df.dropna(subset=["rank"]).reset_index(drop=True)
+
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_panel(data_path="artifacts/cleaned_merged_dataset.feather", cache_path=PANEL_CACHE):
+    """
+    Load the long-format panel, reshaping the merged dataset only when it has changed.
+
+    The reshaped panel is saved as Feather with the hash of the merged dataset in its schema
+    metadata; later calls read the cache as long as that hash still matches.
+    """
+    source_hash = _file_digest(data_path)
+    if os.path.exists(cache_path):
+        table = feather.read_table(cache_path)
+        if (table.schema.metadata or {}).get(b"source_sha256", b"").decode() == source_hash:
+            return table.to_pandas()
+
+    long_df = to_long(load_merged_dataset(data_path))
+    table = pa.Table.from_pandas(long_df, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), b"source_sha256": source_hash.encode()})
+    os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+    feather.write_feather(table, cache_path, compression="uncompressed")
+    return long_df
+
+
+def demean(values, groups, tol=1e-10, max_iter=1000):
+    """
+    Within-transform columns by sweeping out the means of one or more group factors.
+
+    With a single factor one sweep is exact. With several (e.g. school and year on an unbalanced
+    panel) the sweeps are repeated until the columns stop changing (alternating projections).
+    Each sweep is a bincount per column, so memory stays linear in the number of rows.
+
+    Args:
+        values (np.ndarray): n x k float array.
+        groups (list): One integer code array (0..G-1) of length n per factor.
+
+    Returns:
+        np.ndarray: The demeaned n x k array.
+    """
+    values = np.array(values, dtype=float)
+    counts = [np.bincount(codes) for codes in groups]
+    for _ in range(max_iter):
+        previous = values.copy()
+        for codes, count in zip(groups, counts):
+            for j in range(values.shape[1]):
+                values[:, j] -= (np.bincount(codes, weights=values[:, j], minlength=len(count)) / count)[codes]
+        if len(groups) == 1 or np.max(np.abs(values - previous)) < tol:
+            break
+    return values
+
+
+def fit_fixed_effects(panel, y, x, fixed_effects=("school_name", "year"), cluster=None, alpha=0.05):
+    """
+    Estimate a linear model with absorbed fixed effects by the within transformation.
+
+    Standard errors use the degrees of freedom of the equivalent dummy-variable regression, and
+    clustered errors the same small-sample correction as statsmodels, so the results match
+    smf.ols with C() dummies for every fixed effect (for a connected panel).
+
+    Args:
+        panel (pd.DataFrame): Long-format data.
+        y (str): Outcome column.
+        x (list): Regressor columns.
+        fixed_effects (sequence): Columns whose levels are absorbed.
+        cluster (str, optional): Column to cluster standard errors on.
+        alpha (float): Significance level for the confidence intervals.
+
+    Returns:
+        pd.DataFrame: coef, std err, t or z, P>|t| or P>|z| and the confidence interval per
+                      regressor, plus nobs and within R-squared.
+    """
+    data = panel.dropna(subset=[y, *x, *fixed_effects, *([cluster] if cluster else [])])
+    groups = [pd.factorize(data[column])[0] for column in fixed_effects]
+    within = demean(data[[y, *x]].to_numpy(dtype=float), groups)
+    y_within, X_within = within[:, 0], within[:, 1:]
+
+    n, k = X_within.shape
+    # Levels absorbed by the fixed effects; each factor after the first repeats the constant
+    absorbed = sum(codes.max() + 1 for codes in groups) - (len(groups) - 1)
+    params, *_ = np.linalg.lstsq(X_within, y_within, rcond=None)
+    resid = y_within - X_within @ params
+    xtx_inv = np.linalg.inv(X_within.T @ X_within)
+    df_resid = n - k - absorbed
+
+    if cluster:
+        codes = pd.factorize(data[cluster])[0]
+        n_clusters = codes.max() + 1
+        scores = np.zeros((n_clusters, k))
+        np.add.at(scores, codes, X_within * resid[:, None])
+        scale = n_clusters / (n_clusters - 1) * (n - 1) / df_resid
+        cov = scale * xtx_inv @ (scores.T @ scores) @ xtx_inv
+        stat, dist = "z", stats.norm
+    else:
+        cov = (resid @ resid / df_resid) * xtx_inv
+        stat, dist = "t", stats.t(df_resid)
+
+    bse = np.sqrt(np.diag(cov))
+    tvalues = params / bse
+    critical = dist.ppf(1 - alpha / 2)
+    return pd.DataFrame({
+        "coef": params,
+        "std err": bse,
+        stat: tvalues,
+        f"P>|{stat}|": 2 * dist.sf(np.abs(tvalues)),
+        f"[{alpha / 2:g}": params - critical * bse,
+        f"{1 - alpha / 2:g}]": params + critical * bse,
+        "nobs": n,
+        "Within R-squared": 1 - resid @ resid / (y_within @ y_within),
+    }, index=pd.Index(x, name="term"))
+
+
+def run_panel_regressions(data_path="artifacts/cleaned_merged_dataset.feather",
+                          output_path="artifacts/panel_regression.csv", models=PANEL_MODELS, cache_path=PANEL_CACHE):
+    """
+    Estimate the fixed-effects models in `models` on the yearly rank panel and save them to a CSV.
+
+    Args:
+        data_path (str): Merged dataset (.feather).
+        output_path (str): Results CSV, one row per model and regressor.
+        models (list): Dicts with "name", "y", "x", "fixed_effects" and optionally "cluster".
+        cache_path (str): Long-format panel cache, see load_panel.
+    """
+    panel = load_panel(data_path, cache_path)
+    tables = []
+    for model in models:
+        table = fit_fixed_effects(panel, model["y"], model["x"], model["fixed_effects"], model.get("cluster"))
+        table["Model"] = model["name"]
+        table["Fixed effects"] = " + ".join(model["fixed_effects"])
+        tables.append(table)
+    results = pd.concat(tables)
+    results.to_csv(output_path)
+    logger.info(f"Saved {len(models)} panel model(s) to {output_path}")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Estimate fixed-effects models on the yearly rank panel.")
+    parser.add_argument("--data", default="artifacts/cleaned_merged_dataset.feather")
+    parser.add_argument("--output", default="artifacts/panel_regression.csv")
+    args = parser.parse_args(argv)
+    setup_logging()
+    print(run_panel_regressions(args.data, args.output).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import re
+from pathlib import Path
+
+
+# File holding one year/category partition of a store
+PARTITION_FILE = "schools.csv"
+PARTITION_DIR = re.compile(r"year=(\d+)/category=([\w-]+)$")
+
+
+def partition_path(store, year, category):
+    """Path of the year/category partition of a store, e.g. usnews/year=2026/category=national-universities/schools.csv."""
+    return Path(store) / f"year={year}" / f"category={category}" / PARTITION_FILE
+
+
+def list_partitions(store):
+    """(year, category) of every partition in a store that holds data, sorted."""
+    partitions = []
+    for path in Path(store).glob(f"year=*/category=*/{PARTITION_FILE}"):
+        match = PARTITION_DIR.search(path.parent.relative_to(store).as_posix())
+        if match:
+            partitions.append((int(match.group(1)), match.group(2)))
+    return sorted(partitions)
+
+
+def latest_partition(store, category):
+    """Path of the most recent partition of `category` in a store, or None if the store has none."""
+    years = [year for year, stored in list_partitions(store) if stored == category]
+    return partition_path(store, max(years), category) if years else None
+
+
+def read_partitions(store, years=None, categories=None, **read_csv_kwargs):
+    """
+    Read the partitions of a store that match `years` and `categories` into one DataFrame.
+
+    Only the matching files are opened, so the cost does not grow with the number of snapshots
+    kept in the store. "year" and "category" columns are added from the partition directories.
+
+    Args:
+        store (str or Path): Store directory.
+        years, categories (iterable, optional): Partitions to read; None reads every value.
+        **read_csv_kwargs: Passed to pd.read_csv.
+    """
+    import pandas as pd
+
+    frames = []
+    for year, category in list_partitions(store):
+        if (years is None or year in years) and (categories is None or category in categories):
+            df = pd.read_csv(partition_path(store, year, category), **read_csv_kwargs)
+            frames.append(df.assign(year=year, category=category))
+    if not frames:
+        raise FileNotFoundError(f"No partitions for years={years}, categories={categories} in {store}")
+    return pd.concat(frames, ignore_index=True)
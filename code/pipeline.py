@@ -0,0 +1,203 @@
+import dataclasses
+import hashlib
+import importlib.util
+import inspect
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from instrumentation import measure
+
+
+STATE_FILE = "artifacts/.pipeline_state.json"
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Stage:
+    """
+    One step of the pipeline.
+
+    Attributes:
+        name (str): Stage name, also used by --force.
+        func (callable): Called as func(**params). A stage fails if it raises.
+        inputs (list): Files the stage reads. Their contents are part of the fingerprint.
+        outputs (list): Files the stage writes. A missing output always triggers a re-run.
+        deps (list): Names of stages that must finish first.
+        params (dict): Keyword arguments passed to func; part of the fingerprint.
+        code (list): Extra modules whose source is part of the fingerprint, on top of func's own module.
+                     Modules can be given by name, so that stages which import them lazily can be
+                     fingerprinted without importing them.
+        max_age (float, optional): Re-run once the outputs are older than this many seconds, even if
+                                   nothing else changed. Used for stages that read remote data.
+        force_param (str, optional): Keyword argument passed to func as True when the stage is forced,
+                                     so that it also bypasses its own caches. Not part of the fingerprint.
+    """
+    name: str
+    func: callable
+    inputs: list = field(default_factory=list)
+    outputs: list = field(default_factory=list)
+    deps: list = field(default_factory=list)
+    params: dict = field(default_factory=dict)
+    code: list = field(default_factory=list)
+    max_age: float = None
+    force_param: str = None
+
+
+def _hash_file(path, digest):
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+
+
+def fingerprint(stage):
+    """Hash a stage's input files, parameters and source code into a single hex digest."""
+    digest = hashlib.sha256()
+    for path in sorted(stage.inputs):
+        digest.update(path.encode("utf-8"))
+        if os.path.exists(path):
+            _hash_file(path, digest)
+    digest.update(json.dumps(stage.params, sort_keys=True, default=str).encode("utf-8"))
+    code_files = {inspect.getsourcefile(stage.func)}
+    for module in stage.code:
+        code_files.add(importlib.util.find_spec(module).origin if isinstance(module, str)
+                       else inspect.getsourcefile(module))
+    for path in sorted(code_files):
+        _hash_file(path, digest)
+    return digest.hexdigest()
+
+
+def load_state(state_file=STATE_FILE):
+    try:
+        with open(state_file, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state, state_file=STATE_FILE):
+    os.makedirs(os.path.dirname(state_file) or ".", exist_ok=True)
+    with open(state_file, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+
+
+def downstream(stages, names):
+    """Return the given stage names plus every stage that depends on them, directly or not."""
+    selected = set(names)
+    changed = True
+    while changed:
+        changed = False
+        for stage in stages:
+            if stage.name not in selected and selected.intersection(stage.deps):
+                selected.add(stage.name)
+                changed = True
+    return selected
+
+
+def select_stages(stages, names):
+    """
+    Return the named stages only, for running part of the graph.
+
+    Dependencies on stages left out are dropped, so a selected stage reads whatever its upstream
+    stages last wrote instead of waiting for them.
+    """
+    unknown = set(names) - {stage.name for stage in stages}
+    if unknown:
+        raise ValueError(f"Unknown stage(s): {', '.join(sorted(unknown))}")
+    return [dataclasses.replace(stage, deps=[dep for dep in stage.deps if dep in names])
+            for stage in stages if stage.name in names]
+
+
+def _waves(stages):
+    """Group stages into waves in dependency order; stages within a wave are independent."""
+    remaining = {stage.name: stage for stage in stages}
+    done = set()
+    waves = []
+    while remaining:
+        wave = [stage for stage in remaining.values() if set(stage.deps) <= done]
+        if not wave:
+            raise ValueError(f"Pipeline has a dependency cycle among: {', '.join(remaining)}")
+        waves.append(wave)
+        for stage in wave:
+            done.add(stage.name)
+            del remaining[stage.name]
+    return waves
+
+
+def _is_up_to_date(stage, stored, digest):
+    if stored is None or stored.get("fingerprint") != digest:
+        return False
+    if not all(os.path.exists(path) for path in stage.outputs):
+        return False
+    if stage.max_age is not None and time.time() - stored.get("finished_at", 0) > stage.max_age:
+        return False
+    return True
+
+
+def run_pipeline(stages, force=(), state_file=STATE_FILE):
+    """
+    Run the stage graph, skipping stages whose fingerprint matches the last successful run.
+
+    Stages run wave by wave in dependency order, and the stages of one wave run concurrently.
+    When a stage fails, every stage downstream of it is skipped.
+
+    Args:
+        stages (list): Stage objects making up the graph.
+        force (iterable): Stage names to re-run regardless of their fingerprint, together with
+                          everything downstream of them.
+        state_file (str): JSON file holding the fingerprint of each stage's last successful run.
+
+    Returns:
+        dict: Stage name -> "ran", "skipped (up to date)", "skipped (upstream failed)" or "failed: <error>".
+    """
+    unknown = set(force) - {stage.name for stage in stages}
+    if unknown:
+        raise ValueError(f"Unknown stage(s): {', '.join(sorted(unknown))}")
+    forced = downstream(stages, force)
+    state = load_state(state_file)
+    status = {}
+
+    def run_stage(stage):
+        start = time.perf_counter()
+        try:
+            with measure("stages", stage.name):
+                forced_kwargs = {stage.force_param: True} if stage.force_param and stage.name in forced else {}
+                stage.func(**stage.params, **forced_kwargs)
+        except Exception as e:
+            return f"failed: {type(e).__name__}: {e}", time.perf_counter() - start
+        return "ran", time.perf_counter() - start
+
+    for wave in _waves(stages):
+        to_run = []
+        for stage in wave:
+            if any(not status[dep].startswith(("ran", "skipped (up to date)")) for dep in stage.deps):
+                status[stage.name] = "skipped (upstream failed)"
+                continue
+            digest = fingerprint(stage)
+            if stage.name not in forced and _is_up_to_date(stage, state.get(stage.name), digest):
+                status[stage.name] = "skipped (up to date)"
+                logger.info(f"Stage '{stage.name}' is up to date, skipping.")
+                continue
+            to_run.append(stage)
+
+        if not to_run:
+            continue
+        logger.info(f"Running stage(s): {', '.join(stage.name for stage in to_run)}")
+        with ThreadPoolExecutor(max_workers=len(to_run)) as pool:
+            outcomes = list(pool.map(run_stage, to_run))
+
+        for stage, (outcome, seconds) in zip(to_run, outcomes):
+            status[stage.name] = outcome
+            (logger.info if outcome == "ran" else logger.error)(f"Stage '{stage.name}' {outcome} in {seconds:.2f}s")
+            if outcome == "ran":
+                # Fingerprint after the run so the stored inputs are the ones actually used
+                state[stage.name] = {"fingerprint": fingerprint(stage), "finished_at": time.time()}
+            else:
+                state.pop(stage.name, None)
+        save_state(state, state_file)
+
+    return status
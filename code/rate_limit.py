@@ -0,0 +1,214 @@
+import logging
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+
+# Statuses that mean "slow down": the request is retried after the host's limiter backs off
+THROTTLE_STATUSES = (429, 503)
+
+# Limiter settings per host; hosts not listed use DEFAULT_LIMITS
+DEFAULT_LIMITS = {
+    "rate": 10.0,
+    "burst": 4,
+    "max_concurrency": 4,
+    "min_rate": 0.2,
+    "max_rate": 100.0,
+    "slow_start": 0.25,
+    "increase": 1.0,
+    "decrease": 0.5,
+    "max_retries": 8,
+}
+HOST_LIMITS = {
+    "www.usnews.com": {"max_concurrency": 8},
+}
+
+logger = logging.getLogger(__name__)
+
+
+class HostLimiter:
+    """
+    Token bucket with a concurrency cap and an adaptive rate for one host.
+
+    Tokens are refilled at `rate` requests per second up to `burst`, and at most max_concurrency
+    requests are in flight at once. The rate adapts to the host's answers the way TCP adapts its
+    window: every healthy response raises it, by a factor of (1 + slow_start) until the host has
+    throttled once, and afterwards by increase / rate, which adds about `increase` requests per
+    second for every second of healthy traffic. A 429/503 multiplies it by `decrease` and pauses
+    the host for the Retry-After delay (or one token interval); further throttled answers to
+    requests sent before that pause ended do not cut the rate again.
+    """
+
+    def __init__(self, rate, burst, max_concurrency, min_rate, max_rate, slow_start, increase, decrease,
+                 max_retries):
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.slow_start = slow_start
+        self.increase = increase
+        self.decrease = decrease
+        self.max_retries = max_retries
+
+        self.tokens = float(burst)
+        self.refilled_at = time.monotonic()
+        self.paused_until = 0.0
+        self.active = 0
+        self.throttled_once = False
+        self.stats = {"requests": 0, "throttled": 0, "waited_s": 0.0, "first_at": None, "last_at": None}
+        self._cond = threading.Condition()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.refilled_at) * self.rate)
+        self.refilled_at = now
+
+    def acquire(self):
+        """Block until the host may receive another request, then take a token and a slot."""
+        start = time.monotonic()
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                elif self.active >= self.max_concurrency:
+                    wait = None
+                elif self.tokens < 1:
+                    wait = (1 - self.tokens) / self.rate
+                else:
+                    break
+                self._cond.wait(wait)
+            self.tokens -= 1
+            self.active += 1
+            self.stats["requests"] += 1
+            self.stats["waited_s"] += now - start
+            self.stats["first_at"] = self.stats["first_at"] or now
+            self.stats["last_at"] = now
+
+    def release(self, status=None, retry_after=None):
+        """
+        Free the request's slot and adapt the rate to its outcome.
+
+        Args:
+            status (int, optional): Response status; None when the request raised.
+            retry_after (float, optional): Seconds the host asked to wait, for throttled responses.
+        """
+        with self._cond:
+            self.active -= 1
+            if status in THROTTLE_STATUSES:
+                now = time.monotonic()
+                self.throttled_once = True
+                self.stats["throttled"] += 1
+                if now >= self.paused_until:
+                    self.rate = max(self.min_rate, self.rate * self.decrease)
+                self.tokens = min(self.tokens, 0.0)
+                pause = retry_after if retry_after is not None else 1 / self.rate
+                self.paused_until = max(self.paused_until, now + pause)
+            elif status is not None and status < 400:
+                step = self.increase / max(self.rate, 1) if self.throttled_once else self.rate * self.slow_start
+                self.rate = min(self.max_rate, self.rate + step)
+            self._cond.notify_all()
+
+    def snapshot(self):
+        """Counters and the current rate; effective_rps is requests over the span they were sent in."""
+        with self._cond:
+            stats = dict(self.stats)
+            rate = self.rate
+        span = (stats.pop("last_at") or 0) - (stats.pop("first_at") or 0)
+        return {**stats, "rate": rate, "max_concurrency": self.max_concurrency,
+                "effective_rps": stats["requests"] / span if span > 0 else None}
+
+
+_lock = threading.Lock()
+_limiters = {}
+
+
+def configure_host(host, **settings):
+    """
+    Override limiter settings (see DEFAULT_LIMITS) for a host, e.g. configure_host("www.usnews.com",
+    max_concurrency=4). Takes effect for requests made after the call.
+    """
+    unknown = set(settings) - set(DEFAULT_LIMITS)
+    if unknown:
+        raise ValueError(f"Unknown limiter settings: {', '.join(sorted(unknown))}")
+    with _lock:
+        HOST_LIMITS[host] = {**HOST_LIMITS.get(host, {}), **settings}
+        _limiters.pop(host, None)
+
+
+def reset_limiters():
+    """Forget every host's adapted rate and counters."""
+    with _lock:
+        _limiters.clear()
+
+
+def get_limiter(host):
+    with _lock:
+        if host not in _limiters:
+            _limiters[host] = HostLimiter(**{**DEFAULT_LIMITS, **HOST_LIMITS.get(host, {})})
+        return _limiters[host]
+
+
+def retry_after_seconds(response):
+    """Seconds from a Retry-After header (delay or HTTP date), or None when absent or unreadable."""
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def scheduled_request(host, send):
+    """
+    Send a request through the host's limiter, retrying throttled responses.
+
+    Args:
+        host (str): Host the request goes to.
+        send (callable): Sends the request and returns a requests.Response.
+
+    Returns:
+        requests.Response: The first response that is not a 429/503, or the last one once the
+                           host's max_retries are used up.
+    """
+    limiter = get_limiter(host)
+    for attempt in range(limiter.max_retries + 1):
+        limiter.acquire()
+        try:
+            response = send()
+        except BaseException:
+            limiter.release()
+            raise
+        if response.status_code not in THROTTLE_STATUSES:
+            limiter.release(response.status_code)
+            return response
+        retry_after = retry_after_seconds(response)
+        limiter.release(response.status_code, retry_after)
+        logger.debug(f"{host} answered {response.status_code}; retry {attempt + 1} "
+                     f"after {retry_after if retry_after is not None else 'backoff'}s")
+    return response
+
+
+def throttle_stats():
+    """Per-host requests, throttle events, time spent waiting, and current and effective rates."""
+    with _lock:
+        limiters = dict(_limiters)
+    return {host: limiter.snapshot() for host, limiter in sorted(limiters.items())}
+
+
+def report_throttle_stats():
+    """Log the per-host scheduler counters collected during this run."""
+    stats = throttle_stats()
+    if not stats:
+        return
+    lines = [f"  {host:<34} {s['requests']:5d} requests, {s['throttled']:3d} throttled, "
+             f"waited {s['waited_s']:6.2f}s, rate now {s['rate']:6.1f}/s, effective "
+             + (f"{s['effective_rps']:.1f}/s" if s["effective_rps"] is not None else "-")
+             for host, s in stats.items()]
+    logger.info("Request scheduler summary:\n" + "\n".join(lines))
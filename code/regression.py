@@ -0,0 +1,218 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import patsy
+import statsmodels.api as sm
+
+
+# Six-point weight distribution of Webb (2014), for wild bootstraps with few clusters
+WEBB_WEIGHTS = np.array([-np.sqrt(1.5), -1.0, -np.sqrt(0.5), np.sqrt(0.5), 1.0, np.sqrt(1.5)])
+
+
+def design_matrices(formulas, df):
+    """
+    Build the (y, X) design matrices for every formula from one shared DataFrame.
+
+    Rows with a missing value in a formula's variables are dropped from that formula's matrices,
+    as smf.ols would do.
+
+    Returns:
+        list: (y, X) DataFrame pairs, indexed like df, in the order of `formulas`.
+    """
+    return [patsy.dmatrices(formula, df, return_type="dataframe") for formula in formulas]
+
+
+def coefficient_table(results, alpha=0.05):
+    """
+    Tidy coefficient table straight from fitted statsmodels results, at full precision.
+
+    Columns follow statsmodels' summary: coef, std err, z or t, P>|z| or P>|t|, and the
+    confidence interval bounds.
+    """
+    stat = "t" if results.use_t else "z"
+    conf_int = results.conf_int(alpha=alpha)
+    return pd.DataFrame({
+        "coef": results.params,
+        "std err": results.bse,
+        stat: results.tvalues,
+        f"P>|{stat}|": results.pvalues,
+        f"[{alpha / 2:g}": conf_int[0],
+        f"{1 - alpha / 2:g}]": conf_int[1],
+    })
+
+
+def fit_ols(y, X, groups=None):
+    """
+    Fit OLS on prepared design matrices.
+
+    Args:
+        y, X: Design matrices from design_matrices.
+        groups (array-like, optional): Cluster labels aligned with X's rows, without missing
+                                       values. Standard errors are clustered on them when given.
+
+    Returns:
+        statsmodels RegressionResults.
+    """
+    if groups is None:
+        return sm.OLS(y, X).fit()
+    return sm.OLS(y, X).fit(cov_type="cluster", cov_kwds={"groups": pd.factorize(groups)[0]})
+
+
+def draw_weights(rng, n_clusters, reps, kind="rademacher"):
+    """Draw wild bootstrap weights, one column per replication: Rademacher (+/-1) or Webb six-point."""
+    if kind == "rademacher":
+        return rng.choice([-1.0, 1.0], size=(n_clusters, reps))
+    if kind == "webb":
+        return rng.choice(WEBB_WEIGHTS, size=(n_clusters, reps))
+    raise ValueError(f"unknown bootstrap weights: {kind}")
+
+
+def _bootstrap_t(X, codes, residuals, seed, reps, kind):
+    """
+    Wild cluster bootstrap t statistics for a block of replications, without refitting.
+
+    Every replication perturbs one residual vector by cluster weights, y* = X b + u * w_g, so its
+    estimate is b + (X'X)^-1 X'(u * w) and its clustered variance only depends on per-cluster
+    scores. Both are computed for all replications at once from per-cluster sums.
+
+    Args:
+        X (np.ndarray): Design matrix, n x k.
+        codes (np.ndarray): Cluster code (0..G-1) of each row.
+        residuals (np.ndarray): m x n; each row is the residual vector of one bootstrap DGP.
+        seed: Seed for this block's weights.
+        reps (int): Replications in this block.
+        kind (str): "rademacher" or "webb".
+
+    Returns:
+        np.ndarray: m x k x reps bootstrap t statistics, centered on the DGP's estimates.
+    """
+    n, k = X.shape
+    n_clusters = codes.max() + 1
+    weights = draw_weights(np.random.default_rng(seed), n_clusters, reps, kind)
+    xtx_inv = np.linalg.inv(X.T @ X)
+    # Per-cluster X_g'X_g, premultiplied by (X'X)^-1
+    gram = np.zeros((n_clusters, k, k))
+    np.add.at(gram, codes, X[:, :, None] * X[:, None, :])
+    gram = np.einsum("ij,gjl->gil", xtx_inv, gram)
+    # Small-sample correction used by statsmodels' cluster covariance
+    scale = n_clusters / (n_clusters - 1) * (n - 1) / (n - k)
+
+    t_stats = np.empty((len(residuals), k, reps))
+    for i, u in enumerate(residuals):
+        scores = np.zeros((n_clusters, k))
+        np.add.at(scores, codes, X * u[:, None])
+        scores = scores @ xtx_inv
+        delta = scores.T @ weights
+        # Scores of the bootstrap residuals u * w - X delta, cluster by cluster, times (X'X)^-1
+        cluster_scores = scores[:, :, None] * weights[:, None, :] - np.einsum("gij,jb->gib", gram, delta)
+        t_stats[i] = delta / np.sqrt(scale * (cluster_scores ** 2).sum(axis=0))
+    return t_stats
+
+
+def wild_cluster_bootstrap(results, groups, reps=9999, weights="rademacher", alpha=0.05, seed=0,
+                           max_workers=None, block_size=2500):
+    """
+    Wild cluster bootstrap p-values and confidence intervals for every coefficient of an OLS fit.
+
+    P-values come from the restricted bootstrap (WCR): for each coefficient the data are
+    regenerated with that coefficient set to zero and the observed |t| is compared with the
+    bootstrap |t| distribution. Confidence intervals come from the unrestricted bootstrap (WCU)
+    as symmetric percentile-t intervals around the estimate. Replications are split into blocks
+    that run across a process pool when there is more than one.
+
+    Args:
+        results: statsmodels results from fit_ols with clustered standard errors.
+        groups (array-like): The cluster labels the model was fitted with.
+        reps (int): Bootstrap replications.
+        weights (str): "rademacher" or "webb" (better when there are very few clusters).
+        alpha (float): Significance level for the confidence intervals.
+        seed (int): Seed of the weight draws; results are reproducible for a given seed and block_size.
+        max_workers (int, optional): Worker processes. Defaults to the number of CPUs.
+        block_size (int): Replications per block.
+
+    Returns:
+        pd.DataFrame: "Boot P>|t|", "Boot [alpha/2" and "Boot 1-alpha/2]" indexed by term.
+    """
+    X = np.asarray(results.model.exog, dtype=float)
+    y = np.asarray(results.model.endog, dtype=float)
+    codes = pd.factorize(np.asarray(groups))[0]
+    k = X.shape[1]
+
+    # Row 0 drives the unrestricted bootstrap, row 1 + j the one with coefficient j restricted to zero
+    residuals = [y - X @ results.params.to_numpy()]
+    for j in range(k):
+        X_restricted = np.delete(X, j, axis=1)
+        residuals.append(y - X_restricted @ np.linalg.lstsq(X_restricted, y, rcond=None)[0])
+    residuals = np.vstack(residuals)
+
+    blocks = [min(block_size, reps - start) for start in range(0, reps, block_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(blocks))
+    args = ([X] * len(blocks), [codes] * len(blocks), [residuals] * len(blocks), seeds, blocks,
+            [weights] * len(blocks))
+    if len(blocks) == 1 or max_workers == 1:
+        t_stats = list(map(_bootstrap_t, *args))
+    else:
+        # The regress stage runs on a pipeline thread next to the other stages, so workers come from
+        # a forkserver rather than a fork of this multi-threaded, possibly memory-traced process
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload([__name__])
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as pool:
+            t_stats = list(pool.map(_bootstrap_t, *args))
+    t_stats = np.abs(np.concatenate(t_stats, axis=2))
+
+    observed = np.abs(results.tvalues.to_numpy())
+    p_values = np.array([(t_stats[1 + j, j] >= observed[j]).mean() for j in range(k)])
+    critical = np.quantile(t_stats[0], 1 - alpha, axis=1)
+    bse = results.bse.to_numpy()
+    return pd.DataFrame({
+        "Boot P>|t|": p_values,
+        f"Boot [{alpha / 2:g}": results.params.to_numpy() - critical * bse,
+        f"Boot {1 - alpha / 2:g}]": results.params.to_numpy() + critical * bse,
+    }, index=results.params.index)
+
+
+def fit_models(df, models, cluster=None, alpha=0.05, bootstrap_reps=0, bootstrap_weights="rademacher",
+               seed=0, max_workers=None):
+    """
+    Fit several OLS models over one data load and stack their coefficient tables.
+
+    Coefficients, standard errors, test statistics, p-values and confidence intervals are taken
+    from the fitted results as floats, so nothing is rounded the way the printed summary is.
+
+    Args:
+        df (pd.DataFrame): Data for all models. Drop missing values beforehand to estimate every
+                           model on the same sample.
+        models (list): Dicts with "formula", "name" (written to the Model column) and "type"
+                       (written to the Model_Type column).
+        cluster (str, optional): Column to cluster standard errors on. Defaults to the
+                                 classical OLS standard errors.
+        alpha (float): Significance level for the confidence intervals.
+        bootstrap_reps (int): With a cluster column, add wild cluster bootstrap p-values and
+                              confidence intervals from this many replications (0 to skip).
+        bootstrap_weights (str): "rademacher" or "webb".
+        seed (int): Seed of the bootstrap weights.
+        max_workers (int, optional): Worker processes for the bootstrap.
+
+    Returns:
+        pd.DataFrame: One row per model term, indexed by term name, with the coefficient table
+                      columns (and the bootstrap columns) plus Model, R-squared, Adj. R-squared and Model_Type.
+    """
+    if cluster:
+        df = df.dropna(subset=[cluster])
+
+    tables = []
+    for model, (y, X) in zip(models, design_matrices([model["formula"] for model in models], df)):
+        groups = df.loc[X.index, cluster] if cluster else None
+        results = fit_ols(y, X, groups)
+        table = coefficient_table(results, alpha)
+        if cluster and bootstrap_reps:
+            table = table.join(wild_cluster_bootstrap(results, groups, bootstrap_reps, bootstrap_weights,
+                                                      alpha, seed, max_workers))
+        table["Model"] = model["name"]
+        table["R-squared"] = results.rsquared
+        table["Adj. R-squared"] = results.rsquared_adj
+        table["Model_Type"] = model["type"]
+        tables.append(table)
+    return pd.concat(tables, axis=0)
@@ -0,0 +1,173 @@
+import argparse
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import combinations
+
+import pandas as pd
+
+from dataset_io import RANK_YEARS, load_merged_dataset
+from instrumentation import setup_logging
+from regression import coefficient_table, design_matrices, fit_ols
+
+logger = logging.getLogger(__name__)
+
+
+# Default specification grid: every combination of up to three regressors, with and without
+# their pairwise interactions, each fitted with classical and state-clustered standard errors
+DEFAULT_GRID = {
+    "outcome": "median_earnings",
+    "regressors": RANK_YEARS + ["avgtk", "sat_score", "tuition", "sort_rank"],
+    "min_regressors": 1,
+    "max_regressors": 3,
+    "interactions": True,
+    "cluster": [None, "state"],
+}
+
+# Columns of the coefficient table that depend on the test used (t or z), renamed so that
+# classical and clustered specifications share one table
+STAT_COLUMNS = {"t": "statistic", "z": "statistic", "P>|t|": "p-value", "P>|z|": "p-value"}
+
+# Set in each worker process by _init_worker
+_samples = None
+
+
+def load_grid(path=None):
+    """Read a JSON grid config; keys it leaves out take their DEFAULT_GRID values."""
+    grid = dict(DEFAULT_GRID)
+    if path:
+        with open(path, encoding="utf-8") as f:
+            grid.update(json.load(f))
+    return grid
+
+
+def enumerate_specs(grid):
+    """
+    Expand a grid config into a list of specifications.
+
+    Each combination of min_regressors..max_regressors regressors gives a main-effects model
+    and, when interactions is true and the combination has two or more regressors, a model with
+    all their pairwise interactions added. Each model is repeated for every entry of cluster
+    (None for classical standard errors).
+
+    Returns:
+        list: Dicts with "spec_id", "formula" and "cluster".
+    """
+    specs = []
+    for size in range(grid["min_regressors"], grid["max_regressors"] + 1):
+        for combo in combinations(grid["regressors"], size):
+            variants = [list(combo)]
+            if grid["interactions"] and size > 1:
+                variants.append(list(combo) + [f"{a}:{b}" for a, b in combinations(combo, 2)])
+            for terms in variants:
+                for cluster in grid["cluster"]:
+                    specs.append({"spec_id": len(specs), "formula": f"{grid['outcome']} ~ {' + '.join(terms)}",
+                                  "cluster": cluster})
+    return specs
+
+
+def _init_worker(data_path, columns, clusters):
+    """Load the dataset once per worker and keep one read-only sample per cluster setting."""
+    global _samples
+    df = load_merged_dataset(data_path).astype({column: "float64" for column in columns})
+    _samples = {cluster: df.dropna(subset=[cluster]) if cluster else df for cluster in clusters}
+
+
+def _fit_specs(specs):
+    """Fit a batch of specifications in a worker; returns (tidy table, list of (spec, error))."""
+    tables, errors = [], []
+    for spec in specs:
+        start = time.perf_counter()
+        try:
+            df = _samples[spec["cluster"]]
+            (y, X), = design_matrices([spec["formula"]], df)
+            results = fit_ols(y, X, df.loc[X.index, spec["cluster"]] if spec["cluster"] else None)
+            table = coefficient_table(results)
+        except Exception as e:
+            errors.append((spec, f"{type(e).__name__}: {e}"))
+            continue
+        table["statistic_type"] = "t" if results.use_t else "z"
+        table = table.rename(columns=STAT_COLUMNS).rename_axis("term").reset_index()
+        table.insert(0, "spec_id", spec["spec_id"])
+        table.insert(1, "formula", spec["formula"])
+        table.insert(2, "cluster", spec["cluster"] or "")
+        table["nobs"] = int(results.nobs)
+        table["R-squared"] = results.rsquared
+        table["Adj. R-squared"] = results.rsquared_adj
+        table["seconds"] = time.perf_counter() - start
+        tables.append(table)
+    return (pd.concat(tables, ignore_index=True) if tables else None), errors
+
+
+def run_spec_grid(grid=None, data_path="artifacts/cleaned_merged_dataset.feather",
+                  output_path="artifacts/spec_grid.csv", max_workers=None, batch_size=8):
+    """
+    Fit every specification of a grid across a process pool and stream the results to one CSV.
+
+    Each worker loads the dataset once in its initializer and then only receives batches of
+    specifications. Finished batches are appended to output_path as they arrive, so rows are in
+    completion order; sort on spec_id for the grid order. Progress is printed about once a second.
+
+    Args:
+        grid (dict, optional): Grid config (see DEFAULT_GRID). Defaults to DEFAULT_GRID.
+        data_path (str): Merged dataset (.feather, or .csv).
+        output_path (str): Tidy results CSV, one row per specification and term.
+        max_workers (int, optional): Worker processes. Defaults to the number of CPUs.
+        batch_size (int): Specifications sent to a worker at a time.
+
+    Returns:
+        dict: "specs", "fitted" and "failed" counts, "seconds" and "output_path".
+    """
+    grid = grid or DEFAULT_GRID
+    specs = enumerate_specs(grid)
+    batches = [specs[i:i + batch_size] for i in range(0, len(specs), batch_size)]
+    columns = [grid["outcome"]] + list(grid["regressors"])
+    logger.info(f"Fitting {len(specs)} specifications in {len(batches)} batches")
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    start = time.perf_counter()
+    done, failed, header, last_report = 0, [], True, start
+    with open(output_path, "w", newline="", encoding="utf-8") as f, \
+            ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                initargs=(data_path, columns, list(grid["cluster"]))) as pool:
+        futures = {pool.submit(_fit_specs, batch): len(batch) for batch in batches}
+        for future in as_completed(futures):
+            table, errors = future.result()
+            if table is not None:
+                table.to_csv(f, index=False, header=header)
+                header = False
+            failed.extend(errors)
+            done += futures[future]
+            now = time.perf_counter()
+            # Report at most once a second, and always for the last batch
+            if now - last_report < 1 and done < len(specs):
+                continue
+            last_report, elapsed = now, now - start
+            logger.info(f"{done}/{len(specs)} specifications ({elapsed:.1f}s elapsed, "
+                        f"~{elapsed / done * (len(specs) - done):.1f}s left)")
+
+    seconds = time.perf_counter() - start
+    for spec, error in failed:
+        logger.warning(f"Failed spec {spec['spec_id']} ({spec['formula']}, cluster={spec['cluster']}): {error}")
+    logger.info(f"Fitted {len(specs) - len(failed)}/{len(specs)} specifications in {seconds:.1f}s -> {output_path}")
+    return {"specs": len(specs), "fitted": len(specs) - len(failed), "failed": len(failed),
+            "seconds": seconds, "output_path": output_path}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fit a grid of earnings regression specifications.")
+    parser.add_argument("--config", help="JSON grid config; missing keys use the default grid")
+    parser.add_argument("--data", default="artifacts/cleaned_merged_dataset.feather")
+    parser.add_argument("--output", default="artifacts/spec_grid.csv")
+    parser.add_argument("--workers", type=int, help="worker processes (default: number of CPUs)")
+    parser.add_argument("--batch-size", type=int, default=8, help="specifications per task")
+    parser.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"])
+    args = parser.parse_args(argv)
+    setup_logging(args.log_level)
+    run_spec_grid(load_grid(args.config), args.data, args.output, args.workers, args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from data_cleaning import RAW_FILES
+
+
+# Word pieces combined into synthetic place names ("North" + "field" -> "Northfield")
+PLACE_STEMS = ["North", "South", "East", "West", "Green", "Oak", "Maple", "Pine", "Cedar", "Elm",
+               "River", "Lake", "Stone", "Fair", "Clear", "Spring", "Bright", "Silver", "Red", "Glen",
+               "Ash", "Birch", "Brook", "Fox", "Hazel", "Iron", "Kings", "Mill", "New", "Rose",
+               "Sand", "Summer", "Winter", "Wood", "Hill", "Cold", "Deer", "Eagle", "High", "Long"]
+PLACE_ENDINGS = ["field", "ton", "ville", "wood", "port", "ford", "dale", "burg", "haven", "view",
+                 "mont", "brook", "ridge", "land", "worth", "bury", "chester", "wick", "stead", "vale",
+                 "moor", "crest", "gate", "hurst", "ley", "mouth", "shire", "stone", "water", "well",
+                 "by", "cliff", "croft", "den", "holm", "ham", "side", "thorpe", "wold", "wych"]
+
+# Institution name patterns; beyond the first 12,800 names a "--Campus" suffix is added, as US News does
+NAME_PATTERNS = ["University of {place}", "{place} University", "{place} College", "{place} State University",
+                 "{place} Institute of Technology", "{place} A&M University", "{place} Polytechnic University",
+                 "College of {place}"]
+
+STATES = ["AL", "AK", "AZ", "AR", "CA", "CO", "CT", "DE", "DC", "FL", "GA", "HI", "ID", "IL", "IN", "IA",
+          "KS", "KY", "LA", "ME", "MD", "MA", "MI", "MN", "MS", "MO", "MT", "NE", "NV", "NH", "NJ", "NM",
+          "NY", "NC", "ND", "OH", "OK", "OR", "PA", "RI", "SC", "SD", "TN", "TX", "UT", "VT", "VA", "WA",
+          "WV", "WI", "WY"]
+
+# Shape of the real top-50 artifacts: the earnings and PUH files also list institutions outside the
+# US News universe (about 6 and 2.2 per US News school), 16% of SAT scores are missing, and a
+# quarter of the PUH rows lack some yearly ranks.
+EARNINGS_EXTRA = 6.0
+PUH_EXTRA = 2.2
+SAT_MISSING = 0.16
+PUH_GAPS = 0.25
+# Share of names spelled differently in the other sources ("-" or " at " for "--", a dropped letter)
+VARIANT_SHARE = 0.05
+
+
+def institution_names(n, offset=0):
+    """
+    Distinct synthetic institution names, deterministic in their position.
+
+    The pattern varies fastest, then the place, then the campus, so small samples mix every
+    pattern and campus suffixes only appear beyond the first 12,800 names (about 500,000 in all).
+    """
+    places = [stem + ending for stem in PLACE_STEMS for ending in PLACE_ENDINGS]
+    campuses = [""] + places[::7][:199]
+    capacity = len(NAME_PATTERNS) * len(places) * len(campuses)
+    if offset + n > capacity:
+        raise ValueError(f"at most {capacity:,} synthetic names are available")
+
+    names = []
+    for position in range(offset, offset + n):
+        rest, pattern = divmod(position, len(NAME_PATTERNS))
+        campus, place = divmod(rest, len(places))
+        name = NAME_PATTERNS[pattern].format(place=places[place])
+        names.append(f"{name}--{campuses[campus]}" if campus else name)
+    return names
+
+
+def spelling_variants(names, rng, share=VARIANT_SHARE):
+    """Respell a share of the names the way other sources do, so that name resolution is exercised."""
+    names = pd.Series(names, dtype=object)
+    picked = rng.random(len(names)) < share
+    kind = rng.integers(0, 3, len(names))
+    names[picked & (kind == 0)] = names[picked & (kind == 0)].str.replace("--", "-", regex=False)
+    names[picked & (kind == 1)] = names[picked & (kind == 1)].str.replace("--", " at ", regex=False)
+    typo = names[picked & (kind == 2)]
+    # Drop one letter from the middle of long names, which the fuzzy fallback still resolves
+    names[typo.index] = [name[:len(name) // 2] + name[len(name) // 2 + 1:] if len(name) > 30 else name
+                         for name in typo]
+    return names.tolist()
+
+
+def generate_sources(n_institutions, seed=0, earnings_extra=EARNINGS_EXTRA, puh_extra=PUH_EXTRA):
+    """
+    Generate synthetic raw sources with the same columns and value formats as the collected files.
+
+    Args:
+        n_institutions (int): Schools in the US News ranking (and in the tuition/SAT file).
+        seed (int): Seed of the random generator.
+        earnings_extra, puh_extra (float): Rows per US News school for institutions outside the
+                                           ranking, in the earnings and PUH files.
+
+    Returns:
+        dict: RAW_FILES key -> raw DataFrame.
+    """
+    rng = np.random.default_rng(seed)
+    n = n_institutions
+    names = institution_names(n)
+
+    # US News: schools are ordered by an underlying quality score, and about half of them share
+    # their displayed rank with the school above
+    quality = np.sort(rng.normal(0, 1, n))[::-1]
+    starts = np.r_[True, rng.random(n - 1) >= 0.5]
+    display_rank = pd.Series(np.maximum.accumulate(np.where(starts, np.arange(1, n + 1), 0)))
+    usnews = pd.DataFrame({
+        "institution.displayName": names,
+        "institution.state": rng.choice(STATES, n),
+        "ranking.displayRank": "#" + display_rank.astype(str),
+        "ranking.sortRank": np.arange(1, n + 1),
+        "ranking.isTied": display_rank.duplicated(keep=False).to_numpy(),
+    })
+
+    sat = np.clip(np.round((1350 + 120 * quality + rng.normal(0, 40, n)) / 10) * 10, 900, 1570)
+    tuition_sat = pd.DataFrame({
+        "institution.displayName": names,
+        "searchData.tuition.rawValue": np.clip(45000 + 9000 * quality + rng.normal(0, 8000, n), 8000, 70000)
+                                         .round().astype(int),
+        "searchData.satAvg.rawValue": pd.array(np.where(rng.random(n) < SAT_MISSING, np.nan, sat), dtype="Int64"),
+    })
+
+    n_other = int(n * earnings_extra)
+    earnings_names = spelling_variants(names, rng) + institution_names(n_other, offset=n)
+    earnings_quality = np.concatenate([quality, rng.normal(-1.5, 1, n_other)])
+    earnings = pd.DataFrame({
+        "Institution": earnings_names,
+        "Median Earnings - 6 Years Post-Entry (Scorecard)": np.round(
+            np.maximum(55000 + 12000 * earnings_quality + rng.normal(0, 9000, n + n_other), 15000)),
+    }).sort_values("Institution", ignore_index=True)
+
+    n_puh = int(n * puh_extra)
+    puh_names = spelling_variants(names, rng) + institution_names(n_puh, offset=n + n_other)
+    base_rank = np.concatenate([np.arange(1, n + 1), rng.integers(n // 2 + 1, n * 2 + 2, n_puh)])
+    ranks = np.maximum(np.round(base_rank[:, None] + rng.normal(0, 0.1 * base_rank[:, None] + 1, (n + n_puh, 8))), 1)
+    gaps = (rng.random(n + n_puh) < PUH_GAPS)[:, None] & (np.arange(8) < rng.integers(1, 8, (n + n_puh, 1)))
+    ranks = np.where(gaps, np.nan, ranks)
+    puh = pd.DataFrame(ranks, columns=[f"rk{year}" for year in range(2018, 2026)]).astype("Int64")
+    puh.insert(0, "University", puh_names)
+    puh["avgrk"] = np.nanmean(ranks, axis=1).round(3)
+
+    return {"usnews": usnews, "tuition_sat": tuition_sat, "earnings": earnings, "puh": puh}
+
+
+def write_sources(output_dir, n_institutions, seed=0, **kwargs):
+    """
+    Write synthetic raw sources under the file names process_university_data reads.
+
+    Returns:
+        dict: RAW_FILES key -> path of the written CSV.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    paths = {}
+    for source, df in generate_sources(n_institutions, seed, **kwargs).items():
+        paths[source] = os.path.join(output_dir, RAW_FILES[source])
+        df.to_csv(paths[source], index=False)
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write synthetic versions of the four raw data files.")
+    parser.add_argument("n_institutions", type=int, help="schools in the synthetic US News ranking")
+    parser.add_argument("--output-dir", default="artifacts/synthetic")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    for path in write_sources(args.output_dir, args.n_institutions, args.seed).values():
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import re
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+
+ROW_NUMBER = re.compile(r"\brow-(\d+)\b")
+
+
+def extract_table(html, columns, row_range=None, table_index=0, converters=None, missing="N/A",
+                  parser="lxml"):
+    """
+    Extract rows from an HTML table into a list of dicts.
+
+    Only <table> elements are built into the parse tree (via SoupStrainer), and each row's
+    cells are read in a single pass over its <td> children instead of one lookup per column.
+
+    Args:
+        html (str or bytes): Page source.
+        columns (dict): Cell class (e.g. "column-1") -> output field name. Fields come out in this order.
+        row_range (tuple, optional): Inclusive (first, last) row numbers to keep, read from the
+                                     "row-N" class of each <tr>. Rows without that class are skipped
+                                     when a range is given. Defaults to every row with cells.
+        table_index (int): Which <table> on the page to read.
+        converters (dict, optional): Field name -> function applied to the cell text.
+        missing (str): Value used when a row has no cell for a column.
+        parser (str): BeautifulSoup tree builder, "lxml" by default.
+
+    Returns:
+        list: One dict per row, sorted by row number when row_range is given.
+    """
+    converters = converters or {}
+    soup = BeautifulSoup(html, parser, parse_only=SoupStrainer("table"))
+    tables = soup.find_all("table")
+    if len(tables) <= table_index:
+        raise ValueError(f"Page has {len(tables)} table(s); cannot read table {table_index}")
+
+    rows = []
+    for tr in tables[table_index].find_all("tr"):
+        if row_range is not None:
+            match = ROW_NUMBER.search(" ".join(tr.get("class", [])))
+            if not match:
+                continue
+            row_num = int(match.group(1))
+            if not row_range[0] <= row_num <= row_range[1]:
+                continue
+        else:
+            row_num = len(rows)
+
+        cells = {}
+        for td in tr.find_all("td", recursive=False):
+            for cls in td.get("class", []):
+                if cls in columns:
+                    cells[columns[cls]] = td.get_text(strip=True)
+                    break
+        if not cells and row_range is None:
+            continue
+
+        record = {}
+        for field in columns.values():
+            value = cells.get(field, missing)
+            if field in converters:
+                value = converters[field](value)
+            record[field] = value
+        rows.append((row_num, record))
+
+    rows.sort(key=lambda row: row[0])
+    return [record for _, record in rows]